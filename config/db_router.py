@@ -0,0 +1,196 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('tienda.db')
+
+# Réplica de lectura para reportes.
+#
+# Si DATABASES tiene el alias 'reportes', las lecturas hechas dentro de
+# leer_de_reportes() (todos los métodos de reportes_niveles y
+# GeneradorReportes) van a la réplica, salvo que:
+#   - la réplica esté atrasada más de DB_REPORTES_RETRASO_MAX segundos o no
+#     responda (se verifica cada DB_REPORTES_VERIFICAR_CADA segundos);
+#   - la petición actual escriba (POST/PUT/PATCH/DELETE) o esté dentro de una
+#     transacción en la primaria;
+#   - el usuario haya escrito hace menos de DB_REPORTES_FIJAR_SEGUNDOS (p. ej.
+#     registró una venta): así ve su propia venta en los reportes ("read your
+#     writes") aunque la réplica todavía no la tenga.
+# En cualquiera de esos casos se lee de la primaria. Las escrituras van
+# siempre a la primaria.
+
+ALIAS_REPORTES = 'reportes'
+
+_lectura_reportes = ContextVar('lectura_reportes', default=False)
+_solo_primaria = ContextVar('solo_primaria', default=False)
+_peticion_actual = ContextVar('peticion_actual', default=None)
+
+
+@contextmanager
+def leer_de_reportes():
+    """Las lecturas del bloque (o de la función decorada) pueden ir a la réplica."""
+    token = _lectura_reportes.set(True)
+    try:
+        yield
+    finally:
+        _lectura_reportes.reset(token)
+
+
+@contextmanager
+def solo_primaria():
+    """Fuerza las lecturas del bloque a la primaria aunque estén dentro de leer_de_reportes()."""
+    token = _solo_primaria.set(True)
+    try:
+        yield
+    finally:
+        _solo_primaria.reset(token)
+
+
+def _en_reportes(funcion):
+    if not inspect.iscoroutinefunction(funcion):
+        return leer_de_reportes()(funcion)
+
+    # Una corrutina se ejecuta después de retornar: el contexto va dentro de ella
+    @functools.wraps(funcion)
+    async def envuelta(*args, **kwargs):
+        with leer_de_reportes():
+            return await funcion(*args, **kwargs)
+    return envuelta
+
+
+def lecturas_en_reportes(cls):
+    """Decorador de clase: envuelve cada método público (sync o async) en leer_de_reportes()."""
+    for nombre, atributo in list(vars(cls).items()):
+        if nombre.startswith('_'):
+            continue
+        if isinstance(atributo, staticmethod):
+            setattr(cls, nombre, staticmethod(_en_reportes(atributo.__func__)))
+        elif callable(atributo):
+            setattr(cls, nombre, _en_reportes(atributo))
+    return cls
+
+
+# --------------------------------------------------------
+# "Read your writes"
+# --------------------------------------------------------
+def _clave_fijada(usuario_id):
+    return f'db_reportes:primaria:{usuario_id}'
+
+
+def fijar_primaria(usuario):
+    """Tras una escritura del usuario, sus lecturas de reportes van a la primaria por un tiempo."""
+    if ALIAS_REPORTES in settings.DATABASES and usuario is not None and usuario.is_authenticated:
+        cache.set(_clave_fijada(usuario.pk), True, settings.DB_REPORTES_FIJAR_SEGUNDOS)
+
+
+def _peticion_fijada(request):
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return True
+
+    # DRF autentica (JWT) dentro de la vista y deja el usuario en la petición de
+    # Django: se consulta la caché una sola vez por petición y usuario
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated:
+        return False
+    memo = getattr(request, '_reportes_fijada', None)
+    if memo is None or memo[0] != usuario.pk:
+        memo = (usuario.pk, bool(cache.get(_clave_fijada(usuario.pk))))
+        request._reportes_fijada = memo
+    return memo[1]
+
+
+# --------------------------------------------------------
+# Retraso de la réplica
+# --------------------------------------------------------
+_SQL_RETRASO = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_estado = {'verificado': None, 'al_dia': False, 'retraso': None}
+_estado_lock = threading.Lock()
+
+
+def retraso_replica():
+    """Segundos de atraso de la réplica, o None si no responde."""
+    conexion = connections[ALIAS_REPORTES]
+    try:
+        with conexion.cursor() as cursor:
+            if conexion.vendor == 'postgresql':
+                # Sin tráfico en la primaria no hay nada que reproducir: si la
+                # réplica ya aplicó todo lo recibido, está al día
+                cursor.execute(_SQL_RETRASO)
+                return float(cursor.fetchone()[0])
+            # Otros motores (p. ej. dos archivos SQLite en desarrollo) no
+            # replican: basta con que la base responda
+            cursor.execute('SELECT 1')
+            return 0.0
+    except DatabaseError as e:
+        logger.warning("Réplica '%s' no disponible: %s", ALIAS_REPORTES, e)
+        try:
+            conexion.close()
+        except DatabaseError:
+            pass
+        return None
+
+
+def replica_al_dia():
+    ahora = time.monotonic()
+    verificado = _estado['verificado']
+    if verificado is not None and ahora - verificado < settings.DB_REPORTES_VERIFICAR_CADA:
+        return _estado['al_dia']
+
+    with _estado_lock:
+        verificado = _estado['verificado']
+        if verificado is None or time.monotonic() - verificado >= settings.DB_REPORTES_VERIFICAR_CADA:
+            retraso = retraso_replica()
+            al_dia = retraso is not None and retraso <= settings.DB_REPORTES_RETRASO_MAX
+            if retraso is not None and not al_dia and _estado['al_dia']:
+                logger.warning(
+                    "Réplica '%s' atrasada %.1f s (máximo %s): reportes en la primaria",
+                    ALIAS_REPORTES, retraso, settings.DB_REPORTES_RETRASO_MAX
+                )
+            _estado.update(verificado=time.monotonic(), al_dia=al_dia, retraso=retraso)
+    return _estado['al_dia']
+
+
+def _usar_replica():
+    if not _lectura_reportes.get() or _solo_primaria.get():
+        return False
+    if ALIAS_REPORTES not in settings.DATABASES:
+        return False
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return False
+    request = _peticion_actual.get()
+    if request is not None and _peticion_fijada(request):
+        return False
+    return replica_al_dia()
+
+
+class ReportesRouter:
+    """Lecturas de reportes a la réplica 'reportes'; todo lo demás a la primaria."""
+
+    def db_for_read(self, model, **hints):
+        return ALIAS_REPORTES if _usar_replica() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Aunque la instancia se haya leído de la réplica, se guarda en la primaria
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, ALIAS_REPORTES, None}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema de la primaria
+        return db != ALIAS_REPORTES
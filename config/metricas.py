@@ -0,0 +1,327 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import weakref
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+# Métricas estilo Prometheus compartidas entre procesos.
+#
+# Cada proceso (worker de gunicorn/uvicorn) escribe sus valores en su propio
+# archivo <pid>.db dentro de METRICAS_DIR, mapeado en memoria: sumar a un
+# contador es escribir 8 bytes, sin IPC ni locks entre procesos. /metrics lee
+# todos los archivos y los suma. Los medidores (gauges) de procesos que ya no
+# existen se descartan; los contadores e histogramas se conservan para que el
+# total no retroceda. METRICAS_DIR debe vaciarse en cada despliegue.
+
+_ENCABEZADO = 8  # bytes usados del archivo (uint64)
+_TAMANO_INICIAL = 64 * 1024
+
+
+def _alinear(n):
+    return (n + 7) & ~7
+
+
+class ArchivoMetricas:
+    """Valores float64 de un proceso, indexados por clave, en un archivo mmap."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        self.archivo = open(ruta, 'a+b')
+        if os.path.getsize(ruta) < _TAMANO_INICIAL:
+            self.archivo.truncate(_TAMANO_INICIAL)
+        self.mmap = mmap.mmap(self.archivo.fileno(), 0)
+        self.usado = struct.unpack_from('Q', self.mmap, 0)[0] or _ENCABEZADO
+        self.posiciones = {clave: pos for clave, pos, _ in _entradas(self.mmap, self.usado)}
+
+    def sumar(self, clave, valor):
+        with self.lock:
+            pos = self._posicion(clave)
+            struct.pack_into('d', self.mmap, pos, struct.unpack_from('d', self.mmap, pos)[0] + valor)
+
+    def _posicion(self, clave):
+        pos = self.posiciones.get(clave)
+        if pos is not None:
+            return pos
+
+        codificada = clave.encode()
+        largo = _alinear(4 + len(codificada))
+        if self.usado + largo + 8 > len(self.mmap):
+            self._agrandar(self.usado + largo + 8)
+
+        # El valor y la clave se escriben antes de mover 'usado': quien lea
+        # el archivo al mismo tiempo nunca ve una entrada a medias
+        inicio = self.usado
+        struct.pack_into(f'I{len(codificada)}s', self.mmap, inicio, len(codificada), codificada)
+        struct.pack_into('d', self.mmap, inicio + largo, 0.0)
+        self.usado = inicio + largo + 8
+        struct.pack_into('Q', self.mmap, 0, self.usado)
+
+        self.posiciones[clave] = inicio + largo
+        return inicio + largo
+
+    def _agrandar(self, minimo):
+        tamano = len(self.mmap)
+        while tamano < minimo:
+            tamano *= 2
+        self.mmap.close()
+        self.archivo.truncate(tamano)
+        self.mmap = mmap.mmap(self.archivo.fileno(), 0)
+
+
+def _entradas(datos, usado):
+    pos = _ENCABEZADO
+    while pos < usado:
+        largo_clave = struct.unpack_from('I', datos, pos)[0]
+        clave = bytes(datos[pos + 4:pos + 4 + largo_clave]).decode()
+        pos_valor = pos + _alinear(4 + largo_clave)
+        yield clave, pos_valor, struct.unpack_from('d', datos, pos_valor)[0]
+        pos = pos_valor + 8
+
+
+_archivo = None
+_archivo_pid = None
+_archivo_lock = threading.Lock()
+
+
+def _archivo_proceso():
+    # Se abre perezosamente y se reabre tras un fork (gunicorn --preload)
+    global _archivo, _archivo_pid
+    pid = os.getpid()
+    if _archivo_pid != pid:
+        with _archivo_lock:
+            if _archivo_pid != pid:
+                os.makedirs(settings.METRICAS_DIR, exist_ok=True)
+                _archivo = ArchivoMetricas(os.path.join(settings.METRICAS_DIR, f'{pid}.db'))
+                _archivo_pid = pid
+    return _archivo
+
+
+# --------------------------------------------------------
+# Tipos de métrica
+# --------------------------------------------------------
+REGISTRO = {}
+
+
+def _clave(nombre, etiquetas):
+    return json.dumps([nombre, sorted(etiquetas.items())], ensure_ascii=False)
+
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        REGISTRO[nombre] = self
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def inc(self, valor=1, **etiquetas):
+        _archivo_proceso().sumar(_clave(self.nombre, etiquetas), valor)
+
+
+class Medidor(Metrica):
+    """Gauge: se suma entre procesos vivos."""
+    tipo = 'gauge'
+
+    def inc(self, valor=1, **etiquetas):
+        _archivo_proceso().sumar(_clave(self.nombre, etiquetas), valor)
+
+    def dec(self, valor=1, **etiquetas):
+        self.inc(-valor, **etiquetas)
+
+
+class Histograma(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, limites):
+        super().__init__(nombre, ayuda)
+        self.limites = sorted(limites) + [float('inf')]
+
+    def observar(self, valor, **etiquetas):
+        # Se guarda sólo el bucket que corresponde; se acumulan al exponer
+        archivo = _archivo_proceso()
+        limite = next(l for l in self.limites if valor <= l)
+        archivo.sumar(_clave(self.nombre + '_bucket', {**etiquetas, 'le': _formato(limite)}), 1)
+        archivo.sumar(_clave(self.nombre + '_sum', etiquetas), valor)
+        archivo.sumar(_clave(self.nombre + '_count', etiquetas), 1)
+
+
+LIMITES_HTTP = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+HTTP_DURACION = Histograma(
+    'http_peticion_duracion_segundos', "Duración de las peticiones HTTP por endpoint", LIMITES_HTTP
+)
+HTTP_PETICIONES = Contador('http_peticiones_total', "Peticiones HTTP por endpoint, método y estado")
+REPORTE_DURACION = Histograma(
+    'reporte_duracion_segundos', "Tiempo de ejecución de cada reporte (nombre de ReportesRootView)",
+    LIMITES_HTTP + [30, 60]
+)
+CACHE_OPERACIONES = Contador('cache_lecturas_total', "Lecturas de caché por resultado (hit/miss)")
+DB_CONEXIONES_ABIERTAS = Medidor('db_conexiones_abiertas', "Conexiones a la base abiertas ahora")
+DB_CONEXIONES_CREADAS = Contador('db_conexiones_creadas_total', "Conexiones a la base abiertas desde el inicio")
+VENTAS_CONFIRMADAS = Contador('ventas_confirmadas_total', "Ventas con la transacción confirmada (commit)")
+
+
+def etiqueta_tipo_pago(valor):
+    """Etiqueta de VENTAS_CONFIRMADAS: tipo_pago es texto libre y cada valor distinto sería una serie más."""
+    valor = (valor or '').strip().lower()
+    if valor == 'efectivo':
+        return 'efectivo'
+    return 'credito' if valor in ('credito', 'crédito') else 'otro'
+
+
+# --------------------------------------------------------
+# Exposición (/metrics)
+# --------------------------------------------------------
+def _formato(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recolectar():
+    """{(nombre, etiquetas_ordenadas): valor} sumando los archivos de todos los procesos."""
+    directorio = settings.METRICAS_DIR
+    totales = {}
+    if not os.path.isdir(directorio):
+        return totales
+
+    gauges = {nombre for nombre, metrica in REGISTRO.items() if metrica.tipo == 'gauge'}
+    for nombre_archivo in os.listdir(directorio):
+        if not nombre_archivo.endswith('.db'):
+            continue
+        pid = int(nombre_archivo[:-3])
+        vivo = _proceso_vivo(pid)
+        with open(os.path.join(directorio, nombre_archivo), 'rb') as archivo:
+            datos = archivo.read()
+        if len(datos) < _ENCABEZADO:
+            continue
+        usado = min(struct.unpack_from('Q', datos, 0)[0], len(datos))
+        for clave, _, valor in _entradas(datos, usado):
+            nombre, etiquetas = json.loads(clave)
+            if nombre in gauges and not vivo:
+                continue
+            clave_total = (nombre, tuple(tuple(e) for e in etiquetas))
+            totales[clave_total] = totales.get(clave_total, 0.0) + valor
+    return totales
+
+
+def exponer():
+    totales = recolectar()
+    lineas = []
+    for nombre, metrica in REGISTRO.items():
+        lineas.append(f'# HELP {nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {nombre} {metrica.tipo}')
+        if metrica.tipo == 'histogram':
+            lineas.extend(_lineas_histograma(metrica, totales))
+        else:
+            for (nombre_muestra, etiquetas), valor in sorted(totales.items()):
+                if nombre_muestra == nombre:
+                    lineas.append(_linea(nombre, etiquetas, valor))
+    return '\n'.join(lineas) + '\n'
+
+
+def _lineas_histograma(metrica, totales):
+    # Agrupar por etiquetas (sin 'le') y acumular los buckets en orden
+    series = {}
+    for (nombre, etiquetas), valor in totales.items():
+        if nombre == metrica.nombre + '_bucket':
+            base = tuple(e for e in etiquetas if e[0] != 'le')
+            le = dict(etiquetas)['le']
+            series.setdefault(base, {})[le] = valor
+
+    lineas = []
+    for base in sorted(series):
+        acumulado = 0.0
+        for limite in metrica.limites:
+            acumulado += series[base].get(_formato(limite), 0.0)
+            lineas.append(_linea(metrica.nombre + '_bucket', base + (('le', _formato(limite)),), acumulado))
+        lineas.append(_linea(metrica.nombre + '_sum', base, totales.get((metrica.nombre + '_sum', base), 0.0)))
+        lineas.append(_linea(metrica.nombre + '_count', base, totales.get((metrica.nombre + '_count', base), 0.0)))
+    return lineas
+
+
+def _linea(nombre, etiquetas, valor):
+    if etiquetas:
+        texto = ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas)
+        return f'{nombre}{{{texto}}} {_formato(valor)}'
+    return f'{nombre} {_formato(valor)}'
+
+
+def metricas_view(request):
+    token = settings.METRICAS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# --------------------------------------------------------
+# Conexiones a la base
+# --------------------------------------------------------
+def _conexion_creada(sender, connection, **kwargs):
+    alias = connection.alias
+    DB_CONEXIONES_CREADAS.inc(alias=alias)
+    try:
+        # Al cerrarse, Django suelta la conexión del driver y se descuenta
+        weakref.finalize(connection.connection, DB_CONEXIONES_ABIERTAS.dec, alias=alias)
+    except TypeError:
+        return  # el driver no admite weakref (sqlite3): sólo se cuentan las creadas
+    DB_CONEXIONES_ABIERTAS.inc(alias=alias)
+
+
+connection_created.connect(_conexion_creada)
+
+
+# --------------------------------------------------------
+# Backends de caché con conteo de hits/misses
+# --------------------------------------------------------
+_FALTANTE = object()
+
+
+class LocMemCacheMedida(LocMemCache):
+    def get(self, key, default=None, version=None):
+        # BaseCache.get_many también pasa por aquí
+        valor = super().get(key, _FALTANTE, version)
+        CACHE_OPERACIONES.inc(resultado='miss' if valor is _FALTANTE else 'hit')
+        return default if valor is _FALTANTE else valor
+
+
+class RedisCacheMedida(RedisCache):
+    def get(self, key, default=None, version=None):
+        valor = super().get(key, _FALTANTE, version)
+        CACHE_OPERACIONES.inc(resultado='miss' if valor is _FALTANTE else 'hit')
+        return default if valor is _FALTANTE else valor
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        valores = super().get_many(keys, version)
+        if valores:
+            CACHE_OPERACIONES.inc(len(valores), resultado='hit')
+        if len(keys) > len(valores):
+            CACHE_OPERACIONES.inc(len(keys) - len(valores), resultado='miss')
+        return valores
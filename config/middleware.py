@@ -0,0 +1,247 @@
+import heapq
+import json
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from config import db_router, metricas
+
+logger = logging.getLogger('tienda.sql')
+
+# Instrumentación de SQL por petición.
+#
+# Cada conexión a la base recibe (al abrirse) un execute_wrapper que sólo
+# mide si la petición actual tiene un registro activo en la ContextVar; si no,
+# llama directo a execute. Así el costo para las peticiones no muestreadas es
+# una lectura de ContextVar por consulta, y funciona igual con vistas async
+# (sync_to_async copia el contexto al hilo donde corre el ORM).
+
+_registro_actual = ContextVar('registro_sql', default=None)
+
+# IN (%s, %s, ...) de distinto largo es la misma consulta
+_LISTA_PARAMETROS = re.compile(r'\((?:%s, )*%s\)')
+_LARGO_SQL_LOG = 300
+
+# Rutas cuyo tiempo se registra también como reporte_duracion_segundos
+RUTAS_REPORTES = ('api/reportes/', 'api/async/reportes/')
+
+
+class RegistroSQL:
+    def __init__(self, max_lentas):
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.firmas = {}
+        self.lentas = []
+        self.max_lentas = max_lentas
+
+    def anotar(self, sql, duracion, alias):
+        self.consultas += 1
+        self.tiempo += duracion
+
+        firma = _LISTA_PARAMETROS.sub('(...)', sql)
+        veces, total = self.firmas.get(firma, (0, 0.0))
+        self.firmas[firma] = (veces + 1, total + duracion)
+
+        # Min-heap de tamaño fijo con las más lentas
+        entrada = (duracion, self.consultas, alias, sql)
+        if len(self.lentas) < self.max_lentas:
+            heapq.heappush(self.lentas, entrada)
+        elif duracion > self.lentas[0][0]:
+            heapq.heapreplace(self.lentas, entrada)
+
+    def duplicadas(self, minimo):
+        """Firmas repetidas al menos `minimo` veces: típicamente un N+1."""
+        repetidas = [(veces, total, firma) for firma, (veces, total) in self.firmas.items() if veces >= minimo]
+        return sorted(repetidas, reverse=True)
+
+
+def _envoltorio(execute, sql, params, many, context):
+    registro = _registro_actual.get()
+    if registro is None:
+        return execute(sql, params, many, context)
+
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        registro.anotar(sql, time.perf_counter() - inicio, context['connection'].alias)
+
+
+def _instalar_envoltorio(sender, connection, **kwargs):
+    if _envoltorio not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_envoltorio)
+
+
+connection_created.connect(_instalar_envoltorio)
+
+
+class InstrumentacionSQLMiddleware:
+    """
+    Mide las consultas SQL de una muestra de peticiones (SQL_INSTRUMENTACION_MUESTREO)
+    o de las que traen la cabecera X-Instrumentar-SQL (si SQL_INSTRUMENTACION_CABECERA).
+    Agrega Server-Timing a la respuesta y deja una línea JSON en el logger 'tienda.sql'.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Conexiones que ya estaban abiertas antes de cargar el middleware
+        for conexion in connections.all(initialized_only=True):
+            _instalar_envoltorio(None, conexion)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.instrumentar(request):
+            return self.get_response(request)
+
+        registro = RegistroSQL(settings.SQL_INSTRUMENTACION_LENTAS)
+        token = _registro_actual.set(registro)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _registro_actual.reset(token)
+        self.reportar(request, response, registro, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        if not self.instrumentar(request):
+            return await self.get_response(request)
+
+        registro = RegistroSQL(settings.SQL_INSTRUMENTACION_LENTAS)
+        token = _registro_actual.set(registro)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _registro_actual.reset(token)
+        self.reportar(request, response, registro, time.perf_counter() - inicio)
+        return response
+
+    def instrumentar(self, request):
+        if settings.SQL_INSTRUMENTACION_CABECERA and request.headers.get('X-Instrumentar-SQL') == '1':
+            return True
+        muestreo = settings.SQL_INSTRUMENTACION_MUESTREO
+        return muestreo > 0 and random.random() < muestreo
+
+    def reportar(self, request, response, registro, duracion):
+        duplicadas = registro.duplicadas(settings.SQL_INSTRUMENTACION_DUPLICADAS)
+
+        metricas = [
+            f'db;dur={registro.tiempo * 1000:.1f};desc="{registro.consultas} consultas"',
+            f'app;dur={(duracion - registro.tiempo) * 1000:.1f}',
+        ]
+        if duplicadas:
+            metricas.append(f'dup;desc="{len(duplicadas)} consultas repetidas"')
+        existente = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existente] if existente else []) + metricas)
+
+        logger.info(json.dumps({
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            'duracion_ms': round(duracion * 1000, 1),
+            'consultas': registro.consultas,
+            'db_ms': round(registro.tiempo * 1000, 1),
+            'duplicadas': [
+                {'sql': firma[:_LARGO_SQL_LOG], 'veces': veces, 'ms': round(total * 1000, 1)}
+                for veces, total, firma in duplicadas[:5]
+            ],
+            'lentas': [
+                {'sql': sql[:_LARGO_SQL_LOG], 'ms': round(tiempo * 1000, 1), 'base': alias}
+                for tiempo, _, alias, sql in sorted(registro.lentas, reverse=True)
+            ],
+        }, ensure_ascii=False))
+
+
+class MetricasMiddleware:
+    """Latencia por endpoint (nombre de la URL) y tiempo de cada reporte para /metrics."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio)
+        return response
+
+    def registrar(self, request, response, duracion):
+        coincidencia = getattr(request, 'resolver_match', None)
+        # Sin ruta (404) todo va a una sola serie: las URLs libres dispararían la cardinalidad
+        endpoint = coincidencia.view_name if coincidencia else 'sin_ruta'
+        if endpoint == 'metricas':
+            return
+
+        metricas.HTTP_DURACION.observar(duracion, endpoint=endpoint, metodo=request.method)
+        metricas.HTTP_PETICIONES.inc(
+            endpoint=endpoint, metodo=request.method, estado=str(response.status_code)
+        )
+        if coincidencia and coincidencia.route.startswith(RUTAS_REPORTES) and coincidencia.url_name:
+            metricas.REPORTE_DURACION.observar(duracion, reporte=coincidencia.url_name)
+
+
+class ReplicaReportesMiddleware:
+    """
+    Deja la petición al alcance de ReportesRouter y, si el usuario escribió con
+    éxito (p. ej. registró una venta), fija sus lecturas de reportes a la primaria
+    durante DB_REPORTES_FIJAR_SEGUNDOS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = db_router._peticion_actual.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router._peticion_actual.reset(token)
+        self.fijar(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = db_router._peticion_actual.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_router._peticion_actual.reset(token)
+        self.fijar(request, response)
+        return response
+
+    def fijar(self, request, response):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or response.status_code >= 400:
+            return
+        db_router.fijar_primaria(getattr(request, 'user', None))
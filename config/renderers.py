@@ -0,0 +1,150 @@
+import decimal
+
+from django.conf import settings
+from django.utils.http import parse_header_parameters
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional: sin ella se usa el JSON de DRF
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # dependencia opcional (consumidores internos)
+    msgpack = None
+
+
+# Renderers/parsers rápidos para toda la API (REST_FRAMEWORK en settings).
+#
+# Los tipos que orjson no conoce (Decimal, fechas, timedelta, traducciones
+# perezosas, querysets) pasan por el mismo JSONEncoder de DRF, así el JSON es
+# equivalente al de JSONRenderer, aunque no idéntico byte a byte (orjson
+# escribe 1e20 donde DRF escribe 1e+20). Lo que orjson no puede serializar
+# (enteros de más de 64 bits) se renderiza con JSONRenderer. Los Decimal salen
+# como número, igual que hasta ahora, salvo JSON_DECIMAL_COMO_TEXTO o
+# 'Accept: application/json; decimal=texto', que los envía como string sin
+# perder precisión.
+
+_encoder_drf = JSONEncoder()
+
+# U+2028/U+2029 son válidos en JSON pero no en JavaScript: DRF los escapa
+_SEPARADORES_JS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def _por_defecto(decimal_como_texto):
+    def por_defecto(obj):
+        if decimal_como_texto and isinstance(obj, decimal.Decimal):
+            return str(obj)
+        return _encoder_drf.default(obj)
+    return por_defecto
+
+
+_POR_DEFECTO = {True: _por_defecto(True), False: _por_defecto(False)}
+
+
+class _EncoderDecimalTexto(JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+class _JSONRendererDecimalTexto(JSONRenderer):
+    encoder_class = _EncoderDecimalTexto
+
+
+# Sin orjson, o con datos que orjson rechaza
+_RENDERER_DRF = {True: _JSONRendererDecimalTexto(), False: JSONRenderer()}
+
+if orjson is not None:
+    # Fechas por el encoder de DRF ('Z' para UTC, time/timedelta como hasta ahora)
+    _OPCIONES = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def decimal_como_texto(accepted_media_type=None):
+    """Decimal como string según 'decimal=texto|numero' en el Accept, o JSON_DECIMAL_COMO_TEXTO."""
+    if accepted_media_type:
+        valor = parse_header_parameters(accepted_media_type)[1].get('decimal')
+        if valor in ('texto', 'numero'):
+            return valor == 'texto'
+    return settings.JSON_DECIMAL_COMO_TEXTO
+
+
+def dumps_json(data, decimal_texto=None, indentar=False):
+    """JSON compacto en bytes, con orjson si está instalado y si no con JSONRenderer."""
+    if decimal_texto is None:
+        decimal_texto = settings.JSON_DECIMAL_COMO_TEXTO
+
+    if orjson is None:
+        return _render_drf(data, decimal_texto, indentar)
+
+    opciones = _OPCIONES | orjson.OPT_INDENT_2 if indentar else _OPCIONES
+    try:
+        cuerpo = orjson.dumps(data, default=_POR_DEFECTO[decimal_texto], option=opciones)
+    except orjson.JSONEncodeError:
+        # p. ej. enteros de más de 64 bits, que el json de la biblioteca estándar sí admite
+        return _render_drf(data, decimal_texto, indentar)
+    for original, escapado in _SEPARADORES_JS:
+        if original in cuerpo:
+            cuerpo = cuerpo.replace(original, escapado)
+    return cuerpo
+
+
+def _render_drf(data, decimal_texto, indentar):
+    return _RENDERER_DRF[decimal_texto].render(data, renderer_context={'indent': 2} if indentar else None)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer con orjson; mismo media type y parámetros (indent, decimal)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        indentar = bool(self.get_indent(accepted_media_type, renderer_context or {}))
+        return dumps_json(data, decimal_como_texto(accepted_media_type), indentar)
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+# --------------------------------------------------------
+# MessagePack (Accept / Content-Type: application/msgpack)
+# --------------------------------------------------------
+class MessagePackRenderer(BaseRenderer):
+    """Mismos datos que el JSON (fechas como texto ISO); sólo si 'msgpack' está instalado."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(
+            data, default=_POR_DEFECTO[decimal_como_texto(accepted_media_type)],
+            use_bin_type=True, datetime=False,
+        )
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except ValueError as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
@@ -0,0 +1,97 @@
+from collections.abc import Mapping
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+
+
+# Resolución de claves foráneas por lote.
+#
+# Un PrimaryKeyRelatedField hace un SELECT por valor: en una lista (detalles
+# de una venta, carga masiva de productos) son N consultas sólo para validar.
+# ListaEnLoteSerializer junta los ids de cada ClavePrimariaEnLote de la lista,
+# los resuelve con un in_bulk por campo e informa todos los faltantes juntos;
+# después cada ítem se valida como siempre, tomando el objeto ya leído.
+#
+# Uso: el campo en el serializer y `list_serializer_class = ListaEnLoteSerializer`
+# en su Meta. Fuera de una lista el campo se comporta como PrimaryKeyRelatedField.
+
+
+def resolver_en_lote(queryset, ids, bloquear=False):
+    """
+    {pk: objeto} con una sola consulta. Con `bloquear` las filas quedan
+    tomadas (SELECT ... FOR UPDATE) en orden de pk, para que dos
+    transacciones con los mismos objetos no se bloqueen mutuamente; debe
+    llamarse dentro de transaction.atomic().
+    """
+    if not bloquear:
+        return queryset.in_bulk(ids)
+    return {obj.pk: obj for obj in queryset.select_for_update().filter(pk__in=ids).order_by('pk')}
+
+
+class ClavePrimariaEnLote(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que, dentro de ListaEnLoteSerializer, no consulta por ítem."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lote = None
+
+    def clave(self, valor):
+        """Valor recibido -> pk del modelo (como lo compara in_bulk); ValueError si no es válido."""
+        if isinstance(valor, bool):
+            raise ValueError(valor)
+        if self.pk_field is not None:
+            valor = self.pk_field.to_internal_value(valor)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(valor)
+        except DjangoValidationError:
+            raise ValueError(valor)
+
+    def to_internal_value(self, data):
+        if self.lote is not None:
+            try:
+                return self.lote[self.clave(data)]
+            except (KeyError, ValueError, TypeError, serializers.ValidationError):
+                pass
+        # Fuera de una lista, o un valor inválido: mismo error que PrimaryKeyRelatedField
+        return super().to_internal_value(data)
+
+
+class ListaEnLoteSerializer(serializers.ListSerializer):
+    """ListSerializer que resuelve los ClavePrimariaEnLote del hijo con un in_bulk por campo."""
+
+    def campos_en_lote(self):
+        return [
+            campo for campo in self.child.fields.values()
+            if isinstance(campo, ClavePrimariaEnLote) and not campo.read_only
+        ]
+
+    def to_internal_value(self, data):
+        campos = self.campos_en_lote() if isinstance(data, list) else []
+        try:
+            errores = {}
+            for campo in campos:
+                faltantes = self.resolver(campo, data)
+                if faltantes:
+                    errores[campo.field_name] = [
+                        ErrorDetail(campo.error_messages['does_not_exist'].format(pk_value=pk), code='does_not_exist')
+                        for pk in faltantes
+                    ]
+            if errores:
+                raise serializers.ValidationError(errores)
+            return super().to_internal_value(data)
+        finally:
+            for campo in campos:
+                campo.lote = None
+
+    def resolver(self, campo, data):
+        """Carga en el campo los objetos referenciados en la lista; devuelve los ids inexistentes."""
+        ids = set()
+        for item in data:
+            if isinstance(item, Mapping) and item.get(campo.field_name) is not None:
+                try:
+                    ids.add(campo.clave(item[campo.field_name]))
+                except (ValueError, TypeError, serializers.ValidationError):
+                    continue  # lo informa la validación del ítem
+        campo.lote = resolver_en_lote(campo.get_queryset(), ids) if ids else {}
+        return sorted(ids - campo.lote.keys(), key=str)
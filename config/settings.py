@@ -1,4 +1,6 @@
+import importlib.util
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
@@ -21,6 +23,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Apps propias
     'usuarios',
@@ -35,12 +38,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.MetricasMiddleware',
+    'config.middleware.InstrumentacionSQLMiddleware',  # mide la petición completa
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS habilitado
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.middleware.ReplicaReportesMiddleware',  # "read your writes" de la réplica de reportes
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,9 +84,48 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'tu_contraseña'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Conexiones persistentes: cada worker/hilo reutiliza su conexión hasta
+        # DB_CONN_MAX_AGE segundos (0 = una conexión por petición, None = sin límite).
+        # Mantener workers * hilos por debajo de max_connections de PostgreSQL.
+        'CONN_MAX_AGE': None if os.getenv('DB_CONN_MAX_AGE') == 'None' else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        # Antes de reutilizar una conexión se verifica que siga viva (p. ej. tras reiniciar PostgreSQL)
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
+# Réplica de lectura para reportes (config/db_router.py). Sólo se activa si se
+# define DB_REPORTES_HOST; los datos que no se indiquen se toman de la primaria.
+if os.getenv('DB_REPORTES_HOST'):
+    DATABASES['reportes'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPORTES_NAME', DATABASES['default']['NAME']),
+        'USER': os.getenv('DB_REPORTES_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPORTES_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('DB_REPORTES_HOST'),
+        'PORT': os.getenv('DB_REPORTES_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # En las pruebas la "réplica" es la misma base de pruebas
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['config.db_router.ReportesRouter']
+# Atraso máximo tolerado antes de volver a leer reportes de la primaria
+DB_REPORTES_RETRASO_MAX = float(os.getenv('DB_REPORTES_RETRASO_MAX', '10'))
+# Cada cuánto se vuelve a medir el atraso (por proceso)
+DB_REPORTES_VERIFICAR_CADA = float(os.getenv('DB_REPORTES_VERIFICAR_CADA', '5'))
+# Tras escribir, las lecturas de reportes del usuario van a la primaria este tiempo
+DB_REPORTES_FIJAR_SEGUNDOS = int(os.getenv('DB_REPORTES_FIJAR_SEGUNDOS', '30'))
+
+# Vistas async (/api/async/, config/vistas_async.py): hilos para el código
+# bloqueante (autenticación y reportes sync). Acota también las conexiones que
+# abren esas vistas a la base; pasadas ASYNC_MAX_PENDIENTES tareas en espera
+# se responde 503.
+ASYNC_HILOS_BLOQUEANTES = int(os.getenv('ASYNC_HILOS_BLOQUEANTES', '8'))
+ASYNC_MAX_PENDIENTES = int(os.getenv('ASYNC_MAX_PENDIENTES', '200'))
+
 # -------------------------------
 # USUARIOS PERSONALIZADOS
 # -------------------------------
@@ -96,6 +141,27 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# El primer hasher es el que se usa al guardar; los hashes antiguos se
+# actualizan a éste automáticamente en el siguiente login correcto.
+PASSWORD_HASHERS = [
+    os.getenv('PASSWORD_HASHER', 'usuarios.hashers.PBKDF2AjustableHasher'),
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '0')) or None
+
+# -------------------------------
+# LOGIN
+# -------------------------------
+# Hashes simultáneos (≈ núcleos disponibles) y cola máxima antes de responder 503
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', os.cpu_count() or 2))
+LOGIN_MAX_PENDIENTES = int(os.getenv('LOGIN_MAX_PENDIENTES', '200'))
+# True al servir con ASGI (uvicorn/daphne): /api/login/ pasa a ser una vista async
+LOGIN_ASYNC = os.getenv('LOGIN_ASYNC', 'False') == 'True'
+
 # -------------------------------
 # INTERNACIONALIZACIÓN
 # -------------------------------
@@ -114,6 +180,13 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Variantes de Product.foto (productos/imagenes.py). En producción el servidor
+# web sirve /media/ y sólo reenvía a Django las variantes que aún no existen
+# (p. ej. nginx: try_files $uri @django).
+PRODUCTO_FOTO_ANCHOS = [160, 320, 640, 1024]
+PRODUCTO_FOTO_FORMATOS = ['webp', 'jpeg']
+PRODUCTO_FOTO_WORKERS = int(os.getenv('PRODUCTO_FOTO_WORKERS', '2'))
+
 # -------------------------------
 # REST FRAMEWORK
 # -------------------------------
@@ -125,7 +198,104 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+    ],
+    # JSON con orjson (config/renderers.py); equivalente al del JSONRenderer de DRF
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Decimal como string en el JSON (por defecto número, como hasta ahora). Cada
+# cliente puede elegir con 'Accept: application/json; decimal=texto|numero'.
+JSON_DECIMAL_COMO_TEXTO = os.getenv('JSON_DECIMAL_COMO_TEXTO', 'False') == 'True'
+
+# MessagePack (Accept / Content-Type: application/msgpack) para consumidores
+# internos; sólo si el paquete 'msgpack' está instalado
+API_MSGPACK = os.getenv('API_MSGPACK', 'True') == 'True' and importlib.util.find_spec('msgpack') is not None
+if API_MSGPACK:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('config.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('config.renderers.MessagePackParser')
+
+# -------------------------------
+# CATÁLOGO (GET condicional)
+# -------------------------------
+# Categorías son públicas: el proxy inverso puede guardarlas s-maxage segundos;
+# los navegadores siempre revalidan con ETag (304 si no cambió).
+CATALOGO_CACHE_PUBLICO = os.getenv(
+    'CATALOGO_CACHE_PUBLICO', 'public, max-age=0, s-maxage=60, stale-while-revalidate=30'
+)
+# Productos requieren autenticación: sólo caché del navegador, siempre revalidada
+CATALOGO_CACHE_PRIVADO = 'private, no-cache'
+
+# Snapshot pre-renderizado de /api/productos/ (se guarda en CACHES['catalogo'])
+CATALOGO_SNAPSHOT_TTL = int(os.getenv('CATALOGO_SNAPSHOT_TTL', '86400'))
+CATALOGO_SNAPSHOT_GZIP = True
+CATALOGO_SNAPSHOT_BROTLI = True  # sólo si el paquete 'brotli' está instalado
+
+# -------------------------------
+# VENTAS (sincronización de cajas)
+# -------------------------------
+# POST /api/ventas/sync/: máximo de ventas por petición y ventas por transacción
+VENTAS_SYNC_MAX = int(os.getenv('VENTAS_SYNC_MAX', '500'))
+VENTAS_SYNC_LOTE = int(os.getenv('VENTAS_SYNC_LOTE', '50'))
+# Antigüedad máxima de la fecha_hora de una venta sincronizada
+VENTAS_SYNC_MAX_DIAS = int(os.getenv('VENTAS_SYNC_MAX_DIAS', '30'))
+
+# Reservas de stock (productos/reservas.py): duración por motivo, en minutos.
+# `manage.py liberar_reservas` (cron, cada minuto) devuelve las vencidas.
+RESERVA_MINUTOS = {
+    'carrito': int(os.getenv('RESERVA_MINUTOS_CARRITO', '15')),
+    'credito': int(os.getenv('RESERVA_MINUTOS_CREDITO', '2880')),
+}
+
+# Pronóstico de demanda y puntos de reorden (reportes/pronostico.py).
+# `manage.py pronosticar_demanda` (cron, cada noche) los recalcula con los
+# últimos PRONOSTICO_DIAS_HISTORIA días de ventas; modelo 'ses' (suavizado
+# exponencial simple) o 'media_movil'.
+PRONOSTICO_MODELO = os.getenv('PRONOSTICO_MODELO', 'ses')
+PRONOSTICO_DIAS_HISTORIA = int(os.getenv('PRONOSTICO_DIAS_HISTORIA', '730'))
+PRONOSTICO_VENTANA_MEDIA = int(os.getenv('PRONOSTICO_VENTANA_MEDIA', '28'))
+# Días entre pedir y recibir, y cada cuánto se hacen pedidos
+PRONOSTICO_DIAS_REPOSICION = int(os.getenv('PRONOSTICO_DIAS_REPOSICION', '7'))
+PRONOSTICO_DIAS_PEDIDO = int(os.getenv('PRONOSTICO_DIAS_PEDIDO', '14'))
+# Probabilidad de no quedarse sin stock mientras llega el pedido
+PRONOSTICO_NIVEL_SERVICIO = float(os.getenv('PRONOSTICO_NIVEL_SERVICIO', '0.95'))
+
+# -------------------------------
+# INSTRUMENTACIÓN SQL (config/middleware.py)
+# -------------------------------
+# Fracción de peticiones medidas (0 = ninguna, 0.01 = 1%). Las medidas reciben
+# la cabecera Server-Timing y una línea JSON en el logger 'tienda.sql'.
+SQL_INSTRUMENTACION_MUESTREO = float(os.getenv('SQL_INSTRUMENTACION_MUESTREO', '0'))
+# Permite forzar la medición de una petición con 'X-Instrumentar-SQL: 1'
+SQL_INSTRUMENTACION_CABECERA = os.getenv('SQL_INSTRUMENTACION_CABECERA', str(DEBUG)) == 'True'
+SQL_INSTRUMENTACION_LENTAS = 5        # consultas más lentas que se registran
+SQL_INSTRUMENTACION_DUPLICADAS = 3    # repeticiones de una misma consulta para marcarla como N+1
+
+# -------------------------------
+# MÉTRICAS (/metrics, config/metricas.py)
+# -------------------------------
+# Un archivo mmap por proceso; vaciar el directorio en cada despliegue.
+METRICAS_DIR = os.getenv('METRICAS_DIR', os.path.join(tempfile.gettempdir(), 'tienda-metricas'))
+# Si se define, /metrics exige 'Authorization: Bearer <token>'
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tienda.sql': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'tienda.db': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
 # -------------------------------
@@ -148,6 +318,7 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "x-instrumentar-sql",
 ]
 
 CORS_ALLOW_METHODS = [
@@ -191,10 +362,32 @@ SIMPLE_JWT = {
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",  # Para desarrollo
+        # Igual que LocMemCache/RedisCache, pero cuentan hits y misses para /metrics
+        "BACKEND": "config.metricas.LocMemCacheMedida",  # Para desarrollo
         "LOCATION": "unique-reportes-cache"
-        #"BACKEND": "django.core.cache.backends.redis.RedisCache",
+        #"BACKEND": "config.metricas.RedisCacheMedida",
         #"LOCATION": "redis://127.0.0.1:6379/1"
 
-    }
+    },
 }
+
+# Caché del catálogo (productos/versiones.py y productos/snapshot.py): contadores
+# de versión (dos claves por producto) y el snapshot de /api/productos/. Tiene
+# que ser compartida entre workers: con una caché por proceso, un cambio sólo
+# invalida el ETag y el snapshot del worker que lo atendió. Sin
+# CATALOGO_CACHE_URL se usa LocMem, válida sólo con un proceso: `manage.py
+# check --deploy` falla con productos.E001 (silenciarlo si de verdad hay un solo proceso).
+if os.getenv('CATALOGO_CACHE_URL'):
+    CACHES['catalogo'] = {
+        'BACKEND': 'config.metricas.RedisCacheMedida',
+        'LOCATION': os.getenv('CATALOGO_CACHE_URL'),  # p. ej. redis://127.0.0.1:6379/2
+        'TIMEOUT': None,
+    }
+else:
+    CACHES['catalogo'] = {
+        'BACKEND': 'config.metricas.LocMemCacheMedida',
+        'LOCATION': 'catalogo',
+        'TIMEOUT': None,
+        # El MAX_ENTRIES por defecto (300) descarta versiones pasados ~150 productos
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CATALOGO_CACHE_MAX_ENTRIES', '1000000'))},
+    }
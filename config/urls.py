@@ -1,11 +1,24 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.urls import include
+from config.metricas import metricas_view
+from productos.views import foto_variante
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metricas_view, name='metricas'),
     path('api/', include('usuarios.urls')),
     path('api/', include('productos.urls')),
     path('api/', include('ventas.urls')),
     path('api/reportes/', include('reportes.urls')),
+    # Variantes async (ASGI) de sólo lectura
+    path('api/async/', include('productos.urls_async')),
+    path('api/async/reportes/', include('reportes.urls_async')),
+    re_path(
+        r'^%sproductos/variantes/(?P<foto_hash>[0-9a-f]{16})-(?P<ancho>[0-9]+)\.(?P<extension>webp|jpg)$'
+        % settings.MEDIA_URL.lstrip('/'),
+        foto_variante,
+        name='foto-variante'
+    ),
 ]
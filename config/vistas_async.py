@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from config.renderers import dumps_json
+
+# Vistas async (ASGI) de sólo lectura.
+#
+# DRF no tiene vistas async: estas son vistas de Django con la misma
+# autenticación (DEFAULT_AUTHENTICATION_CLASSES) y el mismo JSON que DRF.
+# Las consultas simples usan el ORM async (aiterator, aaggregate); lo que sigue
+# siendo bloqueante (autenticar, reportes sync) corre en un pool acotado de
+# hilos, como el pool del login (usuarios/login.py).
+
+
+class PoolSaturado(Exception):
+    """Hay demasiadas tareas bloqueantes esperando turno."""
+
+
+class PoolBloqueante:
+    """
+    Pool de ASYNC_HILOS_BLOQUEANTES hilos para el código sync de las vistas
+    async. Un pico de reportes pesados no abre un hilo (ni una conexión a
+    PostgreSQL) por petición: esperan turno, y pasadas ASYNC_MAX_PENDIENTES
+    se rechazan de inmediato con 503.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pendientes = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=settings.ASYNC_HILOS_BLOQUEANTES,
+                        thread_name_prefix='bloqueante'
+                    )
+        return self._executor
+
+    async def ejecutar(self, fn, *args, **kwargs):
+        executor = self._get_executor()
+        with self._lock:
+            if self._pendientes >= settings.ASYNC_MAX_PENDIENTES:
+                raise PoolSaturado()
+            self._pendientes += 1
+        # Las ContextVar (réplica de reportes, instrumentación SQL) siguen a la tarea
+        contexto = contextvars.copy_context()
+        try:
+            futuro = executor.submit(contexto.run, self._ejecutar, fn, args, kwargs)
+        except Exception:
+            self._liberar()
+            raise
+        return await asyncio.wrap_future(futuro)
+
+    def _ejecutar(self, fn, args, kwargs):
+        # Los hilos del pool viven fuera del ciclo request/response de Django:
+        # CONN_MAX_AGE y CONN_HEALTH_CHECKS se aplican a mano
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+            self._liberar()
+
+    def _liberar(self):
+        with self._lock:
+            self._pendientes -= 1
+
+
+pool_bloqueante = PoolBloqueante()
+
+
+async def en_hilo(fn, *args, **kwargs):
+    """Ejecuta código sync bloqueante en el pool acotado sin bloquear el event loop."""
+    return await pool_bloqueante.ejecutar(fn, *args, **kwargs)
+
+
+def respuesta_json(data, status=200):
+    # Mismo JSON que el renderer de la API (config/renderers.py)
+    return HttpResponse(dumps_json(data), status=status, content_type='application/json')
+
+
+def _autenticar(request):
+    """Usuario de la petición según DEFAULT_AUTHENTICATION_CLASSES, como en una APIView."""
+    drf_request = Request(request, authenticators=[clase() for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    # Request.user también lo deja en la petición de Django
+    return drf_request.user, drf_request
+
+
+class VistaAsync(View):
+    """Base de las vistas async: autentica y exige usuario salvo con permiso_publico."""
+    permiso_publico = False
+    http_method_names = ['get', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await self.atender(request, *args, **kwargs)
+        except PoolSaturado:
+            response = respuesta_json(
+                {'error': 'Demasiadas peticiones en curso. Intente nuevamente.'}, status=503
+            )
+            response['Retry-After'] = '1'
+            return response
+
+    async def atender(self, request, *args, **kwargs):
+        try:
+            usuario, drf_request = await en_hilo(_autenticar, request)
+        except exceptions.APIException as e:
+            # Mismo cuerpo que el exception handler de DRF (p. ej. token JWT inválido)
+            data = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return respuesta_json(data, status=e.status_code)
+
+        if not self.permiso_publico and not usuario.is_authenticated:
+            # Igual que DRF: 401 sólo si el primer autenticador define WWW-Authenticate
+            autenticadores = drf_request.authenticators
+            cabecera = autenticadores[0].authenticate_header(drf_request) if autenticadores else None
+            response = respuesta_json(
+                {'detail': exceptions.NotAuthenticated.default_detail},
+                status=401 if cabecera else 403,
+            )
+            if cabecera:
+                response['WWW-Authenticate'] = cabecera
+            return response
+
+        return await super().dispatch(request, *args, **kwargs)
@@ -1,8 +1,9 @@
 from django.contrib import admin
 
-from .models import Category, Provider, Product, ProviderProduct
+from .models import Category, Provider, Product, ProviderProduct, ReservaStock
 
 admin.site.register(Category)
 admin.site.register(Provider)
 admin.site.register(Product)
 admin.site.register(ProviderProduct)
+admin.site.register(ReservaStock)
@@ -0,0 +1,44 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F
+
+from productos.models import Product
+
+
+def construir_consulta(texto):
+    """
+    Convierte lo que escribe el usuario en una consulta por prefijos:
+    'camisa azu' -> to_tsquery('spanish', 'camisa:* & azu:*'), así la
+    búsqueda ya encuentra resultados mientras se termina de escribir.
+    """
+    terminos = re.findall(r'\w+', texto.lower())
+    if not terminos:
+        return None
+    return SearchQuery(' & '.join(f'{t}:*' for t in terminos), config='spanish', search_type='raw')
+
+
+def buscar_productos(texto):
+    """
+    Búsqueda de productos ordenada por relevancia.
+
+    Primero usa el índice de texto completo (search_vector); si no hay
+    coincidencias, recurre a similitud por trigramas sobre el nombre para
+    tolerar errores de tipeo. Devuelve (queryset, modo).
+    """
+    base = Product.objects.select_related('categoria').defer('search_vector')
+
+    consulta = construir_consulta(texto)
+    if consulta is None:
+        return base.none(), 'texto'
+
+    resultados = base.filter(search_vector=consulta).annotate(
+        rank=SearchRank(F('search_vector'), consulta)
+    ).order_by('-rank', 'id')
+    if resultados.exists():
+        return resultados, 'texto'
+
+    similares = base.filter(nombre__trigram_similar=texto).annotate(
+        similitud=TrigramSimilarity('nombre', texto)
+    ).order_by('-similitud', 'id')
+    return similares, 'similitud'
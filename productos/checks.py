@@ -0,0 +1,19 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+from productos.versiones import ALIAS_CACHE
+
+
+@register(deploy=True)
+def cache_catalogo_compartida(app_configs, **kwargs):
+    """En producción (check --deploy), versiones y snapshot del catálogo necesitan una caché compartida entre workers."""
+    if not isinstance(caches[ALIAS_CACHE], LocMemCache):
+        return []
+    return [Error(
+        f"CACHES['{ALIAS_CACHE}'] es una caché por proceso: con varios workers el ETag y el "
+        "snapshot de /api/productos/ quedan desactualizados en los que no atendieron el cambio.",
+        hint="Defina CATALOGO_CACHE_URL (Redis). Con un único proceso puede silenciarse con "
+             "SILENCED_SYSTEM_CHECKS = ['productos.E001'].",
+        id='productos.E001',
+    )]
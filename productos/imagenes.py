@@ -0,0 +1,132 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+# Variantes redimensionadas de Product.foto.
+#
+# Cada variante se nombra con el hash del contenido original
+# (productos/variantes/<hash>-<ancho>.<ext>), así su URL nunca cambia de
+# contenido y se puede cachear como inmutable. Se generan en un pool de
+# procesos: al subir la foto sólo se encolan, y si alguien pide una variante
+# que todavía no existe se genera en ese momento.
+
+DIRECTORIO_VARIANTES = 'productos/variantes'
+EXTENSIONES = {'webp': 'webp', 'jpeg': 'jpg'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=settings.PRODUCTO_FOTO_WORKERS)
+    return _pool
+
+
+def hash_contenido(archivo):
+    """Hash (16 hex) del contenido de un archivo subido o ya guardado."""
+    digest = hashlib.sha256()
+    archivo.open('rb')
+    archivo.seek(0)
+    for bloque in archivo.chunks():
+        digest.update(bloque)
+    archivo.seek(0)
+    return digest.hexdigest()[:16]
+
+
+def nombre_variante(foto_hash, ancho, formato):
+    return f'{DIRECTORIO_VARIANTES}/{foto_hash}-{ancho}.{EXTENSIONES[formato]}'
+
+
+def urls_variantes(foto_hash, request=None):
+    """{'320': {'webp': url, 'jpeg': url}, ...} para el serializer."""
+    if not foto_hash:
+        return {}
+
+    variantes = {}
+    for ancho in settings.PRODUCTO_FOTO_ANCHOS:
+        variantes[str(ancho)] = {}
+        for formato in settings.PRODUCTO_FOTO_FORMATOS:
+            url = settings.MEDIA_URL + nombre_variante(foto_hash, ancho, formato)
+            variantes[str(ancho)][formato] = request.build_absolute_uri(url) if request else url
+    return variantes
+
+
+def encolar_variantes(foto_path, foto_hash):
+    """Genera todas las variantes en segundo plano (no espera el resultado)."""
+    return _get_pool().submit(
+        generar_variantes, foto_path, foto_hash, str(settings.MEDIA_ROOT),
+        list(settings.PRODUCTO_FOTO_ANCHOS), list(settings.PRODUCTO_FOTO_FORMATOS)
+    )
+
+
+def obtener_variante(foto_path, foto_hash, ancho, formato, timeout=30):
+    """Genera (si falta) y devuelve la ruta absoluta de una variante."""
+    destino = os.path.join(str(settings.MEDIA_ROOT), nombre_variante(foto_hash, ancho, formato))
+    if not os.path.exists(destino):
+        _get_pool().submit(
+            generar_variantes, foto_path, foto_hash, str(settings.MEDIA_ROOT), [ancho], [formato]
+        ).result(timeout=timeout)
+    return destino
+
+
+# --------------------------------------------------------
+# Código que corre en los procesos del pool (sin ORM)
+# --------------------------------------------------------
+def generar_variantes(foto_path, foto_hash, media_root, anchos, formatos):
+    directorio = os.path.join(media_root, DIRECTORIO_VARIANTES)
+    os.makedirs(directorio, exist_ok=True)
+
+    generadas = []
+    with Image.open(foto_path) as original:
+        imagen = ImageOps.exif_transpose(original)
+
+        for ancho in anchos:
+            # Nunca se agranda: si la original es más chica se usa su tamaño
+            if imagen.width > ancho:
+                alto = max(1, round(imagen.height * ancho / imagen.width))
+                redimensionada = imagen.resize((ancho, alto), Image.LANCZOS)
+            else:
+                redimensionada = imagen
+
+            for formato in formatos:
+                destino = os.path.join(media_root, nombre_variante(foto_hash, ancho, formato))
+                if os.path.exists(destino):
+                    continue
+                _guardar(redimensionada, destino, formato)
+                generadas.append(destino)
+    return generadas
+
+
+def _guardar(imagen, destino, formato):
+    if formato == 'jpeg':
+        if imagen.mode in ('RGBA', 'LA', 'P'):
+            # JPEG no tiene transparencia: se compone sobre fondo blanco
+            rgba = imagen.convert('RGBA')
+            fondo = Image.new('RGB', rgba.size, (255, 255, 255))
+            fondo.paste(rgba, mask=rgba.split()[-1])
+            imagen = fondo
+        elif imagen.mode != 'RGB':
+            imagen = imagen.convert('RGB')
+        opciones = {'quality': 82, 'optimize': True, 'progressive': True}
+    else:
+        opciones = {'quality': 80, 'method': 4}
+
+    # Escritura atómica: nadie debe servir una variante a medio escribir
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as salida:
+            imagen.save(salida, format=formato.upper(), **opciones)
+        os.replace(temporal, destino)
+    except Exception:
+        os.unlink(temporal)
+        raise
+
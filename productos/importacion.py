@@ -0,0 +1,299 @@
+import csv
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from productos import inventario, versiones
+from productos.models import Category, Product, Provider, ProviderProduct
+
+
+# Importación/exportación masiva del catálogo.
+#
+# El archivo se lee como stream y se procesa por lotes: cada lote resuelve
+# categorías y proveedores con una consulta (y los recuerda para los lotes
+# siguientes) y hace upsert con bulk_create(update_conflicts=True) sobre
+# Product.codigo, en una transacción por lote.
+
+COLUMNAS = ['codigo', 'nombre', 'precio', 'descripcion', 'stock', 'categoria', 'proveedor', 'precio_compra']
+COLUMNAS_PRODUCTO = ['nombre', 'precio', 'descripcion', 'stock', 'categoria']
+TAMANO_LOTE = 1000
+
+
+class ErrorFila(Exception):
+    pass
+
+
+# --------------------------------------------------------
+# Lectura
+# --------------------------------------------------------
+def detectar_formato(nombre_archivo, formato=None):
+    if formato:
+        return formato
+    return 'jsonl' if str(nombre_archivo).lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def leer_filas(archivo, formato):
+    """Genera (numero_linea, dict) desde un archivo binario sin cargarlo entero."""
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        if formato == 'jsonl':
+            for numero, linea in enumerate(texto, start=1):
+                if linea.strip():
+                    try:
+                        yield numero, json.loads(linea)
+                    except ValueError:
+                        yield numero, None
+        else:
+            for numero, fila in enumerate(csv.DictReader(texto), start=2):
+                yield numero, fila
+    finally:
+        texto.detach()
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def _decimal(valor, campo):
+    try:
+        numero = Decimal(_texto(valor)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        numero = None
+    if numero is None or not numero.is_finite() or numero < 0 or abs(numero) >= Decimal('1e8'):
+        raise ErrorFila(f"'{campo}' no es un número válido: {valor!r}")
+    return numero
+
+
+# --------------------------------------------------------
+# Importación
+# --------------------------------------------------------
+class ImportadorProductos:
+    def __init__(self, tamano_lote=TAMANO_LOTE):
+        self.tamano_lote = tamano_lote
+        self.categorias = {}
+        self.proveedores = {}
+        self.procesadas = 0
+        self.errores = []
+        self.productos_afectados = 0
+        self.categorias_creadas = False
+
+    def importar(self, filas):
+        inicio = time.perf_counter()
+        lote = []
+        for numero, fila in filas:
+            lote.append((numero, fila))
+            if len(lote) >= self.tamano_lote:
+                self._procesar_lote(lote)
+                lote = []
+        if lote:
+            self._procesar_lote(lote)
+
+        if self.categorias_creadas:
+            versiones.invalidar(Category)
+
+        duracion = time.perf_counter() - inicio
+        return {
+            'filas_procesadas': self.procesadas,
+            'productos_afectados': self.productos_afectados,
+            'errores': self.errores[:100],
+            'total_errores': len(self.errores),
+            'duracion_segundos': round(duracion, 3),
+            'filas_por_segundo': round(self.procesadas / duracion, 1) if duracion else None,
+        }
+
+    def _procesar_lote(self, lote):
+        validas = []
+        for numero, fila in lote:
+            try:
+                validas.append(self._validar(fila))
+            except ErrorFila as e:
+                self.errores.append({'linea': numero, 'error': str(e)})
+
+        if not validas:
+            return
+
+        columnas = set().union(*(fila['_columnas'] for fila in validas))
+        with transaction.atomic():
+            self._resolver_categorias({f['categoria'] for f in validas})
+            self._resolver_proveedores({f['proveedor'] for f in validas if f['proveedor']})
+
+            # Valores previos de los códigos existentes: la diferencia de stock va al
+            # diario de inventario, y lo que una fila no trae se conserva
+            anteriores = {
+                codigo: {'stock': stock, 'descripcion': descripcion}
+                for codigo, stock, descripcion in Product.objects.select_for_update().filter(
+                    codigo__in={f['codigo'] for f in validas}
+                ).values_list('codigo', 'stock', 'descripcion')
+            }
+
+            # Un mismo código dos veces en el lote: gana la última fila
+            productos = {}
+            for f in validas:
+                previo = anteriores.get(f['codigo'], {})
+                for campo in previo.keys() - f['_columnas']:
+                    f[campo] = previo[campo]
+                productos[f['codigo']] = Product(
+                    codigo=f['codigo'],
+                    nombre=f['nombre'],
+                    precio=f['precio'],
+                    descripcion=f['descripcion'],
+                    stock=f['stock'],
+                    categoria_id=self.categorias[f['categoria']],
+                )
+
+            actualizar = [c for c in COLUMNAS_PRODUCTO if c in columnas]
+            Product.objects.bulk_create(
+                productos.values(),
+                update_conflicts=True,
+                unique_fields=['codigo'],
+                update_fields=actualizar,
+            )
+
+            movimientos = {}
+            for codigo, producto in productos.items():
+                if codigo not in anteriores:
+                    movimientos[producto.pk] = producto.stock
+                elif 'stock' in actualizar:
+                    movimientos[producto.pk] = producto.stock - anteriores[codigo]['stock']
+            inventario.registrar(movimientos, 'importacion')
+
+            relaciones = {}
+            for f in validas:
+                if f['proveedor']:
+                    producto = productos[f['codigo']]
+                    proveedor_id = self.proveedores[f['proveedor']]
+                    relaciones[(proveedor_id, producto.pk)] = ProviderProduct(
+                        proveedor_id=proveedor_id,
+                        producto_id=producto.pk,
+                        precio_compra=f['precio_compra'],
+                    )
+            if relaciones:
+                ProviderProduct.objects.bulk_create(
+                    relaciones.values(),
+                    update_conflicts=True,
+                    unique_fields=['proveedor', 'producto'],
+                    update_fields=['precio_compra'],
+                )
+
+        versiones.invalidar(Product, [p.pk for p in productos.values()])
+        self.procesadas += len(validas)
+        self.productos_afectados += len(productos)
+
+    def _validar(self, fila):
+        if not isinstance(fila, dict):
+            raise ErrorFila("Línea con formato inválido.")
+
+        codigo = _texto(fila.get('codigo'))
+        nombre = _texto(fila.get('nombre'))
+        categoria = _texto(fila.get('categoria'))
+        if not codigo:
+            raise ErrorFila("'codigo' es obligatorio.")
+        if not nombre or len(nombre) > 100:
+            raise ErrorFila("'nombre' es obligatorio (máx. 100 caracteres).")
+        if not categoria or len(categoria) > 100:
+            raise ErrorFila("'categoria' es obligatoria (máx. 100 caracteres).")
+        if len(codigo) > 50:
+            raise ErrorFila("'codigo' admite máx. 50 caracteres.")
+
+        stock = _texto(fila.get('stock')) or '0'
+        try:
+            stock = int(stock)
+        except ValueError:
+            raise ErrorFila(f"'stock' no es un entero válido: {stock!r}")
+
+        proveedor = _texto(fila.get('proveedor'))
+        precio_compra = _texto(fila.get('precio_compra'))
+
+        return {
+            'codigo': codigo,
+            'nombre': nombre,
+            'precio': _decimal(fila.get('precio'), 'precio'),
+            'descripcion': _texto(fila.get('descripcion')) or None,
+            'stock': stock,
+            'categoria': categoria,
+            'proveedor': proveedor[:100],
+            'precio_compra': _decimal(precio_compra, 'precio_compra') if precio_compra else None,
+            # Una celda vacía (CSV) o ausente (JSONL) no se actualiza: no es un cero
+            '_columnas': {c for c in fila if c in COLUMNAS and _texto(fila[c])},
+        }
+
+    def _resolver_categorias(self, nombres):
+        faltantes = nombres - self.categorias.keys()
+        if not faltantes:
+            return
+        for categoria in Category.objects.filter(descripcion__in=faltantes).order_by('id'):
+            self.categorias.setdefault(categoria.descripcion, categoria.id)
+        nuevas = [Category(descripcion=n) for n in faltantes - self.categorias.keys()]
+        if nuevas:
+            for categoria in Category.objects.bulk_create(nuevas):
+                self.categorias[categoria.descripcion] = categoria.id
+            self.categorias_creadas = True
+
+    def _resolver_proveedores(self, nombres):
+        faltantes = nombres - self.proveedores.keys()
+        if not faltantes:
+            return
+        for proveedor in Provider.objects.filter(nombre__in=faltantes).order_by('id'):
+            self.proveedores.setdefault(proveedor.nombre, proveedor.id)
+        nuevos = [Provider(nombre=n) for n in faltantes - self.proveedores.keys()]
+        for proveedor in Provider.objects.bulk_create(nuevos):
+            self.proveedores[proveedor.nombre] = proveedor.id
+
+
+# --------------------------------------------------------
+# Exportación
+# --------------------------------------------------------
+def exportar_filas(tamano_lote=2000):
+    """Una fila por (producto, proveedor); los productos sin proveedor salen una vez."""
+    productos = Product.objects.order_by('id').values_list(
+        'id', 'codigo', 'nombre', 'precio', 'descripcion', 'stock', 'categoria__descripcion'
+    )
+    relaciones = ProviderProduct.objects.order_by('producto_id', 'proveedor_id').values_list(
+        'producto_id', 'proveedor__nombre', 'precio_compra'
+    )
+
+    # Ambos cursores avanzan juntos ordenados por producto (merge), sin cargar nada en memoria
+    iterador_relaciones = relaciones.iterator(chunk_size=tamano_lote)
+    siguiente = next(iterador_relaciones, None)
+    for pk, codigo, nombre, precio, descripcion, stock, categoria in productos.iterator(chunk_size=tamano_lote):
+        base = {
+            'codigo': codigo or '',
+            'nombre': nombre,
+            'precio': str(precio),
+            'descripcion': descripcion or '',
+            'stock': stock,
+            'categoria': categoria,
+        }
+        while siguiente is not None and siguiente[0] < pk:
+            siguiente = next(iterador_relaciones, None)
+
+        emitido = False
+        while siguiente is not None and siguiente[0] == pk:
+            yield {**base, 'proveedor': siguiente[1],
+                   'precio_compra': '' if siguiente[2] is None else str(siguiente[2])}
+            emitido = True
+            siguiente = next(iterador_relaciones, None)
+        if not emitido:
+            yield {**base, 'proveedor': '', 'precio_compra': ''}
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer que devuelve la línea en vez de escribirla."""
+
+    def write(self, valor):
+        return valor
+
+
+def lineas_csv(filas):
+    writer = csv.DictWriter(_Eco(), fieldnames=COLUMNAS)
+    yield writer.writeheader()
+    for fila in filas:
+        yield writer.writerow(fila)
+
+
+def lineas_jsonl(filas):
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False) + '\n'
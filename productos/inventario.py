@@ -0,0 +1,173 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from productos import versiones
+from productos.models import MovimientoInventario, Product, SnapshotInventario
+
+
+# Diario de inventario y stock histórico.
+#
+# Cada cambio de Product.stock agrega sus movimientos (bulk_create) en la
+# misma transacción. Un snapshot nocturno guarda el stock de cada producto al
+# cierre del día, así "stock al día X" es el snapshot más cercano más los
+# movimientos de unos pocos días, sin recorrer las ventas desde el principio.
+# Los días son los de TIME_ZONE.
+
+
+def _inicio_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def movimientos(deltas, tipo, nota=None, usuario=None):
+    """{producto_id: delta} -> movimientos sin guardar (para juntarlos en un bulk_create)."""
+    fecha = timezone.now()
+    return [
+        MovimientoInventario(producto_id=pk, cantidad=delta, tipo=tipo, nota=nota, usuario=usuario, fecha=fecha)
+        for pk, delta in deltas.items() if delta
+    ]
+
+
+def registrar(deltas, tipo, nota=None, usuario=None):
+    """Agrega al diario {producto_id: delta}; llamarlo en la transacción que cambia el stock."""
+    MovimientoInventario.objects.bulk_create(movimientos(deltas, tipo, nota, usuario))
+
+
+def _por_producto(deltas):
+    return Case(
+        *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def mover_stock(stock=None, reservado=None, tipo=None, nota=None, usuario=None):
+    """
+    Suma {producto_id: delta} a stock y/o reservado de varios productos con
+    un solo UPDATE (F() + CASE), sin leer las filas, y registra los
+    movimientos de stock como `tipo`. update() no emite señales: el catálogo
+    se invalida al confirmar la transacción.
+    """
+    stock = {pk: delta for pk, delta in (stock or {}).items() if delta}
+    reservado = {pk: delta for pk, delta in (reservado or {}).items() if delta}
+    pks = set(stock) | set(reservado)
+    if not pks:
+        return
+    if stock and tipo is None:
+        raise ValueError("Los movimientos de stock requieren un tipo.")
+
+    cambios = {}
+    if stock:
+        cambios['stock'] = F('stock') + _por_producto(stock)
+    if reservado:
+        cambios['reservado'] = F('reservado') + _por_producto(reservado)
+    Product.objects.filter(pk__in=pks).update(**cambios)
+    registrar(stock, tipo, nota, usuario)
+    transaction.on_commit(lambda: versiones.invalidar(Product, pks), robust=True)
+
+
+# --------------------------------------------------------
+# Snapshots y stock histórico
+# --------------------------------------------------------
+def tomar_snapshot(fecha=None):
+    """
+    Guarda el stock de cada producto al cierre de `fecha` (ayer por defecto):
+    el stock actual menos lo movido después, en una sola consulta. Volver a
+    tomarlo reemplaza el anterior.
+    """
+    fecha = fecha or timezone.localdate() - timedelta(days=1)
+    posteriores = MovimientoInventario.objects.filter(
+        producto=OuterRef('pk'), fecha__gte=_inicio_dia(fecha + timedelta(days=1))
+    ).order_by().values('producto').annotate(total=Sum('cantidad')).values('total')
+
+    filas = Product.objects.annotate(
+        al_cierre=F('stock') - Coalesce(Subquery(posteriores, output_field=IntegerField()), Value(0))
+    ).values_list('pk', 'al_cierre')
+
+    snapshots = [SnapshotInventario(producto_id=pk, fecha=fecha, stock=stock) for pk, stock in filas.iterator()]
+    SnapshotInventario.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['producto', 'fecha'],
+        update_fields=['stock'],
+        batch_size=1000,
+    )
+    return len(snapshots)
+
+
+def _netos(desde, hasta, producto_ids=None):
+    """{producto_id: suma de movimientos} desde el inicio del día `desde` hasta el de `hasta` (None = ahora)."""
+    movs = MovimientoInventario.objects.filter(fecha__gte=_inicio_dia(desde))
+    if hasta is not None:
+        movs = movs.filter(fecha__lt=_inicio_dia(hasta))
+    if producto_ids is not None:
+        movs = movs.filter(producto_id__in=producto_ids)
+    return dict(movs.values('producto_id').annotate(total=Sum('cantidad')).order_by().values_list('producto_id', 'total'))
+
+
+def stock_al(fecha, producto_ids=None):
+    """
+    {producto_id: stock al cierre de `fecha`}: el snapshot más cercano
+    (anterior, o si no hay, posterior) corregido con los movimientos entre
+    ambos días. Sin snapshots se parte del stock actual.
+    """
+    snapshots = SnapshotInventario.objects.all()
+    productos = Product.objects.all()
+    if producto_ids is not None:
+        snapshots = snapshots.filter(producto_id__in=producto_ids)
+        productos = productos.filter(pk__in=producto_ids)
+    dia_siguiente = fecha + timedelta(days=1)
+
+    anterior = snapshots.filter(fecha__lte=fecha).aggregate(m=Max('fecha'))['m']
+    if anterior is not None:
+        base = dict(snapshots.filter(fecha=anterior).values_list('producto_id', 'stock'))
+        signo, deltas = 1, _netos(anterior + timedelta(days=1), dia_siguiente, producto_ids)
+    else:
+        posterior = snapshots.filter(fecha__gt=fecha).aggregate(m=Min('fecha'))['m']
+        if posterior is not None:
+            base = dict(snapshots.filter(fecha=posterior).values_list('producto_id', 'stock'))
+            deltas = _netos(dia_siguiente, posterior + timedelta(days=1), producto_ids)
+        else:
+            base = dict(productos.values_list('pk', 'stock'))
+            deltas = _netos(dia_siguiente, None, producto_ids)
+        signo = -1
+
+    # Productos creados después del snapshot: parten de 0
+    stock = {pk: 0 for pk in productos.values_list('pk', flat=True)}
+    stock.update(base)
+    for pk, total in deltas.items():
+        if pk in stock:
+            stock[pk] += signo * total
+    return stock
+
+
+def inventario_promedio(fecha_inicio, fecha_fin, producto_ids=None):
+    """
+    {producto_id: promedio de los cierres diarios entre fecha_inicio y
+    fecha_fin}. Parte del stock al cierre de fecha_fin y descuenta hacia
+    atrás los movimientos de cada día; sólo se leen los productos movidos.
+    """
+    cierre = stock_al(fecha_fin, producto_ids)
+    dias = (fecha_fin - fecha_inicio).days + 1
+    if dias <= 0:
+        return {}
+
+    movs = MovimientoInventario.objects.filter(
+        fecha__gte=_inicio_dia(fecha_inicio + timedelta(days=1)),
+        fecha__lt=_inicio_dia(fecha_fin + timedelta(days=1)),
+    )
+    if producto_ids is not None:
+        movs = movs.filter(producto_id__in=producto_ids)
+    netos = movs.annotate(dia=TruncDate('fecha')).values('producto_id', 'dia').annotate(
+        total=Sum('cantidad')
+    ).order_by().values_list('producto_id', 'dia', 'total')
+
+    # cierre(d - 1) = cierre(d) - neto(d): el neto de un día pesa en los cierres anteriores a él
+    sumas = {pk: stock * dias for pk, stock in cierre.items()}
+    for pk, dia, total in netos:
+        if pk in sumas:
+            sumas[pk] -= total * (dia - fecha_inicio).days
+    return {pk: suma / dias for pk, suma in sumas.items()}
@@ -0,0 +1,97 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+from productos.busqueda import buscar_productos
+from productos.models import Category, Product
+
+
+PRENDAS = ["Camisa", "Pantalón", "Polera", "Chaqueta", "Vestido", "Falda", "Zapato", "Zapatilla",
+           "Bota", "Gorra", "Bufanda", "Chompa", "Short", "Blusa", "Abrigo", "Calcetín", "Cinturón"]
+MATERIALES = ["algodón", "lino", "cuero", "lana", "mezclilla", "seda", "poliéster", "gamuza"]
+COLORES = ["azul", "negro", "blanco", "rojo", "verde", "gris", "beige", "marrón", "rosado"]
+ESTILOS = ["casual", "deportivo", "formal", "clásico", "urbano", "invierno", "verano"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark de /productos/buscar/ simulando búsquedas mientras se escribe"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, default=500_000,
+                            help="Completa el catálogo hasta esta cantidad de productos")
+        parser.add_argument('--palabras', type=int, default=200,
+                            help="Búsquedas simuladas (cada una genera una consulta por tecla)")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.generar_catalogo(options['productos'], rng)
+
+        latencias = {'texto': [], 'similitud': []}
+        for _ in range(options['palabras']):
+            busqueda = self.busqueda_aleatoria(rng)
+            # Una consulta por tecla a partir del segundo carácter
+            for fin in range(2, len(busqueda) + 1):
+                texto = busqueda[:fin]
+                inicio = time.perf_counter()
+                resultados, modo = buscar_productos(texto)
+                resultados.count()
+                list(resultados[:20])
+                latencias[modo].append(time.perf_counter() - inicio)
+
+        todas = latencias['texto'] + latencias['similitud']
+        self.stdout.write(f"Productos: {Product.objects.count()}  consultas: {len(todas)}")
+        self.reportar('total', todas)
+        for modo, valores in latencias.items():
+            self.reportar(modo, valores)
+
+    def busqueda_aleatoria(self, rng):
+        palabras = [rng.choice(PRENDAS).lower(), rng.choice(COLORES + MATERIALES)]
+        busqueda = " ".join(palabras[:rng.randint(1, 2)])
+        if rng.random() < 0.1:
+            # Error de tipeo: se intercambian dos letras
+            i = rng.randrange(1, len(busqueda) - 1)
+            busqueda = busqueda[:i - 1] + busqueda[i] + busqueda[i - 1] + busqueda[i + 1:]
+        return busqueda
+
+    def generar_catalogo(self, objetivo, rng):
+        faltantes = objetivo - Product.objects.count()
+        if faltantes <= 0:
+            return
+
+        categorias = list(Category.objects.all())
+        if not categorias:
+            categorias = [Category.objects.create(descripcion=p) for p in ["Ropa", "Calzado", "Accesorios"]]
+
+        self.stdout.write(self.style.WARNING(f"Generando {faltantes} productos..."))
+        lote = []
+        for i in range(faltantes):
+            nombre = f"{rng.choice(PRENDAS)} {rng.choice(MATERIALES)} {rng.choice(COLORES)}"
+            lote.append(Product(
+                nombre=nombre,
+                precio=Decimal(rng.randint(20, 500)),
+                descripcion=f"{nombre} estilo {rng.choice(ESTILOS)}, modelo {i}",
+                stock=rng.randint(0, 150),
+                categoria=rng.choice(categorias),
+            ))
+            if len(lote) == 5000:
+                Product.objects.bulk_create(lote)
+                lote = []
+        if lote:
+            Product.objects.bulk_create(lote)
+        # bulk_create no pasa por Product.save(): mismo código P<id> que la migración 0004
+        Product.objects.filter(codigo__isnull=True).update(codigo=Concat(Value('P'), Cast('id', CharField())))
+
+    def reportar(self, etiqueta, valores):
+        if len(valores) < 2:
+            return
+        cuantiles = statistics.quantiles(valores, n=100)
+        self.stdout.write(
+            f"[{etiqueta}] n={len(valores)}  p50={cuantiles[49] * 1000:.1f} ms  "
+            f"p95={cuantiles[94] * 1000:.1f} ms  p99={cuantiles[98] * 1000:.1f} ms"
+        )
@@ -0,0 +1,73 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from productos import versiones
+from productos.models import Category, Product
+from productos.serializers import ProductSerializer
+from productos.snapshot import obtener_snapshot
+
+
+class Command(BaseCommand):
+    help = "Compara el listado de productos serializado con DRF contra el snapshot pre-renderizado"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/api/productos/')
+        repeticiones = options['repeticiones']
+        self.stdout.write(f"Productos: {Product.objects.count()}")
+
+        # 1) Camino original: consulta + ProductSerializer anidado + JSONRenderer
+        def serializar():
+            queryset = Product.objects.select_related('categoria').defer('search_vector')
+            data = ProductSerializer(queryset, many=True, context={'request': request}).data
+            return JSONRenderer().render(data)
+
+        tiempo, cuerpo = self.medir(serializar, repeticiones)
+        self.reportar("DRF serializer", tiempo, cuerpo)
+
+        # 2) Snapshot reconstruido desde cero (cambiar categorías invalida todos los fragmentos)
+        versiones.invalidar(Category)
+        inicio = time.perf_counter()
+        snapshot = obtener_snapshot(request)
+        self.reportar("Snapshot (en frío)", time.perf_counter() - inicio, snapshot['json'])
+
+        # 3) Snapshot vigente: sólo lectura de caché
+        tiempo, _ = self.medir(lambda: obtener_snapshot(request), repeticiones)
+        self.reportar("Snapshot (en caché)", tiempo, snapshot['json'])
+
+        # 4) Un producto modificado: reconstrucción incremental
+        producto = Product.objects.first()
+        if producto:
+            versiones.invalidar(Product, [producto.pk])
+            inicio = time.perf_counter()
+            snapshot = obtener_snapshot(request)
+            self.reportar(
+                f"Snapshot incremental ({snapshot['reserializados']} re-serializados)",
+                time.perf_counter() - inicio, snapshot['json']
+            )
+
+        if 'gzip' in snapshot:
+            self.stdout.write(f"Tamaño gzip: {len(snapshot['gzip']) / 1024:.1f} KiB")
+        else:
+            self.stdout.write(f"Tamaño gzip: {len(gzip.compress(snapshot['json'])) / 1024:.1f} KiB")
+        if 'br' in snapshot:
+            self.stdout.write(f"Tamaño brotli: {len(snapshot['br']) / 1024:.1f} KiB")
+
+    def medir(self, fn, repeticiones):
+        mejor = None
+        resultado = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = fn()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor, resultado
+
+    def reportar(self, etiqueta, segundos, cuerpo):
+        self.stdout.write(f"{etiqueta:<45} {segundos * 1000:9.1f} ms  {len(cuerpo) / 1024:9.1f} KiB")
@@ -0,0 +1,35 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from productos.importacion import exportar_filas, lineas_csv, lineas_jsonl
+
+
+class Command(BaseCommand):
+    help = "Exporta el catálogo en el mismo formato que acepta importar_productos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?', help="Destino (por defecto, salida estándar)")
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], default='csv')
+
+    def handle(self, *args, **options):
+        generar = lineas_jsonl if options['formato'] == 'jsonl' else lineas_csv
+        salida = open(options['archivo'], 'w', encoding='utf-8', newline='') if options['archivo'] else sys.stdout
+
+        inicio = time.perf_counter()
+        filas = 0
+        try:
+            for linea in generar(exportar_filas()):
+                salida.write(linea)
+                filas += 1
+        finally:
+            if options['archivo']:
+                salida.close()
+
+        if options['formato'] == 'csv':
+            filas -= 1  # encabezado
+        duracion = time.perf_counter() - inicio
+        self.stderr.write(self.style.SUCCESS(
+            f"📤 {filas} filas en {duracion:.2f} s → {filas / duracion if duracion else 0:.1f} filas/s"
+        ))
@@ -0,0 +1,33 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from productos import versiones
+from productos.imagenes import encolar_variantes, hash_contenido
+from productos.models import Product
+
+
+class Command(BaseCommand):
+    help = "Calcula foto_hash de productos existentes y genera todas sus variantes de foto"
+
+    def handle(self, *args, **options):
+        productos = list(Product.objects.exclude(foto='').exclude(foto__isnull=True).only('id', 'foto', 'foto_hash'))
+
+        sin_hash = [p for p in productos if not p.foto_hash]
+        for producto in sin_hash:
+            producto.foto_hash = hash_contenido(producto.foto)
+        if sin_hash:
+            Product.objects.bulk_update(sin_hash, ['foto_hash'], batch_size=1000)
+            versiones.invalidar(Product, [p.pk for p in sin_hash])
+        self.stdout.write(f"Hashes calculados: {len(sin_hash)}")
+
+        tareas = [encolar_variantes(p.foto.path, p.foto_hash) for p in productos]
+        hechas, _ = wait(tareas)
+        errores = [t.exception() for t in hechas if t.exception()]
+        generadas = sum(len(t.result()) for t in hechas if not t.exception())
+
+        for error in errores[:10]:
+            self.stdout.write(self.style.ERROR(str(error)))
+        self.stdout.write(self.style.SUCCESS(
+            f"Variantes generadas: {generadas} ({len(productos)} productos, {len(errores)} errores)"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.importacion import ImportadorProductos, TAMANO_LOTE, detectar_formato, leer_filas
+
+
+class Command(BaseCommand):
+    help = "Importa (upsert por 'codigo') productos desde un archivo CSV o JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'])
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por transacción")
+
+    def handle(self, *args, **options):
+        formato = detectar_formato(options['archivo'], options['formato'])
+        try:
+            archivo = open(options['archivo'], 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with archivo:
+            resumen = ImportadorProductos(options['lote']).importar(leer_filas(archivo, formato))
+
+        for error in resumen['errores']:
+            self.stdout.write(self.style.ERROR(f"Línea {error['linea']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"📦 {resumen['filas_procesadas']} filas ({resumen['productos_afectados']} productos) "
+            f"en {resumen['duracion_segundos']} s → {resumen['filas_por_segundo']} filas/s. "
+            f"Errores: {resumen['total_errores']}"
+        ))
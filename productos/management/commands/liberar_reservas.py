@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from productos import reservas, versiones
+from productos.models import Product, ReservaStock
+
+
+class Command(BaseCommand):
+    help = (
+        "Devuelve al disponible las reservas de stock vencidas (cron: cada minuto). "
+        "--recalcular reconstruye Product.reservado desde las reservas activas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help="Reservas por transacción")
+        parser.add_argument('--recalcular', action='store_true',
+                            help="Además, recalcular Product.reservado (p. ej. tras editar reservas a mano)")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        vencidas = reservas.liberar_vencidas(tamano_lote=options['lote'])
+        self.stdout.write(f"Reservas vencidas liberadas: {vencidas} ({time.perf_counter() - inicio:.3f}s)")
+
+        if options['recalcular']:
+            activas = ReservaStock.objects.filter(
+                producto=OuterRef('pk'), estado=ReservaStock.ACTIVA
+            ).order_by().values('producto').annotate(total=Sum('cantidad')).values('total')
+            with transaction.atomic():
+                esperado = Coalesce(Subquery(activas, output_field=IntegerField()), Value(0))
+                corregidos = list(
+                    Product.objects.annotate(esperado=esperado).exclude(reservado=esperado)
+                    .values_list('pk', flat=True)
+                )
+                Product.objects.filter(pk__in=corregidos).update(reservado=esperado)
+            if corregidos:
+                versiones.invalidar(Product, corregidos)
+            self.stdout.write(f"Productos con reservado corregido: {len(corregidos)}")
@@ -0,0 +1,30 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from productos.inventario import tomar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda el stock de cada producto al cierre del día (cron: cada noche, después "
+        "de medianoche). Con --dias N también los N-1 días anteriores"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help="Día a cerrar (AAAA-MM-DD); por defecto ayer")
+        parser.add_argument('--dias', type=int, default=1, help="Días hacia atrás desde --fecha")
+
+    def handle(self, *args, **options):
+        try:
+            fecha = date.fromisoformat(options['fecha']) if options['fecha'] else timezone.localdate() - timedelta(days=1)
+        except ValueError:
+            raise CommandError("--fecha debe tener el formato AAAA-MM-DD")
+
+        for atras in range(options['dias'] - 1, -1, -1):
+            dia = fecha - timedelta(days=atras)
+            inicio = time.perf_counter()
+            productos = tomar_snapshot(dia)
+            self.stdout.write(f"{dia}: {productos} productos ({time.perf_counter() - inicio:.3f}s)")
@@ -0,0 +1,74 @@
+# Generated by Django 5.0 on 2026-10-18 23:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# El vector se calcula en la BD para que también lo mantengan los UPDATE/bulk_create
+# que no pasan por Model.save(). Pesos: nombre (A), descripción (B), categoría (C).
+PRODUCT_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION product_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', coalesce(NEW.nombre, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(NEW.descripcion, '')), 'B') ||
+        setweight(to_tsvector('spanish', coalesce(
+            (SELECT descripcion FROM category WHERE id = NEW.categoria_id), ''
+        )), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER product_search_vector_update
+    BEFORE INSERT OR UPDATE OF nombre, descripcion, categoria_id ON product
+    FOR EACH ROW EXECUTE FUNCTION product_search_vector_trigger();
+
+CREATE OR REPLACE FUNCTION category_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    IF NEW.descripcion IS DISTINCT FROM OLD.descripcion THEN
+        UPDATE product SET nombre = nombre WHERE categoria_id = NEW.id;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER category_search_vector_update
+    AFTER UPDATE OF descripcion ON category
+    FOR EACH ROW EXECUTE FUNCTION category_search_vector_trigger();
+
+UPDATE product SET nombre = nombre;
+"""
+
+PRODUCT_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS category_search_vector_update ON category;
+DROP FUNCTION IF EXISTS category_search_vector_trigger();
+DROP TRIGGER IF EXISTS product_search_vector_update ON product;
+DROP FUNCTION IF EXISTS product_search_vector_trigger();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(PRODUCT_TRIGGER_SQL, PRODUCT_TRIGGER_REVERSE_SQL),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nombre'], name='product_nombre_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0002_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='foto_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-18 23:36
+
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def asignar_codigos(apps, schema_editor):
+    # Los productos existentes reciben un código a partir de su id (P<id>)
+    Product = apps.get_model('productos', 'Product')
+    Product.objects.filter(codigo__isnull=True).update(
+        codigo=Concat(Value('P'), Cast('id', CharField()))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0003_product_foto_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='codigo',
+            field=models.CharField(blank=True, max_length=50, null=True, unique=True),
+        ),
+        migrations.RunPython(asignar_codigos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-19 00:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0004_product_codigo'),
+        ('ventas', '0003_venta_sincronizada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reservado',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ReservaStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(db_index=True, max_length=64)),
+                ('cantidad', models.PositiveIntegerField()),
+                ('motivo', models.CharField(choices=[('carrito', 'Carrito'), ('credito', 'Aprobación de crédito')], default='carrito', max_length=20)),
+                ('estado', models.CharField(choices=[('activa', 'Activa'), ('convertida', 'Convertida en venta'), ('liberada', 'Liberada'), ('vencida', 'Vencida')], default='activa', max_length=20)),
+                ('expira', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('nota', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='ventas.salesnote')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='productos.product')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reserva_stock',
+                'indexes': [models.Index(condition=models.Q(('estado', 'activa')), fields=['expira'], name='reserva_activa_expira_idx')],
+            },
+        ),
+    ]
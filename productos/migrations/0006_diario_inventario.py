@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-19 00:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0005_reservas_stock'),
+        ('ventas', '0003_venta_sincronizada'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cantidad', models.IntegerField()),
+                ('tipo', models.CharField(choices=[('venta', 'Venta'), ('anulacion', 'Anulación de venta'), ('ajuste', 'Ajuste manual'), ('importacion', 'Importación')], max_length=20)),
+                ('nota', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='ventas.salesnote')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='productos.product')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'movimiento_inventario',
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='movimiento_producto_fecha_idx'), models.Index(fields=['fecha'], name='movimiento_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('stock', models.IntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='productos.product')),
+            ],
+            options={
+                'db_table': 'snapshot_inventario',
+                'indexes': [models.Index(fields=['fecha'], name='snapshot_fecha_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='snapshotinventario',
+            constraint=models.UniqueConstraint(fields=('producto', 'fecha'), name='snapshot_producto_fecha_unico'),
+        ),
+    ]
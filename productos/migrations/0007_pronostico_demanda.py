@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-19 00:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_diario_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoDemanda',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pronostico', serialize=False, to='productos.product')),
+                ('modelo', models.CharField(max_length=20)),
+                ('demanda_diaria', models.FloatField()),
+                ('desviacion', models.FloatField()),
+                ('stock_seguridad', models.IntegerField()),
+                ('punto_reorden', models.IntegerField()),
+                ('disponible', models.IntegerField()),
+                ('dias_cobertura', models.FloatField(null=True)),
+                ('cantidad_sugerida', models.IntegerField()),
+                ('calculado', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'pronostico_demanda',
+                'indexes': [models.Index(condition=models.Q(('cantidad_sugerida__gt', 0)), fields=['dias_cobertura'], name='pronostico_reponer_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+
+from productos.imagenes import encolar_variantes, hash_contenido
 
 class Category(models.Model):
     descripcion = models.CharField(max_length=100)
@@ -28,12 +33,20 @@ class Provider(models.Model):
 
 
 class Product(models.Model):
+    # Clave natural (SKU) usada por la importación masiva para el upsert
+    codigo = models.CharField(max_length=50, unique=True, null=True, blank=True)
     nombre = models.CharField(max_length=100)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     descripcion = models.TextField(blank=True, null=True)
     stock = models.IntegerField(default=0)
+    # Suma de las reservas activas (productos/reservas.py); se mantiene con cada reserva
+    reservado = models.PositiveIntegerField(default=0, editable=False)
     foto = models.ImageField(upload_to='productos/', blank=True, null=True)
+    # Hash del contenido de 'foto'; nombra sus variantes redimensionadas
+    foto_hash = models.CharField(max_length=16, blank=True, default='', editable=False, db_index=True)
     categoria = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='productos')
+    # Mantenido por trigger en la BD (nombre, descripcion y categoría; ver migración 0002)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     proveedores = models.ManyToManyField(
         Provider,
@@ -46,10 +59,41 @@ class Product(models.Model):
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['nombre']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            GinIndex(fields=['nombre'], opclasses=['gin_trgm_ops'], name='product_nombre_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
 
+    @property
+    def disponible(self):
+        """Stock que se puede vender o reservar."""
+        return self.stock - self.reservado
+
+    def save(self, *args, **kwargs):
+        foto_nueva = bool(self.foto) and not self.foto._committed
+        if foto_nueva:
+            self.foto_hash = hash_contenido(self.foto)
+        elif not self.foto:
+            self.foto_hash = ''
+        # Sin código se asigna P<id>, como en la migración 0004: así toda fila exportada se puede reimportar
+        sin_codigo = not self.codigo
+        if sin_codigo:
+            self.codigo = None
+
+        super().save(*args, **kwargs)
+
+        if sin_codigo:
+            self.codigo = f'P{self.pk}'
+            Product.objects.filter(pk=self.pk).update(codigo=self.codigo)
+
+        if foto_nueva:
+            # Las variantes se generan en el pool de procesos, sin demorar la subida
+            ruta, foto_hash = self.foto.path, self.foto_hash
+            transaction.on_commit(lambda: encolar_variantes(ruta, foto_hash))
+
 
 class ProviderProduct(models.Model):
     proveedor = models.ForeignKey(Provider, on_delete=models.CASCADE)
@@ -64,4 +108,130 @@ class ProviderProduct(models.Model):
         unique_together = ('proveedor', 'producto')
 
     def __str__(self):
-        return f"{self.proveedor.nombre} - {self.producto.nombre}"
\ No newline at end of file
+        return f"{self.proveedor.nombre} - {self.producto.nombre}"
+
+
+class MovimientoInventario(models.Model):
+    """
+    Diario de movimientos de stock: sólo se agregan filas, en la misma
+    transacción que cambia Product.stock (productos/inventario.py).
+    """
+    TIPOS = [
+        ('venta', 'Venta'),
+        ('anulacion', 'Anulación de venta'),
+        ('ajuste', 'Ajuste manual'),
+        ('importacion', 'Importación'),
+    ]
+
+    producto = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movimientos')
+    fecha = models.DateTimeField(default=timezone.now)
+    cantidad = models.IntegerField()  # positiva si entra, negativa si sale
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    # Sin restricción: el diario conserva el id de las ventas anuladas
+    nota = models.ForeignKey(
+        'ventas.SalesNote', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='+'
+    )
+    usuario = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        db_table = 'movimiento_inventario'
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='movimiento_producto_fecha_idx'),
+            # Delta de todos los productos desde un snapshot
+            models.Index(fields=['fecha'], name='movimiento_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.producto_id} {self.cantidad:+d}"
+
+
+class SnapshotInventario(models.Model):
+    """Stock de cada producto al cierre del día `fecha` (manage.py snapshot_inventario)."""
+    producto = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    fecha = models.DateField()
+    stock = models.IntegerField()
+
+    class Meta:
+        db_table = 'snapshot_inventario'
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'fecha'], name='snapshot_producto_fecha_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='snapshot_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} al {self.fecha}: {self.stock}"
+
+
+class PronosticoDemanda(models.Model):
+    """
+    Demanda diaria pronosticada y punto de reorden de un producto
+    (manage.py pronosticar_demanda). `disponible` y `dias_cobertura` son los
+    del momento del cálculo.
+    """
+    producto = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='pronostico')
+    modelo = models.CharField(max_length=20)
+    demanda_diaria = models.FloatField()
+    # Desviación del error del pronóstico a un día (media móvil: de la demanda)
+    desviacion = models.FloatField()
+    stock_seguridad = models.IntegerField()
+    punto_reorden = models.IntegerField()
+    disponible = models.IntegerField()
+    # None si no hay demanda
+    dias_cobertura = models.FloatField(null=True)
+    cantidad_sugerida = models.IntegerField()
+    calculado = models.DateTimeField()
+
+    class Meta:
+        db_table = 'pronostico_demanda'
+        indexes = [
+            # El reporte de reposición lee sólo lo que hay que pedir, lo más urgente primero
+            models.Index(fields=['dias_cobertura'], condition=models.Q(cantidad_sugerida__gt=0),
+                         name='pronostico_reponer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id}: {self.demanda_diaria:.2f}/día, reorden en {self.punto_reorden}"
+
+
+class ReservaStock(models.Model):
+    """
+    Unidades apartadas para un carrito o una venta a crédito en aprobación.
+    Las líneas de una misma reserva comparten la clave; vencen en `expira`.
+    """
+    ACTIVA = 'activa'
+    CONVERTIDA = 'convertida'
+    LIBERADA = 'liberada'
+    VENCIDA = 'vencida'
+    ESTADOS = [
+        (ACTIVA, 'Activa'),
+        (CONVERTIDA, 'Convertida en venta'),
+        (LIBERADA, 'Liberada'),
+        (VENCIDA, 'Vencida'),
+    ]
+    MOTIVOS = [
+        ('carrito', 'Carrito'),
+        ('credito', 'Aprobación de crédito'),
+    ]
+
+    clave = models.CharField(max_length=64, db_index=True)
+    producto = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservas')
+    usuario = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, related_name='+')
+    cantidad = models.PositiveIntegerField()
+    motivo = models.CharField(max_length=20, choices=MOTIVOS, default='carrito')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=ACTIVA)
+    expira = models.DateTimeField()
+    nota = models.ForeignKey('ventas.SalesNote', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'reserva_stock'
+        indexes = [
+            # El barrido de vencidas sólo recorre las activas
+            models.Index(fields=['expira'], condition=models.Q(estado='activa'), name='reserva_activa_expira_idx'),
+        ]
+
+    def __str__(self):
+        return f"Reserva {self.clave} - {self.producto_id} x {self.cantidad}"
@@ -0,0 +1,27 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class BusquedaPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ProveedorProductoPagination(CursorPagination):
+    """
+    Paginación por cursor de la lista plana proveedor-producto, en el orden
+    del índice único (proveedor, producto). Filtrada por proveedor (o por
+    producto) el cursor va sobre la otra columna, que ahí es única: cada
+    página es un rango del índice, sin OFFSET dentro de un proveedor grande.
+    """
+    page_size = 500
+    page_size_query_param = 'page_size'
+    max_page_size = 5000
+    ordering = ('proveedor_id', 'producto_id')
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('proveedor'):
+            return ('producto_id',)
+        if request.query_params.get('producto'):
+            return ('proveedor_id',)
+        return self.ordering
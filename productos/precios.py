@@ -0,0 +1,147 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from productos.models import Product, ProviderProduct
+
+MAX_DESCRIPCION = ProviderProduct._meta.get_field('descripcion').max_length
+
+
+class ErrorListaPrecios(Exception):
+    def __init__(self, errores):
+        super().__init__(errores)
+        self.errores = errores
+
+
+def _normalizar(items):
+    """Valida la lista recibida y la devuelve como {clave_producto: item}."""
+    if not isinstance(items, list):
+        raise ErrorListaPrecios(["'productos' debe ser una lista."])
+
+    errores = []
+    normalizados = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or ('producto_id' not in item and 'codigo' not in item):
+            errores.append(f"Ítem {i}: se requiere 'producto_id' o 'codigo'.")
+            continue
+
+        precio = item.get('precio_compra')
+        if precio not in (None, ''):
+            try:
+                precio = Decimal(str(precio)).quantize(Decimal('0.01'))
+            except InvalidOperation:
+                errores.append(f"Ítem {i}: 'precio_compra' inválido ({precio!r}).")
+                continue
+            if not precio.is_finite() or precio < 0 or precio >= Decimal('1e8'):
+                errores.append(f"Ítem {i}: 'precio_compra' inválido ({item.get('precio_compra')!r}).")
+                continue
+        else:
+            precio = None
+
+        descripcion = item.get('descripcion')
+        if descripcion is not None:
+            if not isinstance(descripcion, str):
+                errores.append(f"Ítem {i}: 'descripcion' debe ser texto.")
+                continue
+            if len(descripcion) > MAX_DESCRIPCION:
+                errores.append(f"Ítem {i}: 'descripcion' supera los {MAX_DESCRIPCION} caracteres.")
+                continue
+
+        normalizados.append({
+            'producto_id': item.get('producto_id'),
+            'codigo': item.get('codigo'),
+            'precio_compra': precio,
+            'descripcion': descripcion,
+            'tiene_descripcion': 'descripcion' in item,
+        })
+
+    if errores:
+        raise ErrorListaPrecios(errores)
+    return normalizados
+
+
+def _resolver_productos(items):
+    """Una consulta por tipo de referencia (id / código); informa todos los faltantes juntos."""
+    ids = {int(i['producto_id']) for i in items if i['producto_id'] is not None and str(i['producto_id']).isdigit()}
+    codigos = {str(i['codigo']) for i in items if i['producto_id'] is None}
+
+    existentes_ids = set(Product.objects.filter(id__in=ids).values_list('id', flat=True)) if ids else set()
+    por_codigo = dict(Product.objects.filter(codigo__in=codigos).values_list('codigo', 'id')) if codigos else {}
+
+    errores = []
+    for item in items:
+        if item['producto_id'] is not None:
+            pk = int(item['producto_id']) if str(item['producto_id']).isdigit() else None
+            if pk not in existentes_ids:
+                errores.append(f"Producto inexistente: id={item['producto_id']}.")
+            item['producto_id'] = pk
+        else:
+            pk = por_codigo.get(str(item['codigo']))
+            if pk is None:
+                errores.append(f"Producto inexistente: codigo={item['codigo']}.")
+            item['producto_id'] = pk
+
+    vistos = set()
+    for item in items:
+        if item['producto_id'] in vistos:
+            errores.append(f"Producto repetido en la lista: id={item['producto_id']}.")
+        vistos.add(item['producto_id'])
+
+    if errores:
+        raise ErrorListaPrecios(errores)
+    return {item['producto_id']: item for item in items}
+
+
+def sincronizar_lista_precios(proveedor, items, simular=False):
+    """
+    Reemplaza la lista de precios de un proveedor por la recibida.
+
+    Compara en memoria contra las filas actuales y aplica inserciones,
+    actualizaciones y bajas con operaciones masivas en una transacción.
+    """
+    nuevos = _resolver_productos(_normalizar(items))
+
+    with transaction.atomic():
+        actuales = {
+            fila.producto_id: fila
+            for fila in ProviderProduct.objects.select_for_update().filter(proveedor=proveedor).only(
+                'id', 'producto_id', 'precio_compra', 'descripcion'
+            )
+        }
+
+        crear = []
+        actualizar = []
+        for producto_id, item in nuevos.items():
+            fila = actuales.get(producto_id)
+            if fila is None:
+                crear.append(ProviderProduct(
+                    proveedor=proveedor,
+                    producto_id=producto_id,
+                    precio_compra=item['precio_compra'],
+                    descripcion=item['descripcion'],
+                ))
+                continue
+
+            cambio = fila.precio_compra != item['precio_compra']
+            fila.precio_compra = item['precio_compra']
+            if item['tiene_descripcion'] and fila.descripcion != item['descripcion']:
+                fila.descripcion = item['descripcion']
+                cambio = True
+            if cambio:
+                actualizar.append(fila)
+
+        eliminar = [fila.id for producto_id, fila in actuales.items() if producto_id not in nuevos]
+
+        if not simular:
+            ProviderProduct.objects.bulk_create(crear, batch_size=1000)
+            ProviderProduct.objects.bulk_update(actualizar, ['precio_compra', 'descripcion'], batch_size=1000)
+            ProviderProduct.objects.filter(id__in=eliminar).delete()
+
+    return {
+        'proveedor': proveedor.id,
+        'simulado': simular,
+        'creados': len(crear),
+        'actualizados': len(actualizar),
+        'eliminados': len(eliminar),
+        'sin_cambios': len(nuevos) - len(crear) - len(actualizar),
+    }
@@ -0,0 +1,135 @@
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from productos import versiones
+from productos.inventario import mover_stock
+from productos.models import Product, ReservaStock
+
+
+# Reservas de stock para carritos y ventas a crédito en aprobación.
+#
+# Product.reservado es la suma de las reservas activas y se actualiza en la
+# misma transacción que cada reserva, así el disponible (stock - reservado)
+# se lee sin agregar nada. Reservar es un UPDATE condicional
+# (stock >= reservado + cantidad) sin bloquear la fila de antemano; al vender,
+# las líneas cubiertas por la reserva ya no se verifican: sólo se descuentan.
+# Las vencidas las devuelve `manage.py liberar_reservas` por lotes.
+
+
+class ErrorReserva(Exception):
+    def __init__(self, errores):
+        super().__init__(errores)
+        self.errores = errores
+
+
+def reservar(usuario, items, motivo='carrito', clave=None):
+    """
+    Aparta {producto_id: cantidad} durante RESERVA_MINUTOS[motivo] y devuelve
+    la clave. Todo o nada: si algún producto no alcanza no se reserva ninguno
+    y se informan todos. Con una clave existente se agregan líneas y se
+    renueva el vencimiento de toda la reserva.
+    """
+    clave = clave or uuid.uuid4().hex
+    expira = timezone.now() + timedelta(minutes=settings.RESERVA_MINUTOS[motivo])
+    # Lo vencido de estos productos vuelve a estar disponible antes de reservar
+    liberar_vencidas(producto_ids=list(items))
+
+    with transaction.atomic():
+        if ReservaStock.objects.filter(clave=clave, estado=ReservaStock.ACTIVA).exclude(usuario=usuario).exists():
+            raise ErrorReserva([f"La reserva '{clave}' pertenece a otro usuario."])
+
+        insuficientes = []
+        for pk in sorted(items):
+            reservados = Product.objects.filter(pk=pk, stock__gte=F('reservado') + items[pk]).update(
+                reservado=F('reservado') + items[pk]
+            )
+            if not reservados:
+                insuficientes.append(pk)
+
+        if insuficientes:
+            errores = [
+                f"Stock insuficiente para '{producto.nombre}'. Disponible: {max(producto.disponible, 0)}, "
+                f"solicitado: {items[producto.pk]}."
+                for producto in Product.objects.filter(pk__in=insuficientes).only('nombre', 'stock', 'reservado')
+            ]
+            raise ErrorReserva(errores)
+
+        ReservaStock.objects.filter(clave=clave, estado=ReservaStock.ACTIVA).update(expira=expira)
+        ReservaStock.objects.bulk_create([
+            ReservaStock(clave=clave, producto_id=pk, usuario=usuario, cantidad=cantidad, motivo=motivo, expira=expira)
+            for pk, cantidad in items.items()
+        ])
+        pks = list(items)
+        transaction.on_commit(lambda: versiones.invalidar(Product, pks), robust=True)
+    return clave
+
+
+def _cerrar(lineas, estado, nota=None):
+    """Cambia de estado las líneas (id, producto_id, cantidad) y devuelve sus unidades al disponible."""
+    if not lineas:
+        return 0
+    ReservaStock.objects.filter(id__in=[id_ for id_, _, _ in lineas]).update(estado=estado, nota=nota)
+    if estado != ReservaStock.CONVERTIDA:
+        devueltas = defaultdict(int)
+        for _, pk, cantidad in lineas:
+            devueltas[pk] -= cantidad
+        mover_stock(reservado=devueltas)
+    return len(lineas)
+
+
+def liberar(clave, usuario=None):
+    """Cancela una reserva activa (opcionalmente sólo si es de `usuario`); devuelve las líneas liberadas."""
+    with transaction.atomic():
+        lineas = ReservaStock.objects.select_for_update().filter(clave=clave, estado=ReservaStock.ACTIVA)
+        if usuario is not None:
+            lineas = lineas.filter(usuario=usuario)
+        return _cerrar(list(lineas.values_list('id', 'producto_id', 'cantidad')), ReservaStock.LIBERADA)
+
+
+def liberar_vencidas(producto_ids=None, tamano_lote=1000):
+    """
+    Marca como vencidas las reservas activas ya expiradas, por lotes de una
+    transacción, y devuelve su stock al disponible. Las filas tomadas por
+    otra transacción (una venta que la está consumiendo) se saltan.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            vencidas = ReservaStock.objects.select_for_update(skip_locked=True).filter(
+                estado=ReservaStock.ACTIVA, expira__lte=timezone.now()
+            )
+            if producto_ids is not None:
+                vencidas = vencidas.filter(producto_id__in=producto_ids)
+            lineas = list(vencidas.order_by('expira').values_list('id', 'producto_id', 'cantidad')[:tamano_lote])
+            total += _cerrar(lineas, ReservaStock.VENCIDA)
+        if len(lineas) < tamano_lote:
+            return total
+
+
+def consumir(clave, nota, usuario):
+    """
+    Convierte la reserva `clave` de `usuario` en la venta `nota` y devuelve
+    {producto_id: cantidad reservada}. Quien la consume descuenta stock y
+    reservado con mover_stock en la misma transacción.
+    """
+    lineas = list(
+        ReservaStock.objects.select_for_update()
+        .filter(clave=clave, usuario=usuario, estado=ReservaStock.ACTIVA, expira__gt=timezone.now())
+        .values_list('id', 'producto_id', 'cantidad')
+    )
+    if not lineas:
+        if ReservaStock.objects.filter(clave=clave, estado=ReservaStock.ACTIVA).exclude(usuario=usuario).exists():
+            raise ErrorReserva([f"La reserva '{clave}' pertenece a otro usuario."])
+        raise ErrorReserva([f"La reserva '{clave}' no existe o ya venció."])
+    _cerrar(lineas, ReservaStock.CONVERTIDA, nota=nota)
+
+    reservado = defaultdict(int)
+    for _, pk, cantidad in lineas:
+        reservado[pk] += cantidad
+    return dict(reservado)
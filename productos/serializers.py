@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from productos.models import Category, Product, Provider, ProviderProduct
+from config.serializers import ClavePrimariaEnLote, ListaEnLoteSerializer
+from productos.models import Category, Product, Provider, ProviderProduct, ReservaStock
+from productos.imagenes import urls_variantes
 
 
 # --- Categoría ---
@@ -19,35 +21,67 @@ class ProviderSerializer(serializers.ModelSerializer):
 # --- Producto ---
 class ProductSerializer(serializers.ModelSerializer):
     categoria = CategorySerializer(read_only=True)
-    categoria_id = serializers.PrimaryKeyRelatedField(
+    categoria_id = ClavePrimariaEnLote(
         queryset=Category.objects.all(), source='categoria', write_only=True
     )
+    foto_variantes = serializers.SerializerMethodField()
+    # stock - reservas activas (productos/reservas.py)
+    disponible = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
         fields = [
             'id',
+            'codigo',
             'nombre',
             'precio',
             'descripcion',
             'stock',
+            'disponible',
             'foto',
+            'foto_variantes',
             'categoria',
             'categoria_id',
         ]
+        list_serializer_class = ListaEnLoteSerializer
+
+    def get_foto_variantes(self, obj):
+        return urls_variantes(obj.foto_hash, self.context.get('request'))
 
 # --- Relación Proveedor - Producto ---
 class ProviderProductSerializer(serializers.ModelSerializer):
     proveedor = ProviderSerializer(read_only=True)
-    proveedor_id = serializers.PrimaryKeyRelatedField(
+    proveedor_id = ClavePrimariaEnLote(
         queryset=Provider.objects.all(), source='proveedor', write_only=True
     )
 
     producto = ProductSerializer(read_only=True)
-    producto_id = serializers.PrimaryKeyRelatedField(
+    producto_id = ClavePrimariaEnLote(
         queryset=Product.objects.all(), source='producto', write_only=True
     )
 
     class Meta:
         model = ProviderProduct
-        fields = ['id', 'proveedor', 'proveedor_id', 'producto', 'producto_id', 'descripcion']
+        fields = ['id', 'proveedor', 'proveedor_id', 'producto', 'producto_id', 'precio_compra', 'descripcion']
+        list_serializer_class = ListaEnLoteSerializer
+
+
+# --- Reservas de stock ---
+class ReservaItemSerializer(serializers.Serializer):
+    producto_id = ClavePrimariaEnLote(queryset=Product.objects.all())
+    cantidad = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        list_serializer_class = ListaEnLoteSerializer
+
+
+class ReservaCrearSerializer(serializers.Serializer):
+    clave = serializers.CharField(max_length=64, required=False)
+    motivo = serializers.ChoiceField(choices=ReservaStock.MOTIVOS, default='carrito')
+    productos = ReservaItemSerializer(many=True, allow_empty=False)
+
+
+class ReservaStockSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReservaStock
+        fields = ['id', 'clave', 'producto', 'cantidad', 'motivo', 'estado', 'expira', 'created_at']
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from productos import versiones
+from productos.models import Category, Product
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidar_categoria(sender, instance, **kwargs):
+    versiones.invalidar(Category, [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidar_producto(sender, instance, **kwargs):
+    versiones.invalidar(Product, [instance.pk])
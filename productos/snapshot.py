@@ -0,0 +1,111 @@
+import gzip
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from config.renderers import dumps_json
+from productos import versiones
+from productos.versiones import cache
+from productos.models import Category, Product
+from productos.serializers import ProductSerializer
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+
+# Snapshot del listado completo de productos (GET /api/productos/ sin filtros).
+#
+# Se guarda en la caché del catálogo ya renderizado (JSON compacto y comprimido) bajo la
+# versión actual de las tablas, así cada petición sólo copia bytes. Cuando
+# algo cambia, sólo se vuelven a serializar los productos cuya versión de
+# objeto cambió; el resto reutiliza su fragmento JSON anterior.
+
+PREFIJO = 'catalogo:snapshot'
+TAMANO_LOTE = 2000
+
+
+def _dumps(data):
+    # Mismo formato que el renderer JSON de la API (compacto, sin escapar unicode)
+    return dumps_json(data)
+
+
+def _comprimir(cuerpo):
+    variantes = {}
+    if settings.CATALOGO_SNAPSHOT_GZIP:
+        variantes['gzip'] = gzip.compress(cuerpo, compresslevel=6)
+    if brotli is not None and settings.CATALOGO_SNAPSHOT_BROTLI:
+        variantes['br'] = brotli.compress(cuerpo, quality=5)
+    return variantes
+
+
+def obtener_snapshot(request):
+    """
+    Devuelve {'json': bytes, 'gzip': bytes, 'br': bytes} del catálogo actual,
+    reconstruyéndolo (de forma incremental) si su versión quedó obsoleta.
+    """
+    # Las URLs de 'foto' son absolutas y dependen del host de la petición
+    base_url = request.build_absolute_uri('/')
+    claves = [versiones.clave_tabla(Product), versiones.clave_tabla(Category)]
+    valores, _ = versiones.obtener(claves)
+    clave = f'{PREFIJO}:{versiones.calcular_etag(valores, base_url)}'
+
+    snapshot = cache.get(clave)
+    if snapshot is None:
+        snapshot = construir_snapshot(request, base_url, valores[versiones.clave_tabla(Category)])
+        cache.set(clave, snapshot, timeout=settings.CATALOGO_SNAPSHOT_TTL)
+    return snapshot
+
+
+def construir_snapshot(request, base_url, version_categorias):
+    clave_base = f'{PREFIJO}:fragmentos:{base_url}'
+    anterior = cache.get(clave_base)
+    if anterior is None or anterior['categorias'] != version_categorias:
+        # Las categorías van anidadas en cada producto: hay que rehacer todo
+        anterior = {'categorias': version_categorias, 'objetos': {}, 'fragmentos': {}}
+
+    orden = list(Product.objects.values_list('id', flat=True))
+    actuales = versiones.obtener([versiones.clave_objeto(Product, pk) for pk in orden])[0]
+
+    objetos = {}
+    fragmentos = {}
+    pendientes = []
+    for pk in orden:
+        version = actuales[versiones.clave_objeto(Product, pk)]
+        objetos[pk] = version
+        if anterior['objetos'].get(pk) == version and pk in anterior['fragmentos']:
+            fragmentos[pk] = anterior['fragmentos'][pk]
+        else:
+            pendientes.append(pk)
+
+    contexto = {'request': request}
+    for i in range(0, len(pendientes), TAMANO_LOTE):
+        lote = Product.objects.filter(pk__in=pendientes[i:i + TAMANO_LOTE]).select_related(
+            'categoria'
+        ).defer('search_vector')
+        for item in ProductSerializer(lote, many=True, context=contexto).data:
+            fragmentos[item['id']] = _dumps(item)
+
+    cache.set(clave_base, {
+        'categorias': version_categorias,
+        'objetos': objetos,
+        'fragmentos': fragmentos,
+    }, timeout=None)
+
+    cuerpo = b'[' + b','.join(fragmentos[pk] for pk in orden if pk in fragmentos) + b']'
+    return {'json': cuerpo, **_comprimir(cuerpo), 'reserializados': len(pendientes)}
+
+
+def respuesta_snapshot(request):
+    snapshot = obtener_snapshot(request)
+
+    aceptadas = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    codificacion = next((c for c in ('br', 'gzip') if c in aceptadas and c in snapshot), None)
+
+    response = HttpResponse(snapshot[codificacion or 'json'], content_type='application/json')
+    if codificacion:
+        response['Content-Encoding'] = codificacion
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
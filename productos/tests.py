@@ -1,3 +1,279 @@
+from datetime import datetime, time, timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from productos import inventario, reservas
+from productos.models import (
+    Category, MovimientoInventario, Product, Provider, ProviderProduct, ReservaStock, SnapshotInventario,
+)
+from usuarios.models import Usuario
+from ventas.models import SalesNote
+
+
+# --------------------------------------------------------
+# Reservas de stock (productos/reservas.py)
+# --------------------------------------------------------
+class ReservasStockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Usuario.objects.create_user('cliente@test.com', 'x', username='cliente')
+        cls.otro = Usuario.objects.create_user('otro@test.com', 'x', username='otro')
+        categoria = Category.objects.create(descripcion='Ropa')
+        cls.camisa = Product.objects.create(nombre='Camisa', precio=100, stock=10, categoria=categoria)
+        cls.polera = Product.objects.create(nombre='Polera', precio=50, stock=5, categoria=categoria)
+
+    def estado(self, producto):
+        producto.refresh_from_db()
+        return producto.stock, producto.reservado
+
+    def vender(self, usuario, detalles, reserva=None):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        datos = {
+            'cliente': usuario.pk, 'empleado': usuario.pk, 'monto': '100.00', 'tipo_pago': 'efectivo',
+            'detalles': [{'producto_id': p.pk, 'cantidad': c, 'subtotal': '50.00'} for p, c in detalles],
+        }
+        if reserva:
+            datos['reserva'] = reserva
+        return cliente.post('/api/ventas/', datos, format='json')
+
+    def test_reservar_aparta_sin_tocar_el_stock(self):
+        clave = reservas.reservar(self.cliente, {self.camisa.pk: 3, self.polera.pk: 2})
+        self.assertEqual(self.estado(self.camisa), (10, 3))
+        self.assertEqual(self.estado(self.polera), (5, 2))
+        self.assertEqual(ReservaStock.objects.filter(clave=clave, estado=ReservaStock.ACTIVA).count(), 2)
+
+    def test_reservar_es_todo_o_nada(self):
+        with self.assertRaises(reservas.ErrorReserva) as error:
+            reservas.reservar(self.cliente, {self.camisa.pk: 3, self.polera.pk: 6})
+        self.assertIn('Polera', error.exception.errores[0])
+        self.assertEqual(self.estado(self.camisa), (10, 0))
+        self.assertEqual(self.estado(self.polera), (5, 0))
+        self.assertFalse(ReservaStock.objects.exists())
+
+    def test_reservar_no_supera_el_disponible(self):
+        reservas.reservar(self.otro, {self.polera.pk: 4})
+        with self.assertRaises(reservas.ErrorReserva):
+            reservas.reservar(self.cliente, {self.polera.pk: 2})
+        self.assertEqual(self.estado(self.polera), (5, 4))
+
+    def test_liberar_devuelve_lo_reservado(self):
+        clave = reservas.reservar(self.cliente, {self.camisa.pk: 3})
+        self.assertEqual(reservas.liberar(clave, usuario=self.otro), 0)
+        self.assertEqual(self.estado(self.camisa), (10, 3))
+
+        self.assertEqual(reservas.liberar(clave, usuario=self.cliente), 1)
+        self.assertEqual(self.estado(self.camisa), (10, 0))
+        self.assertEqual(ReservaStock.objects.get(clave=clave).estado, ReservaStock.LIBERADA)
+        # Liberar dos veces no devuelve dos veces
+        self.assertEqual(reservas.liberar(clave, usuario=self.cliente), 0)
+        self.assertEqual(self.estado(self.camisa), (10, 0))
+
+    def test_liberar_vencidas_solo_devuelve_las_expiradas(self):
+        vencida = reservas.reservar(self.cliente, {self.camisa.pk: 3})
+        reservas.reservar(self.otro, {self.camisa.pk: 2})
+        ReservaStock.objects.filter(clave=vencida).update(expira=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(reservas.liberar_vencidas(tamano_lote=1), 1)
+        self.assertEqual(self.estado(self.camisa), (10, 2))
+        self.assertEqual(ReservaStock.objects.get(clave=vencida).estado, ReservaStock.VENCIDA)
+
+    def test_reservar_libera_antes_lo_vencido(self):
+        vencida = reservas.reservar(self.otro, {self.polera.pk: 5})
+        ReservaStock.objects.filter(clave=vencida).update(expira=timezone.now() - timedelta(minutes=1))
+
+        reservas.reservar(self.cliente, {self.polera.pk: 4})
+        self.assertEqual(self.estado(self.polera), (5, 4))
+
+    def test_venta_consume_la_reserva(self):
+        clave = reservas.reservar(self.cliente, {self.camisa.pk: 3})
+        # Vende más de lo reservado: lo que no cubre la reserva se verifica contra el disponible
+        respuesta = self.vender(self.cliente, [(self.camisa, 4)], reserva=clave)
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+
+        self.assertEqual(self.estado(self.camisa), (6, 0))
+        linea = ReservaStock.objects.get(clave=clave)
+        self.assertEqual(linea.estado, ReservaStock.CONVERTIDA)
+        self.assertEqual(linea.nota_id, respuesta.data['id'])
+
+    def test_venta_con_reserva_ajena_se_rechaza(self):
+        clave = reservas.reservar(self.otro, {self.polera.pk: 5})
+        respuesta = self.vender(self.cliente, [(self.polera, 5)], reserva=clave)
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('otro usuario', str(respuesta.data))
+        self.assertEqual(self.estado(self.polera), (5, 5))
+        self.assertEqual(ReservaStock.objects.get(clave=clave).estado, ReservaStock.ACTIVA)
+        self.assertFalse(SalesNote.objects.exists())
+
+    def test_venta_con_reserva_vencida_se_rechaza(self):
+        clave = reservas.reservar(self.cliente, {self.camisa.pk: 3})
+        ReservaStock.objects.filter(clave=clave).update(expira=timezone.now() - timedelta(minutes=1))
+
+        respuesta = self.vender(self.cliente, [(self.camisa, 3)], reserva=clave)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self.estado(self.camisa), (10, 3))
+
+    def test_venta_sin_reserva_respeta_lo_reservado_por_otros(self):
+        reservas.reservar(self.otro, {self.polera.pk: 4})
+        respuesta = self.vender(self.cliente, [(self.polera, 2)])
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self.estado(self.polera), (5, 4))
+
+
+# --------------------------------------------------------
+# Diario de inventario y stock histórico (productos/inventario.py)
+# --------------------------------------------------------
+class InventarioTests(TestCase):
+    """
+    Stock de 20 desde hace 10 días; luego -4 (hace 5 días), +6 (hace 3) y -2
+    (ayer). Cierres: 20 hasta hace 6 días, 16 hace 5 y 4, 22 hace 3 y 2, 20 ayer y hoy.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('cajero@test.com', 'x', username='cajero')
+        cls.categoria = Category.objects.create(descripcion='Ropa')
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.producto = Product.objects.create(nombre='Camisa', precio=100, stock=0, categoria=self.categoria)
+        for atras, delta in ((10, 20), (5, -4), (3, 6), (1, -2)):
+            self.mover(delta, atras)
+
+    def dia(self, atras):
+        return self.hoy - timedelta(days=atras)
+
+    def mover(self, delta, atras):
+        inventario.mover_stock(stock={self.producto.pk: delta}, tipo='ajuste', usuario=self.usuario)
+        mediodia = timezone.make_aware(datetime.combine(self.dia(atras), time(12)))
+        MovimientoInventario.objects.filter(pk=MovimientoInventario.objects.latest('id').pk).update(fecha=mediodia)
+
+    def test_mover_stock_registra_cada_cambio(self):
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 20)
+        movimientos = list(MovimientoInventario.objects.order_by('fecha').values_list('cantidad', 'tipo', 'usuario'))
+        self.assertEqual([m[0] for m in movimientos], [20, -4, 6, -2])
+        self.assertTrue(all(tipo == 'ajuste' and usuario == self.usuario.pk for _, tipo, usuario in movimientos))
+
+    def test_mover_stock_sin_tipo_falla(self):
+        with self.assertRaises(ValueError):
+            inventario.mover_stock(stock={self.producto.pk: 1})
+
+    def test_mover_reservado_no_escribe_en_el_diario(self):
+        inventario.mover_stock(reservado={self.producto.pk: 3})
+        self.producto.refresh_from_db()
+        self.assertEqual((self.producto.stock, self.producto.reservado), (20, 3))
+        self.assertEqual(MovimientoInventario.objects.count(), 4)
+
+    def test_stock_al_sin_snapshots(self):
+        esperado = {11: 0, 10: 20, 6: 20, 5: 16, 4: 16, 3: 22, 2: 22, 1: 20, 0: 20}
+        for atras, stock in esperado.items():
+            self.assertEqual(inventario.stock_al(self.dia(atras))[self.producto.pk], stock, f'hace {atras} días')
+
+    def test_tomar_snapshot_guarda_el_cierre(self):
+        self.assertEqual(inventario.tomar_snapshot(self.dia(4)), 1)
+        self.assertEqual(SnapshotInventario.objects.get(fecha=self.dia(4)).stock, 16)
+        # Volver a tomarlo reemplaza el anterior
+        inventario.tomar_snapshot(self.dia(4))
+        self.assertEqual(SnapshotInventario.objects.count(), 1)
+
+    def test_stock_al_parte_del_snapshot(self):
+        inventario.tomar_snapshot(self.dia(4))
+        for atras, stock in {6: 20, 5: 16, 4: 16, 3: 22, 1: 20}.items():
+            self.assertEqual(inventario.stock_al(self.dia(atras))[self.producto.pk], stock, f'hace {atras} días')
+
+        # El snapshot es la base: se le suman (o restan) sólo los movimientos entre ambos días
+        SnapshotInventario.objects.update(stock=100)
+        self.assertEqual(inventario.stock_al(self.dia(3))[self.producto.pk], 106)
+        self.assertEqual(inventario.stock_al(self.dia(6))[self.producto.pk], 104)
+
+    def test_inventario_promedio(self):
+        # Cierres de hace 6 a hace 2 días: 20, 16, 16, 22, 22
+        promedio = inventario.inventario_promedio(self.dia(6), self.dia(2))
+        self.assertAlmostEqual(promedio[self.producto.pk], 19.2)
+
+        inventario.tomar_snapshot(self.dia(4))
+        promedio = inventario.inventario_promedio(self.dia(6), self.dia(2), producto_ids=[self.producto.pk])
+        self.assertAlmostEqual(promedio[self.producto.pk], 19.2)
+
+        self.assertAlmostEqual(inventario.inventario_promedio(self.dia(3), self.dia(3))[self.producto.pk], 22)
+        self.assertEqual(inventario.inventario_promedio(self.dia(2), self.dia(3)), {})
+
+    def test_venta_y_anulacion_quedan_en_el_diario(self):
+        cliente = APIClient()
+        cliente.force_authenticate(self.usuario)
+        respuesta = cliente.post('/api/ventas/', {
+            'cliente': self.usuario.pk, 'empleado': self.usuario.pk, 'monto': '300.00', 'tipo_pago': 'efectivo',
+            'detalles': [{'producto_id': self.producto.pk, 'cantidad': 3, 'subtotal': '300.00'}],
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        nota_id = respuesta.data['id']
+
+        self.assertEqual(cliente.delete(f'/api/ventas/{nota_id}/').status_code, 204)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 20)
+        self.assertEqual(
+            list(MovimientoInventario.objects.filter(nota_id=nota_id).order_by('id').values_list('tipo', 'cantidad')),
+            [('venta', -3), ('anulacion', 3)],
+        )
+        self.assertEqual(inventario.stock_al(self.hoy)[self.producto.pk], 20)
+
+
+# --------------------------------------------------------
+# Listas de precios de proveedores (productos/precios.py)
+# --------------------------------------------------------
+class ListaPreciosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('compras@test.com', 'x', username='compras')
+        categoria = Category.objects.create(descripcion='Ropa')
+        cls.productos = [
+            Product.objects.create(nombre=f'Producto {i}', precio=10, stock=1, categoria=categoria) for i in range(5)
+        ]
+        cls.proveedor = Provider.objects.create(nombre='Textiles')
+        cls.otro = Provider.objects.create(nombre='Botones')
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.usuario)
+
+    def enviar(self, productos):
+        return self.api.post(f'/api/proveedores/{self.proveedor.pk}/lista-precios/', productos, format='json')
+
+    def test_descripcion_invalida_se_informa_por_item(self):
+        respuesta = self.enviar([
+            {'producto_id': self.productos[0].pk, 'precio_compra': '5.00', 'descripcion': 'x' * 201},
+            {'producto_id': self.productos[1].pk, 'precio_compra': '5.00', 'descripcion': {'a': 1}},
+            {'producto_id': self.productos[2].pk, 'precio_compra': '5.00', 'descripcion': 'x' * 200},
+        ])
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(len(respuesta.data['error']), 2)
+        self.assertIn('Ítem 0', respuesta.data['error'][0])
+        self.assertIn('Ítem 1', respuesta.data['error'][1])
+        self.assertFalse(ProviderProduct.objects.exists())
+
+    def test_listado_plano_paginado_por_cursor(self):
+        self.enviar([{'producto_id': p.pk, 'precio_compra': '5.00'} for p in self.productos])
+        ProviderProduct.objects.create(proveedor=self.otro, producto=self.productos[0], precio_compra=3)
+
+        vistos = []
+        url = '/api/proveedor-producto/?page_size=2'
+        while url:
+            respuesta = self.api.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            vistos += [(f['proveedor_id'], f['producto_id']) for f in respuesta.data['results']]
+            url = respuesta.data['next']
+        self.assertEqual(vistos, sorted(ProviderProduct.objects.values_list('proveedor_id', 'producto_id')))
+
+        respuesta = self.api.get('/api/proveedor-producto/', {'proveedor': self.proveedor.pk, 'page_size': 3})
+        self.assertEqual([f['producto_id'] for f in respuesta.data['results']], [p.pk for p in self.productos[:3]])
+        respuesta = self.api.get(respuesta.data['next'])
+        self.assertEqual([f['producto_id'] for f in respuesta.data['results']], [p.pk for p in self.productos[3:]])
 
-# Create your tests here.
+    def test_filtros_no_numericos(self):
+        for parametros in ({'proveedor': 'abc'}, {'producto': 'abc'}):
+            self.assertEqual(self.api.get('/api/proveedor-producto/', parametros).status_code, 400, parametros)
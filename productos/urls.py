@@ -5,6 +5,7 @@ from productos.views import (
     ProviderViewSet,
     ProductViewSet,
     ProviderProductViewSet,
+    ReservaViewSet,
 )
 
 router = DefaultRouter()
@@ -12,6 +13,7 @@ router.register(r'categorias', CategoryViewSet, basename='categorias')
 router.register(r'proveedores', ProviderViewSet, basename='proveedores')
 router.register(r'productos', ProductViewSet, basename='productos')
 router.register(r'proveedor-producto', ProviderProductViewSet, basename='proveedor-producto')
+router.register(r'reservas', ReservaViewSet, basename='reservas')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from productos.views_async import CategoriasAsyncView, ProductosAsyncView, ProductoAsyncView
+
+# Catálogo de sólo lectura con vistas async (servidor ASGI)
+app_name = 'productos_async'
+
+urlpatterns = [
+    path('categorias/', CategoriasAsyncView.as_view(), name='categorias'),
+    path('productos/', ProductosAsyncView.as_view(), name='productos'),
+    path('productos/<int:pk>/', ProductoAsyncView.as_view(), name='producto'),
+]
@@ -0,0 +1,79 @@
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+
+# Contadores de versión del catálogo guardados en la caché compartida.
+# Cada save/delete incrementa el de su tabla (y el del objeto); las vistas
+# derivan ETag/Last-Modified de ellos sin tocar la base de datos.
+#
+# Van en su propia caché (CACHES['catalogo']), compartida entre workers: con
+# una caché por proceso cada worker tendría sus propios contadores.
+
+ALIAS_CACHE = 'catalogo'
+cache = ConnectionProxy(caches, ALIAS_CACHE)
+
+PREFIJO = 'catalogo:version'
+
+
+def clave_tabla(modelo):
+    return f'{PREFIJO}:{modelo._meta.db_table}'
+
+
+def clave_objeto(modelo, pk):
+    return f'{PREFIJO}:{modelo._meta.db_table}:{pk}'
+
+
+def _version_inicial():
+    # Si la caché se vacía, no reutilizar versiones ya entregadas a clientes/proxies
+    return int(time.time() * 1000)
+
+
+def incrementar(clave):
+    try:
+        version = cache.incr(clave)
+    except ValueError:
+        version = _version_inicial()
+        if not cache.add(clave, version, timeout=None):
+            version = cache.incr(clave)
+    cache.set(f'{clave}:ts', int(time.time()), timeout=None)
+    return version
+
+
+def invalidar(modelo, pks=None):
+    """
+    Marca la tabla (y opcionalmente algunos objetos) como modificada. Las
+    señales lo hacen en cada save/delete; las operaciones masivas
+    (bulk_create, update) deben llamarlo explícitamente.
+    """
+    incrementar(clave_tabla(modelo))
+    for pk in pks or ():
+        incrementar(clave_objeto(modelo, pk))
+
+
+def obtener(claves):
+    """
+    Devuelve ({clave: version}, ultima_modificacion) con una sola lectura
+    de caché; las claves inexistentes se inicializan.
+    """
+    valores = cache.get_many(claves + [f'{clave}:ts' for clave in claves])
+
+    versiones = {}
+    for clave in claves:
+        version = valores.get(clave)
+        if version is None:
+            version = _version_inicial()
+            if not cache.add(clave, version, timeout=None):
+                version = cache.get(clave, version)
+        versiones[clave] = version
+
+    marcas = [valores[f'{clave}:ts'] for clave in claves if f'{clave}:ts' in valores]
+    ultima_modificacion = max(marcas) if marcas else None
+    return versiones, ultima_modificacion
+
+
+def calcular_etag(versiones, *partes):
+    contenido = '|'.join([f'{k}={v}' for k, v in sorted(versiones.items())] + [str(p) for p in partes])
+    return '"%s"' % hashlib.md5(contenido.encode()).hexdigest()
@@ -6,19 +6,83 @@ from rest_framework import status
 from rest_framework import permissions
 from rest_framework.permissions import AllowAny
 
-from productos.models import Category, Product, Provider, ProviderProduct
+from productos.models import Category, Product, Provider, ProviderProduct, ReservaStock
 from productos.serializers import (
     CategorySerializer,
     ProductSerializer,
     ProviderSerializer,
     ProviderProductSerializer,
+    ReservaCrearSerializer,
+    ReservaStockSerializer,
 )
+from productos import inventario, reservas
+from productos.busqueda import buscar_productos
+from productos.precios import sincronizar_lista_precios, ErrorListaPrecios
+from django.db import transaction
+from django.db.models import F
+from productos.pagination import BusquedaPagination, ProveedorProductoPagination
+from productos import versiones
+from productos.snapshot import respuesta_snapshot
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from productos.importacion import (
+    ImportadorProductos, detectar_formato, leer_filas, exportar_filas, lineas_csv, lineas_jsonl
+)
+import os
+from productos.imagenes import nombre_variante, obtener_variante
+
+
+class CatalogoCondicionalMixin:
+    """
+    GET condicional para list/retrieve: ETag y Last-Modified salen de los
+    contadores de versión en caché, así una petición con If-None-Match
+    vigente se responde con 304 sin consultar la BD ni serializar.
+    """
+    modelos_version = ()
+    cache_control = settings.CATALOGO_CACHE_PRIVADO
+
+    def claves_lista(self):
+        return [versiones.clave_tabla(modelo) for modelo in self.modelos_version]
+
+    def claves_detalle(self):
+        return self.claves_lista()
+
+    def list(self, request, *args, **kwargs):
+        return self.respuesta_condicional(self.claves_lista(), self.listar, request, *args, **kwargs)
+
+    def listar(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.respuesta_condicional(self.claves_detalle(), super().retrieve, request, *args, **kwargs)
 
+    def respuesta_condicional(self, claves, handler, request, *args, **kwargs):
+        # Las versiones se leen antes de consultar: si algo cambia mientras se
+        # arma la respuesta, el próximo GET ya verá un ETag distinto.
+        valores, ultima_modificacion = versiones.obtener(claves)
+        etag = versiones.calcular_etag(valores, request.get_full_path(), request.accepted_renderer.format)
 
-class CategoryViewSet(viewsets.ModelViewSet):
+        response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if ultima_modificacion:
+                response['Last-Modified'] = http_date(ultima_modificacion)
+            response['Cache-Control'] = self.cache_control
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+
+class CategoryViewSet(CatalogoCondicionalMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all().order_by('descripcion')
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
+    modelos_version = (Category,)
+    cache_control = settings.CATALOGO_CACHE_PUBLICO
 
 
 class ProviderViewSet(viewsets.ModelViewSet):
@@ -26,11 +90,118 @@ class ProviderViewSet(viewsets.ModelViewSet):
     serializer_class = ProviderSerializer
     permission_classes = [IsAuthenticated]
 
+    @action(detail=True, methods=['post'], url_path='lista-precios')
+    def lista_precios(self, request, pk=None):
+        """
+        POST /api/proveedores/<id>/lista-precios/?simular=true
+
+        Body: {"productos": [{"producto_id": 1, "precio_compra": "12.50"},
+                             {"codigo": "A-100", "precio_compra": "8.00", "descripcion": "..."}]}
+
+        La lista es completa: los productos del proveedor que no aparecen se eliminan.
+        """
+        proveedor = self.get_object()
+        simular = request.query_params.get('simular', '').lower() in ('true', '1')
+
+        # También se acepta la lista sola como cuerpo, como en /api/ventas/sync/
+        items = request.data.get('productos') if isinstance(request.data, dict) else request.data
+        try:
+            resumen = sincronizar_lista_precios(proveedor, items, simular=simular)
+        except ErrorListaPrecios as e:
+            return Response({"error": e.errores}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resumen, status=status.HTTP_200_OK)
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all().select_related('categoria')
+
+class ProductViewSet(CatalogoCondicionalMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.all().select_related('categoria').defer('search_vector')
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated]
+    modelos_version = (Product, Category)
+
+    def claves_detalle(self):
+        # ETag por producto: sólo cambia con ese producto o con las categorías
+        return [
+            versiones.clave_objeto(Product, self.kwargs[self.lookup_field]),
+            versiones.clave_tabla(Category),
+        ]
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            producto = serializer.save()
+            inventario.registrar({producto.pk: producto.stock}, 'ajuste', usuario=self.request.user)
+
+    def perform_update(self, serializer):
+        # Editar el stock a mano también queda en el diario de inventario
+        with transaction.atomic():
+            anterior = Product.objects.select_for_update().values_list('stock', flat=True).get(pk=serializer.instance.pk)
+            producto = serializer.save()
+            inventario.registrar({producto.pk: producto.stock - anterior}, 'ajuste', usuario=self.request.user)
+
+    def listar(self, request, *args, **kwargs):
+        # Sin filtros el listado es siempre el mismo: se sirve el snapshot ya renderizado
+        if not request.query_params and request.accepted_renderer.format == 'json':
+            return respuesta_snapshot(request)
+        return super().listar(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], url_path='buscar')
+    def buscar(self, request):
+        """
+        GET /api/productos/buscar/?q=camisa azul&page=1&page_size=20
+        """
+        texto = request.query_params.get('q', '').strip()
+        if len(texto) < 2:
+            return Response(
+                {"error": "El parámetro 'q' debe tener al menos 2 caracteres."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resultados, modo = buscar_productos(texto)
+
+        paginator = BusquedaPagination()
+        pagina = paginator.paginate_queryset(resultados, request, view=self)
+        serializer = self.get_serializer(pagina, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        response.data['modo'] = modo
+        return response
+
+    @action(detail=False, methods=['post'], url_path='importar')
+    def importar(self, request):
+        """
+        POST /api/productos/importar/  (multipart: archivo=<.csv|.jsonl>, formato opcional)
+
+        Columnas: codigo, nombre, precio, descripcion, stock, categoria, proveedor, precio_compra
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response({"error": "Se requiere el archivo."}, status=status.HTTP_400_BAD_REQUEST)
+
+        formato = detectar_formato(archivo.name, request.data.get('formato'))
+        if formato not in ('csv', 'jsonl'):
+            return Response({"error": "Formato inválido. Use 'csv' o 'jsonl'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        archivo.file.seek(0)
+        resumen = ImportadorProductos().importar(leer_filas(archivo.file, formato))
+        return Response(resumen, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='exportar')
+    def exportar(self, request):
+        """
+        GET /api/productos/exportar/?formato=csv|jsonl
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato == 'jsonl':
+            lineas, content_type = lineas_jsonl(exportar_filas()), 'application/x-ndjson'
+        elif formato == 'csv':
+            lineas, content_type = lineas_csv(exportar_filas()), 'text/csv'
+        else:
+            return Response({"error": "Formato inválido. Use 'csv' o 'jsonl'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(lineas, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename=productos.{formato}'
+        return response
 
     # --- NUEVA ACCIÓN PERSONALIZADA ---
     @action(detail=True, methods=['post'], url_path='ajustar_stock')
@@ -46,22 +217,24 @@ class ProductViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            if accion == "sumar":
-                producto.stock += cantidad
-            elif accion == "restar":
-                if producto.stock < cantidad:
-                    return Response(
-                        {"error": f"Stock insuficiente. Disponible: {producto.stock}."},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                producto.stock -= cantidad
-            else:
+            if accion not in ("sumar", "restar"):
                 return Response(
                     {"error": "Acción inválida. Use 'sumar' o 'restar'."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            producto.save(update_fields=['stock'])
+            with transaction.atomic():
+                # Fila bloqueada: el ajuste y su movimiento en el diario de inventario van juntos
+                producto = Product.objects.select_for_update().get(pk=producto.pk)
+                delta = cantidad if accion == "sumar" else -cantidad
+                if producto.stock + delta < 0:
+                    return Response(
+                        {"error": f"Stock insuficiente. Disponible: {producto.stock}."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                producto.stock += delta
+                producto.save(update_fields=['stock'])
+                inventario.registrar({producto.pk: delta}, 'ajuste', usuario=request.user)
 
             return Response({
                 "mensaje": f"Stock actualizado correctamente.",
@@ -77,3 +250,104 @@ class ProviderProductViewSet(viewsets.ModelViewSet):
     queryset = ProviderProduct.objects.select_related('proveedor', 'producto').all()
     serializer_class = ProviderProductSerializer
     permission_classes = [IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        """
+        GET /api/proveedor-producto/?proveedor=<id>&producto=<id>&page_size=500
+
+        Representación plana (sin serializers anidados) para listas grandes,
+        paginada por cursor.
+        """
+        queryset = ProviderProduct.objects.all()
+
+        for parametro in ('proveedor', 'producto'):
+            valor = request.query_params.get(parametro)
+            if not valor:
+                continue
+            try:
+                valor = int(valor)
+            except ValueError:
+                return Response(
+                    {"error": f"'{parametro}' debe ser un id numérico."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(**{f'{parametro}_id': valor})
+
+        filas = queryset.annotate(
+            proveedor_nombre=F('proveedor__nombre'),
+            producto_codigo=F('producto__codigo'),
+            producto_nombre=F('producto__nombre'),
+        ).values(
+            'id', 'proveedor_id', 'proveedor_nombre', 'producto_id', 'producto_codigo',
+            'producto_nombre', 'precio_compra', 'descripcion'
+        )
+
+        paginator = ProveedorProductoPagination()
+        pagina = paginator.paginate_queryset(filas, request, view=self)
+        return paginator.get_paginated_response(pagina)
+
+
+class ReservaViewSet(viewsets.ViewSet):
+    """
+    POST   /api/reservas/           {"motivo": "carrito"|"credito", "clave": opcional,
+                                     "productos": [{"producto_id": 1, "cantidad": 2}]}
+    GET    /api/reservas/           reservas activas del usuario
+    DELETE /api/reservas/<clave>/   libera la reserva
+
+    La venta que la consume envía "reserva": "<clave>" en POST /api/ventas/.
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'clave'
+    lookup_value_regex = '[^/]+'
+
+    def list(self, request):
+        activas = ReservaStock.objects.filter(
+            usuario=request.user, estado=ReservaStock.ACTIVA
+        ).order_by('expira', 'id')
+        return Response(ReservaStockSerializer(activas, many=True).data)
+
+    def create(self, request):
+        serializer = ReservaCrearSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        items = {}
+        for item in datos['productos']:
+            items[item['producto_id'].pk] = items.get(item['producto_id'].pk, 0) + item['cantidad']
+        try:
+            clave = reservas.reservar(request.user, items, datos['motivo'], datos.get('clave'))
+        except reservas.ErrorReserva as e:
+            return Response({"error": e.errores}, status=status.HTTP_409_CONFLICT)
+
+        lineas = ReservaStock.objects.filter(clave=clave, estado=ReservaStock.ACTIVA).order_by('id')
+        return Response(ReservaStockSerializer(lineas, many=True).data, status=status.HTTP_201_CREATED)
+
+    def destroy(self, request, clave=None):
+        if not reservas.liberar(clave, usuario=request.user):
+            return Response({"error": "Reserva inexistente o ya cerrada."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# --- Variantes de foto (generación perezosa) ---
+def foto_variante(request, foto_hash, ancho, extension):
+    """
+    GET /media/productos/variantes/<hash>-<ancho>.<webp|jpg>
+
+    Sólo llega aquí si el archivo todavía no existe (o en desarrollo):
+    genera la variante en el pool de procesos y la sirve como inmutable.
+    """
+    formato = {'webp': 'webp', 'jpg': 'jpeg'}.get(extension)
+    ancho = int(ancho)
+    if formato not in settings.PRODUCTO_FOTO_FORMATOS or ancho not in settings.PRODUCTO_FOTO_ANCHOS:
+        raise Http404
+
+    ruta = os.path.join(str(settings.MEDIA_ROOT), nombre_variante(foto_hash, ancho, formato))
+    if not os.path.exists(ruta):
+        producto = Product.objects.filter(foto_hash=foto_hash).exclude(foto='').only('foto').first()
+        if producto is None:
+            raise Http404
+        ruta = obtener_variante(producto.foto.path, foto_hash, ancho, formato)
+
+    response = FileResponse(open(ruta, 'rb'), content_type=f'image/{formato}')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
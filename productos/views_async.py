@@ -0,0 +1,103 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import exceptions
+
+from config.renderers import dumps_json
+from config.vistas_async import VistaAsync, en_hilo, respuesta_json
+from productos import versiones
+from productos.models import Category, Product
+from productos.serializers import CategorySerializer, ProductSerializer
+from productos.snapshot import TAMANO_LOTE, respuesta_snapshot
+
+
+class CatalogoAsyncView(VistaAsync):
+    """GET condicional como CatalogoCondicionalMixin: ETag/Last-Modified de los contadores de versión."""
+    modelos_version = ()
+    cache_control = settings.CATALOGO_CACHE_PRIVADO
+
+    def claves(self, **kwargs):
+        return [versiones.clave_tabla(modelo) for modelo in self.modelos_version]
+
+    async def get(self, request, **kwargs):
+        valores, ultima_modificacion = await sync_to_async(versiones.obtener)(self.claves(**kwargs))
+        etag = versiones.calcular_etag(valores, request.get_full_path(), 'json')
+
+        response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+        if response is None:
+            response = await self.responder(request, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if ultima_modificacion:
+                response['Last-Modified'] = http_date(ultima_modificacion)
+            response['Cache-Control'] = self.cache_control
+            patch_vary_headers(response, ['Accept'])
+        return response
+
+    async def responder(self, request, **kwargs):
+        raise NotImplementedError
+
+
+class CategoriasAsyncView(CatalogoAsyncView):
+    """GET /api/async/categorias/"""
+    permiso_publico = True
+    modelos_version = (Category,)
+    cache_control = settings.CATALOGO_CACHE_PUBLICO
+
+    async def responder(self, request):
+        categorias = [c async for c in Category.objects.order_by('descripcion').aiterator()]
+        return respuesta_json(CategorySerializer(categorias, many=True).data)
+
+
+class ProductosAsyncView(CatalogoAsyncView):
+    """
+    GET /api/async/productos/
+
+    Sin parámetros se sirve el snapshot pre-renderizado (en el pool de hilos:
+    puede tener que reconstruirse); con parámetros, el listado se recorre con
+    aiterator y se envía por partes sin armarlo entero en memoria.
+    """
+    modelos_version = (Product, Category)
+
+    async def responder(self, request):
+        if not request.GET:
+            return await en_hilo(respuesta_snapshot, request)
+        return StreamingHttpResponse(self.listado(request), content_type='application/json')
+
+    async def listado(self, request):
+        productos = Product.objects.all().select_related('categoria').defer('search_vector')
+        contexto = {'request': request}
+        lote = []
+        separador = b'['
+        async for producto in productos.aiterator(chunk_size=TAMANO_LOTE):
+            lote.append(producto)
+            if len(lote) == TAMANO_LOTE:
+                yield separador + self.fragmento(lote, contexto)
+                separador, lote = b',', []
+        if lote:
+            yield separador + self.fragmento(lote, contexto)
+            separador = b','
+        yield b'[]' if separador == b'[' else b']'
+
+    def fragmento(self, productos, contexto):
+        items = ProductSerializer(productos, many=True, context=contexto).data
+        return b','.join(dumps_json(item) for item in items)
+
+
+class ProductoAsyncView(CatalogoAsyncView):
+    """GET /api/async/productos/<id>/"""
+
+    def claves(self, pk):
+        # ETag por producto: sólo cambia con ese producto o con las categorías
+        return [versiones.clave_objeto(Product, pk), versiones.clave_tabla(Category)]
+
+    async def responder(self, request, pk):
+        productos = Product.objects.select_related('categoria').defer('search_vector')
+        try:
+            producto = await productos.aget(pk=pk)
+        except Product.DoesNotExist:
+            return respuesta_json({'detail': exceptions.NotFound.default_detail}, status=404)
+        return respuesta_json(ProductSerializer(producto, context={'request': request}).data)
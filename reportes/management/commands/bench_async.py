@@ -0,0 +1,231 @@
+import asyncio
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from productos.models import Product
+from usuarios.models import Usuario
+
+# (ruta WSGI, ruta ASGI); {id} se reemplaza por un producto al azar
+RUTAS = {
+    'resumen-creditos': ('/api/reportes/resumen-creditos/', '/api/async/reportes/resumen-creditos/'),
+    'ventas-periodo': ('/api/reportes/ventas-periodo/?{periodo}', '/api/async/reportes/ventas-periodo/?{periodo}'),
+    'margen-productos': (
+        '/api/reportes/margen-productos/?{periodo}', '/api/async/reportes/margen-productos/?{periodo}'
+    ),
+    'rfm': ('/api/reportes/rfm/', '/api/async/reportes/rfm/'),
+    'producto': ('/api/productos/{id}/', '/api/async/productos/{id}/'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de las vistas sync (WSGI, un hilo por petición en curso) contra "
+        "sus variantes async (ASGI, un solo event loop) a distintas concurrencias: "
+        "req/s, latencia, hilos y memoria pico por proceso"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rutas', default='resumen-creditos,producto',
+                            help=f"Rutas a medir, separadas por coma: {', '.join(RUTAS)}")
+        parser.add_argument('--concurrencias', default='1,8,32,128')
+        parser.add_argument('--total', type=int, default=500, help="Peticiones por medición")
+        parser.add_argument('--latencia-ms', type=float, default=0,
+                            help="Latencia simulada por consulta SQL (base remota)")
+        parser.add_argument('--email', help="Usuario con el que se autentican las peticiones")
+        # Uso interno: cada medición corre en un proceso nuevo para que la memoria pico sea comparable
+        parser.add_argument('--medir', help='modo:ruta:concurrencia')
+
+    def handle(self, *args, **options):
+        if options['medir']:
+            return self.medir(options)
+
+        rutas = [r.strip() for r in options['rutas'].split(',')]
+        desconocidas = [r for r in rutas if r not in RUTAS]
+        if desconocidas:
+            raise CommandError(f"Rutas desconocidas: {', '.join(desconocidas)}")
+
+        self.stdout.write(
+            f"{'ruta':<18} {'modo':<5} {'conc.':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'hilos':>6} {'RSS MB':>8} {'errores':>8}"
+        )
+        for ruta in rutas:
+            for concurrencia in [int(c) for c in options['concurrencias'].split(',')]:
+                for modo in ('wsgi', 'asgi'):
+                    r = self.subproceso(options, f'{modo}:{ruta}:{concurrencia}')
+                    self.stdout.write(
+                        f"{ruta:<18} {modo:<5} {concurrencia:>5} {r['req_s']:>8.1f} {r['p50']:>8.1f} "
+                        f"{r['p95']:>8.1f} {r['hilos']:>6} {r['rss_mb']:>8.1f} {r['errores']:>8}"
+                    )
+
+    def subproceso(self, options, medicion):
+        comando = [
+            sys.executable, sys.argv[0], 'bench_async', '--medir', medicion,
+            '--total', str(options['total']), '--latencia-ms', str(options['latencia_ms']),
+        ]
+        if options['email']:
+            comando += ['--email', options['email']]
+        resultado = subprocess.run(comando, capture_output=True, text=True)
+        if resultado.returncode != 0:
+            raise CommandError(f"Falló la medición {medicion}:\n{resultado.stderr}")
+        return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+    # --------------------------------------------------------
+    # Una medición (proceso hijo)
+    # --------------------------------------------------------
+    def medir(self, options):
+        modo, nombre, concurrencia = options['medir'].split(':')
+        concurrencia = int(concurrencia)
+
+        usuario = (
+            Usuario.objects.get(email=options['email']) if options['email']
+            else Usuario.objects.filter(is_active=True).order_by('id').first()
+        )
+        productos = list(Product.objects.order_by('id').values_list('id', flat=True)[:200])
+        if usuario is None or not productos:
+            raise CommandError("Se necesitan al menos un usuario y un producto (python manage.py seed_ventas).")
+        token = f'Bearer {RefreshToken.for_user(usuario).access_token}'
+
+        hoy = timezone.localdate()
+        periodo = f'fecha_inicio={(hoy - timedelta(days=89)).isoformat()}&fecha_fin={hoy.isoformat()}'
+        plantilla = RUTAS[nombre][0 if modo == 'wsgi' else 1]
+
+        def ruta():
+            return plantilla.format(id=random.choice(productos), periodo=periodo)
+
+        if options['latencia_ms']:
+            self.simular_latencia(options['latencia_ms'] / 1000)
+
+        muestreo = Muestreo()
+        muestreo.start()
+        if modo == 'wsgi':
+            resultados, duracion = self.carga_wsgi(ruta, token, concurrencia, options['total'])
+        else:
+            resultados, duracion = asyncio.run(self.carga_asgi(ruta, token, concurrencia, options['total']))
+        muestreo.detener()
+
+        latencias = sorted(r[0] * 1000 for r in resultados)
+        cuantiles = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99
+        self.stdout.write(json.dumps({
+            'req_s': round(len(resultados) / duracion, 1),
+            'p50': round(cuantiles[49], 1),
+            'p95': round(cuantiles[94], 1),
+            'hilos': muestreo.hilos_pico,
+            # ru_maxrss está en KB en Linux
+            'rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'errores': sum(1 for r in resultados if r[1] >= 400),
+        }))
+
+    def simular_latencia(self, segundos):
+        def lenta(execute, sql, params, many, context):
+            time.sleep(segundos)
+            return execute(sql, params, many, context)
+
+        def instalar(sender, connection, **kwargs):
+            # El wrapper de conexión se reutiliza al reconectar (CONN_MAX_AGE=0)
+            if lenta not in connection.execute_wrappers:
+                connection.execute_wrappers.append(lenta)
+
+        connection_created.connect(instalar, weak=False)
+
+    def carga_wsgi(self, ruta, token, concurrencia, total):
+        # Como un servidor WSGI con `concurrencia` hilos (gunicorn --threads)
+        handler = WSGIHandler()
+        fabrica = RequestFactory(HTTP_HOST='localhost', HTTP_AUTHORIZATION=token)
+
+        def peticion(_):
+            environ = fabrica.get(ruta()).environ
+            estado = []
+            inicio = time.perf_counter()
+            respuesta = handler(environ, lambda status, headers, exc_info=None: estado.append(status))
+            try:
+                for _ in respuesta:
+                    pass
+            finally:
+                respuesta.close()
+            return time.perf_counter() - inicio, int(estado[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+            list(executor.map(peticion, range(concurrencia)))  # calentamiento
+            inicio = time.perf_counter()
+            resultados = list(executor.map(peticion, range(total)))
+            return resultados, time.perf_counter() - inicio
+
+    async def carga_asgi(self, ruta, token, concurrencia, total):
+        # Como un worker de uvicorn: un event loop con `concurrencia` peticiones en curso
+        app = ASGIHandler()
+        cabeceras = [(b'host', b'localhost'), (b'authorization', token.encode())]
+
+        async def peticion():
+            partes = urlsplit(ruta())
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': partes.path,
+                'raw_path': partes.path.encode(), 'query_string': partes.query.encode(),
+                'headers': cabeceras, 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            enviado = False
+
+            async def receive():
+                nonlocal enviado
+                if not enviado:
+                    enviado = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # El cliente no se desconecta: Django cancela esta espera al terminar
+                await asyncio.Event().wait()
+
+            estado = []
+
+            async def send(mensaje):
+                if mensaje['type'] == 'http.response.start':
+                    estado.append(mensaje['status'])
+
+            inicio = time.perf_counter()
+            await app(scope, receive, send)
+            return time.perf_counter() - inicio, estado[0]
+
+        limite = asyncio.Semaphore(concurrencia)
+
+        async def acotada():
+            async with limite:
+                return await peticion()
+
+        await asyncio.gather(*(acotada() for _ in range(concurrencia)))  # calentamiento
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(acotada() for _ in range(total)))
+        return resultados, time.perf_counter() - inicio
+
+
+class Muestreo(threading.Thread):
+    """Máximo de hilos vivos durante la carga."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.hilos_pico = threading.active_count()
+        self.activo = threading.Event()
+        self.activo.set()
+
+    def run(self):
+        while self.activo.is_set():
+            self.hilos_pico = max(self.hilos_pico, threading.active_count())
+            time.sleep(0.005)
+
+    def detener(self):
+        self.activo.clear()
+        self.join()
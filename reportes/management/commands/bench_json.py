@@ -0,0 +1,87 @@
+import inspect
+import io
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from config.renderers import MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer, msgpack, orjson
+from reportes.reportes_niveles import ReportesBasicos, ReportesIntermedios, ReportesAvanzados
+
+CLASES = [ReportesBasicos, ReportesIntermedios, ReportesAvanzados]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el JSONRenderer de DRF con el renderer orjson (y MessagePack si está "
+        "instalado) sobre las respuestas reales de los reportes: tiempo de render/parse y tamaño"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reportes', help="Sólo los reportes cuyo nombre contenga alguno de estos textos (coma)")
+        parser.add_argument('--excluir', default='market_basket',
+                            help="Omitir los reportes que contengan estos textos (coma)")
+        parser.add_argument('--dias', type=int, default=365, help="Período pasado a los reportes con fechas")
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write(self.style.WARNING("orjson no está instalado: ORJSONRenderer usa el JSON de DRF"))
+
+        fin = timezone.localdate()
+        inicio = fin - timedelta(days=options['dias'] - 1)
+        formatos = [
+            ('drf', JSONRenderer(), JSONParser(), 'application/json'),
+            ('orjson', ORJSONRenderer(), ORJSONParser(), 'application/json'),
+            ('orjson dec=texto', ORJSONRenderer(), ORJSONParser(), 'application/json; decimal=texto'),
+        ]
+        if msgpack is not None:
+            formatos.append(('msgpack', MessagePackRenderer(), MessagePackParser(), 'application/msgpack'))
+
+        self.stdout.write(
+            f"{'reporte':<32} {'formato':<17} {'KB':>9} {'render ms':>10} {'parse ms':>9} {'vs drf':>7}"
+        )
+        for nombre, funcion in self.reportes(options):
+            parametros = inspect.signature(funcion).parameters
+            kwargs = {k: v for k, v in (('fecha_inicio', inicio), ('fecha_fin', fin)) if k in parametros}
+            try:
+                data = funcion(**kwargs)
+            except Exception as e:
+                self.stderr.write(f"{nombre}: {type(e).__name__}: {e}")
+                continue
+
+            base = None
+            for etiqueta, renderer, parser, media_type in formatos:
+                render, cuerpo = self.medir(lambda: renderer.render(data, media_type), options['repeticiones'])
+                parse, _ = self.medir(lambda: parser.parse(io.BytesIO(cuerpo)), options['repeticiones'])
+                base = base or render
+                self.stdout.write(
+                    f"{nombre:<32} {etiqueta:<17} {len(cuerpo) / 1024:>9.1f} {render * 1000:>10.2f} "
+                    f"{parse * 1000:>9.2f} {base / render:>6.1f}x"
+                )
+
+    def reportes(self, options):
+        textos = [t.strip() for t in options['reportes'].split(',')] if options['reportes'] else []
+        excluidos = [t.strip() for t in options['excluir'].split(',')] if options['excluir'] else []
+        for clase in CLASES:
+            for nombre, funcion in inspect.getmembers(clase, inspect.isfunction):
+                if nombre.startswith('_'):
+                    continue
+                if textos and not any(t in nombre for t in textos):
+                    continue
+                if any(t in nombre for t in excluidos):
+                    continue
+                yield nombre, funcion
+
+    def medir(self, funcion, repeticiones):
+        resultado = funcion()
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return statistics.median(tiempos), resultado
@@ -0,0 +1,251 @@
+import inspect
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+from django.utils import timezone
+
+from config.db_router import solo_primaria
+from reportes import pronostico, rfm
+from reportes.reportes_niveles import ReportesBasicos, ReportesIntermedios, ReportesAvanzados
+from ventas.generador import GeneradorVentas
+
+CLASES = [ReportesBasicos, ReportesIntermedios, ReportesAvanzados]
+# Nodos del plan que leen filas de una tabla
+NODOS_LECTURA = {'Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan', 'Tid Scan'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de todos los reportes sobre datos generados con semilla fija: "
+        "tiempo, consultas, filas leídas (EXPLAIN) y memoria pico, en JSON comparable"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escalas', default='1000,10000,100000',
+                            help="Ventas a generar por escala, separadas por coma")
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--fecha-fin', type=date.fromisoformat,
+                            help="Último día de los datos (por defecto hoy: hay reportes relativos a hoy)")
+        parser.add_argument('--dias', type=int, default=365, help="Días de historia generados")
+        parser.add_argument('--periodo', type=int, default=90,
+                            help="Días del período pasado a los reportes con fecha_inicio/fecha_fin")
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--reportes', help="Sólo los reportes cuyo nombre contenga alguno de estos textos (coma)")
+        parser.add_argument('--excluir', help="Omitir los reportes cuyo nombre contenga alguno de estos textos (coma)")
+        parser.add_argument('--base-actual', action='store_true',
+                            help="No generar datos: medir contra la base configurada tal como está")
+        parser.add_argument('--keepdb', action='store_true', help="Reutilizar la base de pruebas")
+        parser.add_argument('--salida', help="Archivo JSON de resultados (por defecto, stdout)")
+        parser.add_argument('--comparar', help="JSON de una corrida anterior para detectar regresiones")
+        parser.add_argument('--tolerancia', type=float, default=0.25,
+                            help="Aumento relativo de tiempo/memoria/filas permitido (0.25 = 25%%)")
+        parser.add_argument('--umbral-ms', type=float, default=5.0,
+                            help="Diferencias de tiempo menores a esto no cuentan como regresión")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.fecha_fin = options['fecha_fin'] or timezone.localdate()
+        reportes = self.descubrir_reportes(options['reportes'], options['excluir'])
+
+        resultado = {
+            'commit': self.commit_actual(),
+            'motor': connection.vendor,
+            'fecha': timezone.now().isoformat(),
+            'semilla': options['semilla'],
+            'fecha_fin': self.fecha_fin.isoformat(),
+            'escalas': {},
+        }
+
+        if options['base_actual']:
+            resultado['escalas']['actual'] = {'reportes': self.medir_todos(reportes)}
+        else:
+            # Base de pruebas aparte: nunca se generan datos en la base real
+            configuracion = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+            try:
+                for escala in [int(e) for e in options['escalas'].split(',')]:
+                    resultado['escalas'][str(escala)] = self.medir_escala(escala, reportes)
+            finally:
+                teardown_databases(configuracion, verbosity=0, keepdb=options['keepdb'])
+
+        salida = json.dumps(resultado, indent=2, ensure_ascii=False, default=str)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(salida)
+            self.stdout.write(self.style.SUCCESS(f"Resultados en {options['salida']}"))
+        else:
+            self.stdout.write(salida)
+
+        if options['comparar']:
+            self.comparar(resultado, options['comparar'])
+
+    # --------------------------------------------------------
+    # Datos y reportes
+    # --------------------------------------------------------
+    def descubrir_reportes(self, filtro, excluir):
+        textos = [t.strip() for t in filtro.split(',')] if filtro else []
+        excluidos = [t.strip() for t in excluir.split(',')] if excluir else []
+        reportes = []
+        for clase in CLASES:
+            for nombre, funcion in inspect.getmembers(clase, inspect.isfunction):
+                if nombre.startswith('_'):
+                    continue
+                etiqueta = f'{clase.__name__}.{nombre}'
+                if textos and not any(t in etiqueta for t in textos):
+                    continue
+                if any(t in etiqueta for t in excluidos):
+                    continue
+                reportes.append((etiqueta, funcion))
+        return reportes
+
+    def argumentos(self, funcion):
+        """fecha_inicio/fecha_fin con el período configurado; el resto, sus valores por defecto."""
+        kwargs = {}
+        for parametro in inspect.signature(funcion).parameters.values():
+            if parametro.name == 'fecha_inicio':
+                kwargs['fecha_inicio'] = self.fecha_fin - timedelta(days=self.options['periodo'] - 1)
+            elif parametro.name == 'fecha_fin':
+                kwargs['fecha_fin'] = self.fecha_fin
+            elif parametro.default is inspect.Parameter.empty:
+                raise ValueError(f"argumento sin valor por defecto: {parametro.name}")
+        return kwargs
+
+    def medir_escala(self, escala, reportes):
+        call_command('flush', interactive=False, verbosity=0)
+        self.stderr.write(f"Generando {escala} ventas...")
+        filas = GeneradorVentas(
+            ventas=escala,
+            dias=self.options['dias'],
+            fecha_fin=self.fecha_fin,
+            semilla=self.options['semilla'],
+        ).generar()
+        # Tablas precalculadas que leen algunos reportes
+        rfm.refrescar(completo=True)
+        pronostico.pronosticar()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("ANALYZE")
+        return {'datos': filas, 'reportes': self.medir_todos(reportes)}
+
+    def medir_todos(self, reportes):
+        resultados = {}
+        for etiqueta, funcion in reportes:
+            self.stderr.write(f"  {etiqueta}")
+            try:
+                # Las consultas se capturan (y se explican) en 'default': sin réplica
+                with solo_primaria():
+                    resultados[etiqueta] = self.medir(funcion, self.argumentos(funcion))
+            except Exception as e:
+                resultados[etiqueta] = {'error': f'{type(e).__name__}: {e}'}
+        return resultados
+
+    def medir(self, funcion, kwargs):
+        # 1) Tiempo: la primera corrida calienta cachés y no se cuenta
+        tiempos = []
+        for i in range(self.options['repeticiones'] + 1):
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                funcion(**kwargs)
+                duracion = time.perf_counter() - inicio
+            if i:
+                tiempos.append(duracion * 1000)
+
+        # 2) Memoria pico de Python (tracemalloc hace más lento el código: corrida aparte)
+        tracemalloc.start()
+        try:
+            funcion(**kwargs)
+            memoria_pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'tiempo_ms': {
+                'min': round(min(tiempos), 2),
+                'mediana': round(statistics.median(tiempos), 2),
+            },
+            'consultas': len(consultas.captured_queries),
+            'filas_leidas': self.filas_leidas(consultas.captured_queries),
+            'memoria_pico_kb': round(memoria_pico / 1024, 1),
+        }
+
+    def filas_leidas(self, consultas):
+        """Suma de filas leídas por los nodos de scan (EXPLAIN ANALYZE). Sólo PostgreSQL."""
+        if connection.vendor != 'postgresql':
+            return None
+
+        total = 0
+        with connection.cursor() as cursor:
+            for consulta in consultas:
+                sql = consulta['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                total += self._filas_plan(plan[0]['Plan'])
+        return total
+
+    def _filas_plan(self, nodo):
+        filas = 0
+        if nodo.get('Node Type') in NODOS_LECTURA:
+            filas_nodo = nodo.get('Actual Rows', 0) + nodo.get('Rows Removed by Filter', 0)
+            filas += filas_nodo * nodo.get('Actual Loops', 1)
+        for hijo in nodo.get('Plans', []):
+            filas += self._filas_plan(hijo)
+        return filas
+
+    # --------------------------------------------------------
+    # Comparación contra una corrida anterior
+    # --------------------------------------------------------
+    def comparar(self, actual, ruta_base):
+        with open(ruta_base, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+
+        tolerancia = self.options['tolerancia']
+        regresiones = []
+        for escala, datos in actual['escalas'].items():
+            anteriores = base.get('escalas', {}).get(escala, {}).get('reportes', {})
+            for reporte, medicion in datos['reportes'].items():
+                anterior = anteriores.get(reporte)
+                if not anterior or 'error' in anterior:
+                    continue
+                if 'error' in medicion:
+                    regresiones.append(f"[{escala}] {reporte}: ahora falla ({medicion['error']})")
+                    continue
+
+                # Las consultas son deterministas: cualquier aumento es una regresión (p. ej. N+1)
+                if medicion['consultas'] > anterior['consultas']:
+                    regresiones.append(
+                        f"[{escala}] {reporte}: consultas {anterior['consultas']} -> {medicion['consultas']}"
+                    )
+
+                antes, ahora = anterior['tiempo_ms']['mediana'], medicion['tiempo_ms']['mediana']
+                if ahora > antes * (1 + tolerancia) and ahora - antes > self.options['umbral_ms']:
+                    regresiones.append(f"[{escala}] {reporte}: tiempo {antes} ms -> {ahora} ms")
+
+                for campo in ('memoria_pico_kb', 'filas_leidas'):
+                    antes, ahora = anterior.get(campo), medicion.get(campo)
+                    if antes is not None and ahora is not None and ahora > antes * (1 + tolerancia):
+                        regresiones.append(f"[{escala}] {reporte}: {campo} {antes} -> {ahora}")
+
+        if regresiones:
+            for linea in regresiones:
+                self.stderr.write(self.style.ERROR(linea))
+            raise CommandError(f"{len(regresiones)} regresiones respecto de {ruta_base}")
+        self.stderr.write(self.style.SUCCESS(f"Sin regresiones respecto de {ruta_base}"))
+
+    def commit_actual(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from reportes import rfm
+
+
+class Command(BaseCommand):
+    help = (
+        "Actualiza la segmentación RFM de los clientes (cron: cada hora) recalculando sólo "
+        "a quienes compraron desde la última corrida; --completo la rehace entera (cada noche). "
+        "Con --sinteticos N sólo mide el cálculo de puntajes sobre N clientes generados"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true',
+                            help="Agregar todas las ventas y borrar clientes sin ventas")
+        parser.add_argument('--sinteticos', type=int, help="Benchmark: clientes generados")
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['sinteticos']:
+            return self.benchmark(options['sinteticos'], options['semilla'])
+
+        resultado = rfm.refrescar(completo=options['completo'])
+        tiempos = ', '.join(f"{etapa} {segundos:.3f}s" for etapa, segundos in resultado['segundos'].items())
+        self.stdout.write(
+            f"{resultado['clientes']} clientes, {resultado['agregados']} agregados de nuevo, "
+            f"{resultado['escritos']} filas escritas. {tiempos}"
+        )
+
+    def benchmark(self, clientes, semilla):
+        generador = np.random.default_rng(semilla)
+        ultima = 739000 + generador.integers(0, 730, size=clientes)
+        frecuencia = generador.geometric(0.3, size=clientes)
+        monto = frecuencia * generador.gamma(2.0, 50.0, size=clientes)
+
+        inicio = time.perf_counter()
+        _, _, _, segmento = rfm.calcular(ultima, frecuencia, monto)
+        segundos = time.perf_counter() - inicio
+        conteo = np.bincount(segmento, minlength=len(rfm.SEGMENTOS))
+        self.stdout.write(f"{clientes} clientes en {segundos:.3f}s")
+        for nombre, cantidad in zip(rfm.SEGMENTOS, conteo.tolist()):
+            self.stdout.write(f"  {nombre}: {cantidad}")
@@ -0,0 +1,193 @@
+import math
+import time
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from productos.models import Product, PronosticoDemanda
+from ventas.models import DetailNote
+
+
+# Pronóstico de demanda y puntos de reorden para todo el catálogo.
+#
+# Las ventas diarias de cada producto se leen con una sola consulta agrupada
+# y se vuelcan en una matriz densa (días × productos, float32: 100k productos
+# × 2 años ocupan ~290 MB). Cada modelo se ajusta a todos los productos a la
+# vez: las operaciones son sobre filas completas de la matriz (un día de todos
+# los productos), nunca un bucle por producto. El resultado queda en
+# PronosticoDemanda y el reporte de reposición sólo lo lee.
+
+MODELOS = ('ses', 'media_movil')
+# Grilla de alfas del suavizado exponencial; a cada producto le toca la de menor error
+ALFAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+# Días iniciales promediados para el nivel de arranque
+DIAS_INICIALES = 7
+TAMANO_BLOQUE = 100_000
+# Filas por respuesta del reporte de reposición
+MAX_REPOSICION = 1000
+
+
+def cargar_matriz(desde, hasta, producto_ids):
+    """
+    Unidades vendidas por día y producto entre `desde` y `hasta` como matriz
+    (días × productos); la columna j es producto_ids[j] (ordenados). Una consulta.
+    """
+    dias = (hasta - desde).days + 1
+    matriz = np.zeros((dias, len(producto_ids)), dtype=np.float32)
+    filas = DetailNote.objects.filter(fecha__range=(desde, hasta)).values('producto_id', 'fecha').annotate(
+        unidades=Sum('cantidad')
+    ).order_by().values_list('producto_id', 'fecha', 'unidades')
+
+    # fecha -> fila; convertir con numpy cada date de la consulta es 20 veces más lento
+    indices = {desde + timedelta(days=i): i for i in range(dias)}
+    bloque = []
+    for fila in filas.iterator(chunk_size=TAMANO_BLOQUE):
+        bloque.append(fila)
+        if len(bloque) == TAMANO_BLOQUE:
+            _volcar(matriz, bloque, indices, producto_ids)
+            bloque = []
+    if bloque:
+        _volcar(matriz, bloque, indices, producto_ids)
+    return matriz
+
+
+def _volcar(matriz, bloque, indices, producto_ids):
+    pks, fechas, unidades = zip(*bloque)
+    pks = np.array(pks, dtype=np.int64)
+    columnas = np.searchsorted(producto_ids, pks)
+    # Productos creados después de leer el catálogo: quedan fuera
+    conocidos = columnas < len(producto_ids)
+    conocidos[conocidos] = producto_ids[columnas[conocidos]] == pks[conocidos]
+    dias = np.fromiter(map(indices.__getitem__, fechas), dtype=np.int64, count=len(fechas))
+    matriz[dias[conocidos], columnas[conocidos]] = np.array(unidades, dtype=np.float32)[conocidos]
+
+
+def suavizado_exponencial(matriz, alfas=ALFAS):
+    """
+    Suavizado exponencial simple para cada columna. Prueba cada alfa de la
+    grilla y se queda, por producto, con el de menor error cuadrático a un
+    paso. Devuelve (nivel final = demanda diaria, desviación del error, alfa).
+    """
+    dias, productos = matriz.shape
+    inicio = min(DIAS_INICIALES, dias)
+    mejor_sse = np.full(productos, np.inf)
+    demanda = np.zeros(productos)
+    alfa_elegido = np.zeros(productos)
+
+    for alfa in alfas:
+        nivel = matriz[:inicio].mean(axis=0, dtype=np.float64)
+        sse = np.zeros(productos)
+        error = np.empty(productos)
+        for t in range(dias):
+            np.subtract(matriz[t], nivel, out=error)
+            nivel += alfa * error
+            error *= error
+            sse += error
+        mejor = sse < mejor_sse
+        mejor_sse[mejor] = sse[mejor]
+        demanda[mejor] = nivel[mejor]
+        alfa_elegido[mejor] = alfa
+
+    return demanda, np.sqrt(mejor_sse / dias), alfa_elegido
+
+
+def media_movil(matriz, ventana=None):
+    """Promedio y desviación de la demanda de los últimos `ventana` días de cada columna."""
+    ventana = matriz[-(ventana or settings.PRONOSTICO_VENTANA_MEDIA):].astype(np.float64)
+    desviacion = ventana.std(axis=0, ddof=1) if len(ventana) > 1 else np.zeros(matriz.shape[1])
+    return ventana.mean(axis=0), desviacion
+
+
+def puntos_de_reorden(demanda, desviacion, disponible, dias_reposicion=None, dias_pedido=None, nivel_servicio=None):
+    """
+    Stock de seguridad = z · σ · √L, punto de reorden = demanda · L + seguridad
+    (L = días de reposición). Al llegar al punto de reorden se sugiere pedir
+    hasta cubrir además los días entre pedidos.
+    """
+    dias_reposicion = dias_reposicion or settings.PRONOSTICO_DIAS_REPOSICION
+    dias_pedido = dias_pedido or settings.PRONOSTICO_DIAS_PEDIDO
+    z = NormalDist().inv_cdf(nivel_servicio or settings.PRONOSTICO_NIVEL_SERVICIO)
+
+    seguridad = np.ceil(z * desviacion * math.sqrt(dias_reposicion))
+    punto_reorden = np.ceil(demanda * dias_reposicion) + seguridad
+    objetivo = punto_reorden + demanda * dias_pedido
+    sugerida = np.where(disponible <= punto_reorden, np.ceil(np.maximum(objetivo - disponible, 0)), 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cobertura = np.where(demanda > 0, np.maximum(disponible, 0) / demanda, np.nan)
+    return seguridad.astype(np.int64), punto_reorden.astype(np.int64), sugerida.astype(np.int64), cobertura
+
+
+def ajustar(matriz, modelo):
+    """(demanda diaria, desviación) de cada columna con el modelo indicado."""
+    if modelo == 'ses':
+        demanda, desviacion, _ = suavizado_exponencial(matriz)
+    elif modelo == 'media_movil':
+        demanda, desviacion = media_movil(matriz)
+    else:
+        raise ValueError(f"Modelo desconocido: '{modelo}' (use {', '.join(MODELOS)})")
+    # Demanda residual de productos que dejaron de venderse
+    demanda[demanda < 1e-3] = 0
+    return demanda, desviacion
+
+
+def pronosticar(modelo=None, dias_historia=None, hasta=None):
+    """
+    Recalcula PronosticoDemanda para todos los productos con las ventas de
+    los `dias_historia` días que terminan en `hasta` (ayer por defecto: el día
+    en curso está incompleto). Devuelve cuántos productos y el tiempo de cada etapa.
+    """
+    modelo = modelo or settings.PRONOSTICO_MODELO
+    dias_historia = dias_historia or settings.PRONOSTICO_DIAS_HISTORIA
+    hasta = hasta or timezone.localdate() - timedelta(days=1)
+    desde = hasta - timedelta(days=dias_historia - 1)
+    tiempos = {}
+
+    inicio = time.perf_counter()
+    catalogo = list(Product.objects.order_by('pk').values_list('pk', 'stock', 'reservado'))
+    if not catalogo:
+        return {'productos': 0, 'desde': desde, 'hasta': hasta, 'a_reponer': 0, 'segundos': tiempos}
+    pks, stock, reservado = (np.array(columna, dtype=np.int64) for columna in zip(*catalogo))
+    matriz = cargar_matriz(desde, hasta, pks)
+    tiempos['carga'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    demanda, desviacion = ajustar(matriz, modelo)
+    disponible = stock - reservado
+    seguridad, punto_reorden, sugerida, cobertura = puntos_de_reorden(demanda, desviacion, disponible)
+    tiempos['ajuste'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    calculado = timezone.now()
+    PronosticoDemanda.objects.bulk_create(
+        [
+            PronosticoDemanda(
+                producto_id=pk, modelo=modelo, demanda_diaria=d, desviacion=s, stock_seguridad=ss,
+                punto_reorden=pr, disponible=disp, dias_cobertura=None if math.isnan(c) else c,
+                cantidad_sugerida=q, calculado=calculado,
+            )
+            for pk, d, s, ss, pr, disp, c, q in zip(
+                pks.tolist(), demanda.round(4).tolist(), desviacion.round(4).tolist(), seguridad.tolist(),
+                punto_reorden.tolist(), disponible.tolist(), cobertura.round(2).tolist(), sugerida.tolist(),
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=['producto'],
+        update_fields=[
+            'modelo', 'demanda_diaria', 'desviacion', 'stock_seguridad', 'punto_reorden',
+            'disponible', 'dias_cobertura', 'cantidad_sugerida', 'calculado',
+        ],
+        batch_size=2000,
+    )
+    tiempos['guardado'] = time.perf_counter() - inicio
+
+    return {
+        'productos': len(pks),
+        'desde': desde,
+        'hasta': hasta,
+        'a_reponer': int((sugerida > 0).sum()),
+        'segundos': {etapa: round(segundos, 3) for etapa, segundos in tiempos.items()},
+    }
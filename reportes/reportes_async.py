@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.db.models import Sum, Count, Avg, Max, Min, Q
+from django.db.models.functions import TruncDate, Coalesce
+from django.utils import timezone
+
+from ventas.models import SalesNote, DetailNote
+from creditos.models import CreditSale, CreditInstallment
+from productos.models import Product
+from config.db_router import lecturas_en_reportes
+
+
+# Versiones async (ORM async) de los reportes básicos: mismas consultas y
+# mismo resultado que ReportesBasicos, para las vistas de reportes/views_async.py.
+# Los reportes más pesados no tienen versión async: esas vistas ejecutan el
+# reporte sync en el pool acotado de config.vistas_async.en_hilo.
+
+
+@lecturas_en_reportes
+class ReportesBasicosAsync:
+    """ReportesBasicos con el ORM async"""
+
+    @staticmethod
+    async def ventas_por_periodo(fecha_inicio, fecha_fin):
+        """Resumen de ventas en un período"""
+        ventas = SalesNote.objects.filter(fecha__range=[fecha_inicio, fecha_fin])
+        resumen = await ventas.aaggregate(
+            total_ventas=Count('id'),
+            ingresos_totales=Sum('monto'),
+            ticket_promedio=Avg('monto'),
+            venta_maxima=Max('monto'),
+            venta_minima=Min('monto')
+        )
+
+        por_tipo_pago = ventas.values('tipo_pago').annotate(
+            cantidad=Count('id'),
+            monto_total=Sum('monto')
+        ).order_by('-monto_total')
+
+        return {
+            'resumen': resumen,
+            'por_tipo_pago': [fila async for fila in por_tipo_pago.aiterator()],
+            'periodo': {
+                'inicio': fecha_inicio,
+                'fin': fecha_fin
+            }
+        }
+
+    @staticmethod
+    async def top_productos(fecha_inicio, fecha_fin, limite=10):
+        """Productos más vendidos"""
+        productos = DetailNote.objects.filter(
+            nota__fecha__range=[fecha_inicio, fecha_fin]
+        ).values(
+            'producto__id',
+            'producto__nombre',
+            'producto__categoria__descripcion'
+        ).annotate(
+            unidades_vendidas=Sum('cantidad'),
+            ingresos_generados=Sum('subtotal'),
+            num_ventas=Count('nota', distinct=True)
+        ).order_by('-unidades_vendidas')[:limite]
+
+        return [fila async for fila in productos.aiterator()]
+
+    @staticmethod
+    async def productos_bajo_stock(minimo=10):
+        """Productos que necesitan reabastecimiento"""
+        productos = Product.objects.filter(stock__lt=minimo).annotate(
+            vendidos_30_dias=Coalesce(
+                Sum('detailnote__cantidad',
+                    filter=Q(detailnote__fecha__gte=timezone.now().date() - timedelta(days=30))),
+                0
+            )
+        ).values(
+            'id', 'nombre', 'stock', 'vendidos_30_dias',
+            'categoria__descripcion', 'precio'
+        ).order_by('stock')
+
+        return [fila async for fila in productos.aiterator()]
+
+    @staticmethod
+    async def ventas_por_dia(fecha_inicio, fecha_fin):
+        """Ventas agrupadas por día"""
+        ventas_diarias = SalesNote.objects.filter(
+            fecha__range=[fecha_inicio, fecha_fin]
+        ).annotate(
+            dia=TruncDate('fecha')
+        ).values('dia').annotate(
+            num_ventas=Count('id'),
+            ingresos=Sum('monto')
+        ).order_by('dia')
+
+        return [fila async for fila in ventas_diarias.aiterator()]
+
+    @staticmethod
+    async def resumen_creditos():
+        """Estado actual de créditos (una consulta por tabla en lugar de cinco)"""
+        creditos = await CreditSale.objects.aaggregate(
+            total_creditos_activos=Count('id', filter=Q(estado='activo')),
+            monto_por_cobrar=Sum('saldo_pendiente', filter=Q(estado='activo')),
+            creditos_atrasados=Count('id', filter=Q(estado='atrasado')),
+            monto_atrasado=Sum('saldo_pendiente', filter=Q(estado='atrasado')),
+        )
+        cuotas_vencidas_hoy = await CreditInstallment.objects.filter(
+            fecha_vencimiento__lte=timezone.now().date(),
+            pagado=False
+        ).acount()
+
+        return {
+            'total_creditos_activos': creditos['total_creditos_activos'],
+            'monto_por_cobrar': creditos['monto_por_cobrar'] or 0,
+            'creditos_atrasados': creditos['creditos_atrasados'],
+            'monto_atrasado': creditos['monto_atrasado'] or 0,
+            'cuotas_vencidas_hoy': cuotas_vencidas_hoy
+        }
@@ -1,25 +1,30 @@
 from django.db.models import (
-    Sum, Count, Avg, Max, Min, F, Q, ExpressionWrapper,
+    Sum, Count, Avg, Max, Min, F, Q, ExpressionWrapper, OuterRef, Subquery,
     DecimalField, FloatField, Case, When, Value, IntegerField
 )
-from django.db import models
 from django.db.models.functions import (
-    TruncDate, TruncMonth, TruncWeek, Coalesce, ExtractMonth, ExtractYear
+    TruncDate, TruncMonth, TruncWeek, Coalesce, ExtractMonth, ExtractYear,
+    ExtractHour, ExtractIsoWeekDay
 )
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta, datetime
 from decimal import Decimal
 
-from ventas.models import SalesNote, DetailNote, CashPayment
+from ventas.models import SalesNote, DetailNote, CashPayment, VentasHora, SegmentoRFM
 from creditos.models import CreditSale, CreditInstallment, CreditPayment, CreditConfig
-from productos.models import Product, Category, Provider
+from productos.inventario import inventario_promedio
+from productos.models import Product, Category, Provider, ProviderProduct, PronosticoDemanda
 from usuarios.models import Usuario
+from config.db_router import lecturas_en_reportes
+from reportes import pronostico, rfm, series
 
 
 
 # reportes nivel 1
 
 
+@lecturas_en_reportes
 class ReportesBasicos:
     """Reportes simples y rápidos para uso diario"""
     
@@ -86,6 +91,30 @@ class ReportesBasicos:
         
         return list(productos)
     
+    @staticmethod
+    def reposicion_sugerida(limite=100, todos=False):
+        """
+        Qué pedir según el último `manage.py pronosticar_demanda`: productos que
+        llegaron a su punto de reorden, los de menor cobertura primero. Con
+        `todos` se listan también los que no hace falta reponer. `limite` va de
+        1 a pronostico.MAX_REPOSICION.
+        """
+        limite = int(limite)
+        if limite < 1:
+            raise ValueError(f'limite debe estar entre 1 y {pronostico.MAX_REPOSICION}')
+        limite = min(limite, pronostico.MAX_REPOSICION)
+
+        pronosticos = PronosticoDemanda.objects.annotate(
+            disponible_actual=F('producto__stock') - F('producto__reservado')
+        ).values(
+            'producto_id', 'producto__nombre', 'producto__categoria__descripcion', 'modelo',
+            'demanda_diaria', 'desviacion', 'stock_seguridad', 'punto_reorden', 'disponible',
+            'disponible_actual', 'dias_cobertura', 'cantidad_sugerida', 'calculado'
+        ).order_by(F('dias_cobertura').asc(nulls_last=True), 'producto_id')
+        if not todos:
+            pronosticos = pronosticos.filter(cantidad_sugerida__gt=0)
+        return list(pronosticos[:limite])
+
     @staticmethod
     def ventas_por_dia(fecha_inicio, fecha_fin):
         """Ventas agrupadas por día"""
@@ -121,6 +150,7 @@ class ReportesBasicos:
 
 # reportes nivele 2
 
+@lecturas_en_reportes
 class ReportesIntermedios:
     """Reportes con más análisis y cruces de datos"""
     
@@ -257,7 +287,20 @@ class ReportesIntermedios:
     
     @staticmethod
     def rotacion_inventario(fecha_inicio, fecha_fin):
-        """Análisis de rotación de productos"""
+        """
+        Análisis de rotación de productos.
+
+        inventario_promedio es el promedio de los cierres diarios del período
+        (snapshots + diario de inventario) y rotacion = unidades vendidas /
+        inventario promedio; dias_inventario sigue midiendo el stock actual.
+        """
+        if isinstance(fecha_inicio, str):
+            fecha_inicio = parse_date(fecha_inicio)
+        if isinstance(fecha_fin, str):
+            fecha_fin = parse_date(fecha_fin)
+        if fecha_inicio is None or fecha_fin is None:
+            raise ValueError('Fechas inválidas (use AAAA-MM-DD)')
+
         productos = Product.objects.annotate(
             unidades_vendidas=Coalesce(
                 Sum('detailnote__cantidad',
@@ -288,96 +331,199 @@ class ReportesIntermedios:
             'ingresos_generados', 'rotacion_diaria', 'dias_inventario',
             'categoria__descripcion', 'precio'
         ).order_by('dias_inventario')
-        
-        return list(productos)
+
+        promedios = inventario_promedio(fecha_inicio, fecha_fin)
+        productos = list(productos)
+        for producto in productos:
+            promedio = promedios.get(producto['id'], producto['stock'])
+            producto['inventario_promedio'] = round(promedio, 2)
+            producto['rotacion'] = round(producto['unidades_vendidas'] / promedio, 4) if promedio > 0 else None
+        return productos
+    
+    @staticmethod
+    def mapa_calor_ventas(fecha_inicio, fecha_fin):
+        """
+        Ventas por día de la semana y hora del día (TIME_ZONE), leídas del
+        resumen por hora: un año son a lo sumo 8.760 filas. Los promedios
+        dividen por las veces que cae cada día de la semana en el período.
+        """
+        if isinstance(fecha_inicio, str):
+            fecha_inicio = parse_date(fecha_inicio)
+        if isinstance(fecha_fin, str):
+            fecha_fin = parse_date(fecha_fin)
+        if fecha_inicio is None or fecha_fin is None:
+            raise ValueError('Fechas inválidas (use AAAA-MM-DD)')
+
+        zona = timezone.get_current_timezone()
+        desde = timezone.make_aware(datetime.combine(fecha_inicio, datetime.min.time()))
+        hasta = timezone.make_aware(datetime.combine(fecha_fin + timedelta(days=1), datetime.min.time()))
+        celdas = VentasHora.objects.filter(hora__gte=desde, hora__lt=hasta).annotate(
+            dia_semana=ExtractIsoWeekDay('hora', tzinfo=zona),
+            hora_dia=ExtractHour('hora', tzinfo=zona)
+        ).values('dia_semana', 'hora_dia').annotate(
+            num_ventas=Sum('num_ventas'),
+            ingresos=Sum('ingresos')
+        ).order_by()
+
+        ventas = [[0] * 24 for _ in range(7)]
+        ingresos = [[Decimal('0')] * 24 for _ in range(7)]
+        for celda in celdas:
+            ventas[celda['dia_semana'] - 1][celda['hora_dia']] = celda['num_ventas']
+            ingresos[celda['dia_semana'] - 1][celda['hora_dia']] = celda['ingresos']
+
+        veces = [0] * 7
+        for i in range((fecha_fin - fecha_inicio).days + 1):
+            veces[(fecha_inicio + timedelta(days=i)).weekday()] += 1
+        promedio = [
+            [round(n / veces[dia], 2) if veces[dia] else 0 for n in ventas[dia]]
+            for dia in range(7)
+        ]
+        pico = max(((dia, h) for dia in range(7) for h in range(24)), key=lambda c: promedio[c[0]][c[1]])
+
+        return {
+            'periodo': {'inicio': fecha_inicio, 'fin': fecha_fin},
+            'dias': ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'],
+            'ventas': ventas,
+            'ingresos': ingresos,
+            'promedio_ventas': promedio,
+            'pico': {'dia': pico[0] + 1, 'hora': pico[1], 'promedio_ventas': promedio[pico[0]][pico[1]]},
+        }
+
+    @staticmethod
+    def margen_productos(fecha_inicio, fecha_fin, limite=None):
+        """
+        Margen bruto por producto: ventas del período contra el costo de compra.
+
+        El costo unitario es el promedio de precio_compra entre los proveedores
+        del producto. Todo sale de una consulta agrupada sobre detail_note (una
+        fila por producto vendido, con nombre, categoría y costo en subconsulta):
+        el costo depende de lo que se vendió, no del tamaño del catálogo.
+        """
+        costo = ProviderProduct.objects.filter(
+            producto=OuterRef('producto_id'), precio_compra__isnull=False
+        ).values('producto').annotate(costo=Avg('precio_compra')).values('costo')
+
+        ventas = DetailNote.objects.filter(
+            fecha__range=[fecha_inicio, fecha_fin]
+        ).values(
+            'producto__id', 'producto__nombre', 'producto__categoria__descripcion'
+        ).annotate(
+            unidades_vendidas=Sum('cantidad'),
+            ingresos=Sum('subtotal'),
+            costo_unitario=Subquery(costo, output_field=DecimalField())
+        ).order_by()
+
+        centavo = Decimal('0.01')
+        filas = []
+        ingresos_total = Decimal('0')
+        ingresos_con_costo = Decimal('0')
+        costo_total = Decimal('0')
+        for fila in ventas:
+            ingresos = fila['ingresos'] or Decimal('0')
+            costo_unitario = fila.pop('costo_unitario')
+            fila.update(ingresos=ingresos, costo_unitario=None, costo_total=None, margen=None, margen_porcentaje=None)
+            ingresos_total += ingresos
+            if costo_unitario is not None:
+                costo = (costo_unitario * fila['unidades_vendidas']).quantize(centavo)
+                fila['costo_unitario'] = costo_unitario.quantize(centavo)
+                fila['costo_total'] = costo
+                fila['margen'] = ingresos - costo
+                if ingresos:
+                    fila['margen_porcentaje'] = round(float((ingresos - costo) / ingresos * 100), 2)
+                ingresos_con_costo += ingresos
+                costo_total += costo
+            filas.append(fila)
+
+        # Primero los que más margen dejan; los que no tienen costo, al final
+        filas.sort(key=lambda f: (f['margen'] is None, -(f['margen'] or 0)))
+        sin_costo = sum(1 for f in filas if f['costo_unitario'] is None)
+
+        productos = len(filas)
+        if limite:
+            filas = filas[:limite]
+
+        margen = ingresos_con_costo - costo_total
+        return {
+            'periodo': {'inicio': fecha_inicio, 'fin': fecha_fin},
+            'resumen': {
+                'productos': productos,
+                'productos_sin_costo': sin_costo,
+                'ingresos': ingresos_total,
+                'costo_total': costo_total,
+                'margen': margen,
+                'margen_porcentaje': round(float(margen / ingresos_con_costo * 100), 2) if ingresos_con_costo else None
+            },
+            'productos': filas
+        }
 
 
 
 # reportes nivel 3
 
+@lecturas_en_reportes
 class ReportesAvanzados:
     """Reportes complejos con análisis profundos"""
     
     @staticmethod
-    def analisis_rfm_clientes():
-        """Segmentación RFM (Recency, Frequency, Monetary)"""
-        from django.db.models import Window
-        from django.db.models.functions import Ntile
-        
-        # Calcular métricas RFM
-        hoy = timezone.now().date()
-        clientes = Usuario.objects.annotate(
-            ultima_compra_fecha=Max('ventas_como_cliente__fecha'),
-            recency=ExpressionWrapper(
-                Value(hoy) - F('ultima_compra_fecha'),
-                output_field=IntegerField()
-            ),
-            frequency=Count('ventas_como_cliente'),
-            monetary=Sum('ventas_como_cliente__monto')
-        ).filter(frequency__gt=0)
-        
-        # Calcular scores (dividir en quintiles)
-        clientes = clientes.annotate(
-            r_score=Window(
-                expression=Ntile(5),
-                order_by=F('recency').asc()
-            ),
-            f_score=Window(
-                expression=Ntile(5),
-                order_by=F('frequency').desc()
-            ),
-            m_score=Window(
-                expression=Ntile(5),
-                order_by=F('monetary').desc()
-            )
-        )
-        
-        # Asignar segmentos
-        clientes_rfm = clientes.annotate(
-            rfm_total=F('r_score') + F('f_score') + F('m_score'),
-            segmento=Case(
-                When(Q(r_score__gte=4) & Q(f_score__gte=4) & Q(m_score__gte=4), 
-                     then=Value('Champions')),
-                When(Q(r_score__gte=3) & Q(f_score__gte=3) & Q(m_score__gte=3), 
-                     then=Value('Leales')),
-                When(Q(r_score__gte=4) & Q(f_score__lte=2), 
-                     then=Value('Nuevos Prometedores')),
-                When(Q(r_score__lte=2) & Q(f_score__gte=4), 
-                     then=Value('En Riesgo')),
-                When(Q(r_score__lte=2) & Q(f_score__lte=2), 
-                     then=Value('Perdidos')),
-                default=Value('Normales'),
-                output_field=models.CharField()
-            )
-        ).values(
-            'id', 'email', 'first_name', 'last_name',
-            'recency', 'frequency', 'monetary',
-            'r_score', 'f_score', 'm_score', 'rfm_total', 'segmento'
-        ).order_by('-rfm_total')
-        
-        # Resumen por segmento
-        resumen_segmentos = {}
-        for cliente in clientes_rfm:
-            seg = cliente['segmento']
-            if seg not in resumen_segmentos:
-                resumen_segmentos[seg] = {
-                    'cantidad': 0,
-                    'valor_total': 0,
-                    'frecuencia_promedio': 0
-                }
-            resumen_segmentos[seg]['cantidad'] += 1
-            resumen_segmentos[seg]['valor_total'] += float(cliente['monetary'] or 0)
-            resumen_segmentos[seg]['frecuencia_promedio'] += cliente['frequency']
-        
-        for seg in resumen_segmentos:
-            if resumen_segmentos[seg]['cantidad'] > 0:
-                resumen_segmentos[seg]['frecuencia_promedio'] /= resumen_segmentos[seg]['cantidad']
-        
+    def analisis_rfm_clientes(segmento=None, pagina=1, tamano_pagina=50, todos=False):
+        """
+        Segmentación RFM (Recency, Frequency, Monetary) del último
+        `manage.py calcular_rfm` (reportes/rfm.py): una página de clientes,
+        opcionalmente de un solo segmento, y el resumen de todos los
+        segmentos. Puntajes de 1 (peor) a 5 (mejor); con `todos` se
+        devuelven todos los clientes sin paginar (sólo para exportación).
+        """
+        if segmento and segmento not in rfm.SEGMENTOS:
+            raise ValueError(f"Segmento inválido: '{segmento}' (use {', '.join(rfm.SEGMENTOS)})")
+        if not todos:
+            pagina, tamano_pagina = int(pagina), int(tamano_pagina)
+            if pagina < 1:
+                raise ValueError('pagina debe ser 1 o mayor')
+            if tamano_pagina < 1:
+                raise ValueError(f'tamano_pagina debe estar entre 1 y {rfm.MAX_PAGINA}')
+            tamano_pagina = min(tamano_pagina, rfm.MAX_PAGINA)
+
+        clientes = SegmentoRFM.objects.order_by('-rfm_total', 'cliente_id')
+        if segmento:
+            clientes = clientes.filter(segmento=segmento)
+        total = clientes.count()
+        if not todos:
+            clientes = clientes[(pagina - 1) * tamano_pagina:pagina * tamano_pagina]
+
+        hoy = timezone.localdate()
+        filas = list(clientes.values(
+            'ultima_compra', 'r_score', 'f_score', 'm_score', 'rfm_total', 'segmento',
+            id=F('cliente_id'), email=F('cliente__email'), first_name=F('cliente__first_name'),
+            last_name=F('cliente__last_name'), frequency=F('frecuencia'), monetary=F('monto'),
+        ))
+        for fila in filas:
+            fila['recency'] = (hoy - fila['ultima_compra']).days
+
+        resumen_segmentos = {
+            fila['segmento']: {
+                'cantidad': fila['cantidad'],
+                'valor_total': fila['valor_total'],
+                'frecuencia_promedio': fila['frecuencia_promedio'],
+            }
+            for fila in SegmentoRFM.objects.values('segmento').annotate(
+                cantidad=Count('cliente'),
+                valor_total=Sum('monto'),
+                frecuencia_promedio=Avg('frecuencia')
+            ).order_by()
+        }
+
         return {
-            'clientes': list(clientes_rfm),
-            'resumen_segmentos': resumen_segmentos
+            'clientes': filas,
+            'resumen_segmentos': resumen_segmentos,
+            'paginacion': {
+                'pagina': 1 if todos else pagina,
+                'tamano_pagina': None if todos else tamano_pagina,
+                'total': total,
+                'paginas': 1 if todos else -(-total // tamano_pagina),
+            },
+            'calculado': SegmentoRFM.objects.aggregate(m=Max('calculado'))['m'],
         }
-    
+
     @staticmethod
     def analisis_tendencias_ventas(meses=12):
         """Análisis de tendencias con comparaciones mes a mes"""
@@ -416,6 +562,11 @@ class ReportesAvanzados:
         
         return datos
     
+    @staticmethod
+    def serie_ventas(fecha_inicio, fecha_fin, granularidad='dia', puntos=None, metrica='ingresos'):
+        """Ventas por hora, día, semana, mes o trimestre, sin huecos y con variaciones (reportes/series.py)"""
+        return series.serie_ventas(fecha_inicio, fecha_fin, granularidad, puntos, metrica)
+
     @staticmethod
     def analisis_cohortes_retencion(meses=6):
         """Análisis de retención de clientes por cohortes"""
@@ -579,6 +730,7 @@ class ReportesAvanzados:
         return sorted(asociaciones, key=lambda x: x['lift'], reverse=True)
 
 
+@lecturas_en_reportes
 class GeneradorReportes:
     """Sistema flexible para generar cualquier reporte"""
     
@@ -0,0 +1,195 @@
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from ventas.models import SalesNote, SegmentoRFM
+
+
+# Segmentación RFM (recencia, frecuencia, monto) de los clientes.
+#
+# Los agregados por cliente (última compra, cantidad de compras, monto) se
+# leen de sales_note como columnas y los puntajes se calculan con NumPy para
+# todos a la vez. El resultado queda en segmento_rfm, con sus agregados: en
+# cada corrida sólo se vuelven a agregar las ventas de los clientes con
+# ventas escritas desde la corrida anterior (por updated_at: una venta
+# sincronizada desde una caja lleva en created_at la hora de la caja); el
+# resto de la población se lee de la tabla (una lectura angosta, sin tocar
+# las ventas) para recalcular los cuantiles, y sólo se escriben las filas
+# que cambiaron. La recencia se
+# puntúa por la fecha de la última compra, así los puntajes no cambian sólo
+# porque pasa el tiempo.
+
+SEGMENTOS = ['Champions', 'Leales', 'Nuevos Prometedores', 'En Riesgo', 'Perdidos', 'Normales']
+CODIGOS = {segmento: i for i, segmento in enumerate(SEGMENTOS)}
+CUANTILES = 5
+# Solapamiento con la corrida anterior: ventas en transacciones que confirmaron tarde
+MARGEN = timedelta(minutes=5)
+TAMANO_BLOQUE = 20_000
+# Clientes por página del reporte
+MAX_PAGINA = 500
+
+
+def puntajes(valores, cuantiles=CUANTILES):
+    """
+    Cuantil de cada valor (1 = menor, `cuantiles` = mayor) según su rango
+    promedio: los empates reciben el mismo puntaje.
+    """
+    if len(valores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    _, inversa, cuentas = np.unique(valores, return_inverse=True, return_counts=True)
+    rango = np.cumsum(cuentas) - (cuentas - 1) / 2
+    return np.clip(np.ceil(rango[inversa] * cuantiles / len(valores)), 1, cuantiles).astype(np.int64)
+
+
+def segmentar(r, f, m):
+    """Índice en SEGMENTOS de cada cliente; la primera regla que se cumple gana."""
+    return np.select(
+        [
+            (r >= 4) & (f >= 4) & (m >= 4),
+            (r >= 3) & (f >= 3) & (m >= 3),
+            (r >= 4) & (f <= 2),
+            (r <= 2) & (f >= 4),
+            (r <= 2) & (f <= 2),
+        ],
+        [0, 1, 2, 3, 4],
+        default=5,
+    )
+
+
+def calcular(ultima, frecuencia, monto):
+    """(r, f, m, segmento) de cada cliente a partir de sus columnas (ultima = ordinal de la fecha)."""
+    r, f, m = puntajes(ultima), puntajes(frecuencia), puntajes(monto)
+    return r, f, m, segmentar(r, f, m)
+
+
+def _columnas(filas):
+    """[(cliente_id, fecha, frecuencia, monto Decimal), ...] -> ids, ordinales, frecuencias, montos (float) y montos Decimal."""
+    ids, ultima, frecuencia, monto, decimales = [], [], [], [], []
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) == TAMANO_BLOQUE:
+            _agregar(bloque, ids, ultima, frecuencia, monto, decimales)
+            bloque = []
+    _agregar(bloque, ids, ultima, frecuencia, monto, decimales)
+    return (
+        np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64),
+        np.concatenate(ultima) if ultima else np.zeros(0, dtype=np.int64),
+        np.concatenate(frecuencia) if frecuencia else np.zeros(0, dtype=np.int64),
+        np.concatenate(monto) if monto else np.zeros(0),
+        decimales,
+    )
+
+
+def _agregar(bloque, ids, ultima, frecuencia, monto, decimales):
+    if not bloque:
+        return
+    pks, fechas, cantidades, montos = zip(*bloque)
+    ids.append(np.array(pks, dtype=np.int64))
+    ultima.append(np.fromiter(map(date.toordinal, fechas), dtype=np.int64, count=len(fechas)))
+    frecuencia.append(np.array(cantidades, dtype=np.int64))
+    monto.append(np.array(montos, dtype=np.float64))
+    decimales.extend(montos)
+
+
+def _guardados():
+    """Columnas de segmento_rfm (como _columnas) y sus puntajes [(r, f, m, índice de segmento)], en una lectura."""
+    previos = []
+
+    def separar(filas):
+        for cliente_id, ultima, frecuencia, monto, r, f, m, segmento in filas:
+            previos.append((r, f, m, CODIGOS[segmento]))
+            yield cliente_id, ultima, frecuencia, monto
+
+    filas = SegmentoRFM.objects.order_by('cliente_id').values_list(
+        'cliente_id', 'ultima_compra', 'frecuencia', 'monto', 'r_score', 'f_score', 'm_score', 'segmento'
+    )
+    columnas = _columnas(separar(filas.iterator(chunk_size=TAMANO_BLOQUE)))
+    return columnas, np.array(previos, dtype=np.int64).reshape(-1, 4)
+
+
+def refrescar(completo=False):
+    """
+    Actualiza segmento_rfm. Sin `completo` sólo se agregan las ventas de los
+    clientes que compraron desde la última corrida; con `completo` se
+    agregan todos y se borran los clientes que ya no tienen ventas (p. ej.
+    ventas anuladas). Devuelve cuántos clientes se agregaron, cuántas filas
+    se escribieron y el tiempo de cada etapa.
+    """
+    inicio_corrida = timezone.now()
+    tiempos = {}
+    ultima_corrida = None if completo else SegmentoRFM.objects.aggregate(m=Max('calculado'))['m']
+
+    inicio = time.perf_counter()
+    ventas = SalesNote.objects.all()
+    if ultima_corrida is not None:
+        ventas = ventas.filter(cliente_id__in=SalesNote.objects.filter(
+            updated_at__gte=ultima_corrida - MARGEN
+        ).values('cliente_id'))
+    agregados = ventas.values('cliente_id').annotate(
+        ultima=Max('fecha'), frecuencia=Count('id'), monto=Sum('monto')
+    ).order_by('cliente_id').values_list('cliente_id', 'ultima', 'frecuencia', 'monto')
+    nuevos = _columnas(agregados.iterator(chunk_size=TAMANO_BLOQUE))
+    tiempos['agregado'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    if completo:
+        anteriores, previos = _columnas([]), np.zeros((0, 4), dtype=np.int64)
+    else:
+        # El resto de la población, desde la tabla, con los puntajes que tenía
+        anteriores, previos = _guardados()
+        fuera = ~np.isin(anteriores[0], nuevos[0])
+        anteriores = tuple(columna[fuera] for columna in anteriores[:4]) + (
+            [d for d, queda in zip(anteriores[4], fuera.tolist()) if queda],
+        )
+        previos = previos[fuera]
+    tiempos['lectura'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    n_anteriores = len(anteriores[0])
+    ids, ultima, frecuencia, monto = (np.concatenate([a, n]) for a, n in zip(anteriores[:4], nuevos[:4]))
+    decimales = anteriores[4] + nuevos[4]
+    r, f, m, segmento = calcular(ultima, frecuencia, monto)
+
+    # De los no agregados sólo se escribe lo que movieron los cuantiles
+    escribir = np.ones(len(ids), dtype=bool)
+    escribir[:n_anteriores] = (np.stack([r, f, m, segmento], axis=1)[:n_anteriores] != previos).any(axis=1)
+    tiempos['puntajes'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    ids, ultima, frecuencia, r, f, m, segmento = (
+        columna.tolist() for columna in (ids, ultima, frecuencia, r, f, m, segmento)
+    )
+    filas = [
+        SegmentoRFM(
+            cliente_id=ids[i], ultima_compra=date.fromordinal(ultima[i]), frecuencia=frecuencia[i],
+            monto=decimales[i], r_score=r[i], f_score=f[i], m_score=m[i], rfm_total=r[i] + f[i] + m[i],
+            segmento=SEGMENTOS[segmento[i]], calculado=inicio_corrida,
+        )
+        for i in np.flatnonzero(escribir).tolist()
+    ]
+    with transaction.atomic():
+        if completo:
+            SegmentoRFM.objects.exclude(cliente_id__in=SalesNote.objects.values('cliente_id')).delete()
+        SegmentoRFM.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=['cliente'],
+            update_fields=[
+                'ultima_compra', 'frecuencia', 'monto', 'r_score', 'f_score', 'm_score',
+                'rfm_total', 'segmento', 'calculado',
+            ],
+            batch_size=2000,
+        )
+    tiempos['escritura'] = time.perf_counter() - inicio
+
+    return {
+        'clientes': len(ids),
+        'agregados': len(nuevos[0]),
+        'escritos': len(filas),
+        'segundos': {etapa: round(segundos, 3) for etapa, segundos in tiempos.items()},
+    }
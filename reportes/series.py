@@ -0,0 +1,261 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth, TruncQuarter, TruncWeek
+
+from ventas.models import SalesNote
+
+
+# Serie de tiempo de ventas para gráficos.
+#
+# Todos los períodos del rango aparecen, aunque no haya ventas (en cero), y
+# cada uno trae su variación contra el período anterior y contra el mismo
+# período del año anterior. En PostgreSQL todo se resuelve en una consulta:
+# generate_series arma los períodos y LAG las comparaciones; la serie se lee
+# desde un año antes del inicio para que el LAG interanual tenga con qué
+# comparar. Los períodos son los de TIME_ZONE (created_at convertido).
+# Con `puntos` la serie se reduce con LTTB, que conserva picos y valles.
+
+# granularidad: (unidad de date_trunc, paso, períodos que hay en un año)
+# 'dia' y 'hora' comparan con 52 semanas atrás: el mismo día de la semana.
+GRANULARIDADES = {
+    'hora': ('hour', '1 hour', 364 * 24),
+    'dia': ('day', '1 day', 364),
+    'semana': ('week', '1 week', 52),
+    'mes': ('month', '1 month', 12),
+    'trimestre': ('quarter', '3 months', 4),
+}
+METRICAS = ('ingresos', 'num_ventas')
+MAX_PERIODOS = 50_000
+# Historia leída antes del inicio para el LAG interanual
+HISTORIA = timedelta(days=366)
+
+_SQL = """
+    WITH periodos AS (
+        SELECT generate_series(
+            date_trunc(%(unidad)s, %(historia)s::timestamp),
+            date_trunc(%(unidad)s, %(ultimo)s::timestamp),
+            %(paso)s::interval
+        ) AS periodo
+    ),
+    ventas AS (
+        SELECT date_trunc(%(unidad)s, created_at AT TIME ZONE %(zona)s) AS periodo,
+               COUNT(*) AS num_ventas,
+               SUM(monto) AS ingresos
+        FROM {tabla}
+        WHERE created_at >= %(desde)s AND created_at < %(hasta)s
+        GROUP BY 1
+    ),
+    serie AS (
+        SELECT p.periodo,
+               COALESCE(v.num_ventas, 0) AS num_ventas,
+               COALESCE(v.ingresos, 0) AS ingresos
+        FROM periodos p
+        LEFT JOIN ventas v ON v.periodo = p.periodo
+    ),
+    comparada AS (
+        SELECT periodo, num_ventas, ingresos,
+               LAG(num_ventas) OVER w AS num_ventas_anterior,
+               LAG(ingresos) OVER w AS ingresos_anterior,
+               LAG(num_ventas, %(por_anio)s) OVER w AS num_ventas_anio_anterior,
+               LAG(ingresos, %(por_anio)s) OVER w AS ingresos_anio_anterior
+        FROM serie
+        WINDOW w AS (ORDER BY periodo)
+    )
+    SELECT periodo, num_ventas, ingresos,
+           num_ventas_anterior, ingresos_anterior,
+           num_ventas_anio_anterior, ingresos_anio_anterior,
+           ROUND((num_ventas - num_ventas_anterior) * 100.0 / NULLIF(num_ventas_anterior, 0), 2),
+           ROUND((ingresos - ingresos_anterior) * 100.0 / NULLIF(ingresos_anterior, 0), 2),
+           ROUND((num_ventas - num_ventas_anio_anterior) * 100.0 / NULLIF(num_ventas_anio_anterior, 0), 2),
+           ROUND((ingresos - ingresos_anio_anterior) * 100.0 / NULLIF(ingresos_anio_anterior, 0), 2)
+    FROM comparada
+    WHERE periodo >= date_trunc(%(unidad)s, %(inicio)s::timestamp)
+    ORDER BY periodo
+"""
+
+COLUMNAS = (
+    'periodo', 'num_ventas', 'ingresos',
+    'num_ventas_anterior', 'ingresos_anterior',
+    'num_ventas_anio_anterior', 'ingresos_anio_anterior',
+    'crecimiento_ventas', 'crecimiento_ingresos',
+    'crecimiento_anual_ventas', 'crecimiento_anual_ingresos',
+)
+
+
+def serie_ventas(fecha_inicio, fecha_fin, granularidad='dia', puntos=None, metrica='ingresos'):
+    """
+    Ventas por período entre fecha_inicio y fecha_fin (inclusive), sin huecos,
+    con variaciones contra el período anterior y el año anterior (en %; None
+    si la base es cero). Con `puntos` se devuelven a lo sumo esos períodos,
+    elegidos por LTTB sobre `metrica`.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad inválida: '{granularidad}' (use {', '.join(GRANULARIDADES)})")
+    if metrica not in METRICAS:
+        raise ValueError(f"Métrica inválida: '{metrica}' (use {', '.join(METRICAS)})")
+    if fecha_fin < fecha_inicio:
+        raise ValueError('fecha_fin es anterior a fecha_inicio')
+    if puntos is not None and puntos < 3:
+        raise ValueError('puntos debe ser al menos 3')
+    unidad, paso, por_anio = GRANULARIDADES[granularidad]
+    if _contar_periodos(fecha_inicio, fecha_fin, unidad) > MAX_PERIODOS:
+        raise ValueError(f"El rango tiene más de {MAX_PERIODOS} períodos; use una granularidad mayor")
+
+    zona = ZoneInfo(settings.TIME_ZONE)
+    inicio = datetime.combine(fecha_inicio, time.min)
+    historia = inicio - HISTORIA
+    fin = datetime.combine(fecha_fin + timedelta(days=1), time.min)
+
+    alias = router.db_for_read(SalesNote)
+    if connections[alias].vendor == 'postgresql':
+        filas = _serie_sql(alias, unidad, paso, por_anio, historia, inicio, fin, zona)
+    else:
+        filas = _serie_python(alias, unidad, por_anio, historia, inicio, fin, zona)
+
+    serie = [dict(zip(COLUMNAS, fila)) for fila in filas]
+    for punto in serie:
+        periodo = punto['periodo']
+        punto['periodo'] = periodo.replace(tzinfo=zona) if unidad == 'hour' else periodo.date()
+
+    total = len(serie)
+    if puntos and total > puntos:
+        serie = [serie[i] for i in lttb([float(p[metrica]) for p in serie], puntos)]
+    return {
+        'granularidad': granularidad,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'periodos': total,
+        'puntos': len(serie),
+        'serie': serie,
+    }
+
+
+def _contar_periodos(fecha_inicio, fecha_fin, unidad):
+    dias = (fecha_fin - fecha_inicio).days + 1
+    return {'hour': dias * 24, 'day': dias, 'week': dias // 7 + 1, 'month': dias // 28 + 1, 'quarter': dias // 90 + 1}[unidad]
+
+
+def _serie_sql(alias, unidad, paso, por_anio, historia, inicio, fin, zona):
+    conexion = connections[alias]
+    sql = _SQL.format(tabla=conexion.ops.quote_name(SalesNote._meta.db_table))
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, {
+            'unidad': unidad,
+            'paso': paso,
+            'por_anio': por_anio,
+            'zona': settings.TIME_ZONE,
+            # Límites de los períodos: hora local sin zona, como date_trunc de created_at AT TIME ZONE
+            'historia': historia,
+            'inicio': inicio,
+            'ultimo': fin - timedelta(microseconds=1),
+            # Filtro sobre created_at (timestamptz): instantes con zona
+            'desde': historia.replace(tzinfo=zona),
+            'hasta': fin.replace(tzinfo=zona),
+        })
+        return cursor.fetchall()
+
+
+# --------------------------------------------------------
+# Otros motores (SQLite en desarrollo): mismo resultado, armado en Python
+# --------------------------------------------------------
+_TRUNC = {'hour': TruncHour, 'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth, 'quarter': TruncQuarter}
+
+
+def _truncar(momento, unidad):
+    if unidad == 'hour':
+        return momento.replace(minute=0, second=0, microsecond=0)
+    dia = momento.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unidad == 'day':
+        return dia
+    if unidad == 'week':
+        return dia - timedelta(days=dia.weekday())
+    if unidad == 'month':
+        return dia.replace(day=1)
+    return dia.replace(day=1, month=(dia.month - 1) // 3 * 3 + 1)
+
+
+def _siguiente(periodo, unidad):
+    if unidad in ('hour', 'day', 'week'):
+        return periodo + {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}[unidad]
+    meses = periodo.month - 1 + (1 if unidad == 'month' else 3)
+    return periodo.replace(year=periodo.year + meses // 12, month=meses % 12 + 1)
+
+
+def _variacion(actual, anterior):
+    if not anterior:
+        return None
+    return (Decimal(actual - anterior) * 100 / Decimal(anterior)).quantize(Decimal('0.01'))
+
+
+def _serie_python(alias, unidad, por_anio, historia, inicio, fin, zona):
+    ventas = {
+        periodo.replace(tzinfo=None): (num_ventas, ingresos)
+        for periodo, num_ventas, ingresos in SalesNote.objects.using(alias).filter(
+            created_at__gte=historia.replace(tzinfo=zona), created_at__lt=fin.replace(tzinfo=zona)
+        ).annotate(periodo=_TRUNC[unidad]('created_at', tzinfo=zona)).values('periodo').annotate(
+            num_ventas=Count('id'), ingresos=Sum('monto')
+        ).order_by().values_list('periodo', 'num_ventas', 'ingresos')
+    }
+
+    serie = []
+    periodo = _truncar(historia, unidad)
+    ultimo = _truncar(fin - timedelta(microseconds=1), unidad)
+    while periodo <= ultimo:
+        num_ventas, ingresos = ventas.get(periodo, (0, Decimal('0')))
+        serie.append((periodo, num_ventas, ingresos))
+        periodo = _siguiente(periodo, unidad)
+
+    primero = _truncar(inicio, unidad)
+    filas = []
+    for i, (periodo, num_ventas, ingresos) in enumerate(serie):
+        if periodo < primero:
+            continue
+        _, num_ventas_anterior, ingresos_anterior = serie[i - 1] if i >= 1 else (None, None, None)
+        _, num_ventas_anio, ingresos_anio = serie[i - por_anio] if i >= por_anio else (None, None, None)
+        filas.append((
+            periodo, num_ventas, ingresos,
+            num_ventas_anterior, ingresos_anterior, num_ventas_anio, ingresos_anio,
+            _variacion(num_ventas, num_ventas_anterior), _variacion(ingresos, ingresos_anterior),
+            _variacion(num_ventas, num_ventas_anio), _variacion(ingresos, ingresos_anio),
+        ))
+    return filas
+
+
+# --------------------------------------------------------
+# Reducción de puntos
+# --------------------------------------------------------
+def lttb(valores, puntos):
+    """
+    Índices de `puntos` valores que conservan la forma de la serie
+    (Largest-Triangle-Three-Buckets): se fijan el primero y el último, y de
+    cada tramo intermedio se toma el punto que forma el triángulo de mayor
+    área con el elegido antes y el promedio del tramo siguiente.
+    """
+    y = np.asarray(valores, dtype=np.float64)
+    n = len(y)
+    if puntos >= n or puntos < 3:
+        return list(range(n))
+    x = np.arange(n, dtype=np.float64)
+    # Tramos [limites[i], limites[i+1]) entre el primer y el último punto
+    limites = (np.arange(puntos - 1) * ((n - 2) / (puntos - 2))).astype(np.int64) + 1
+
+    elegidos = [0]
+    a = 0
+    for i in range(puntos - 2):
+        desde, hasta = limites[i], limites[i + 1]
+        if i + 2 < len(limites):
+            siguiente = slice(limites[i + 1], limites[i + 2])
+            cx, cy = x[siguiente].mean(), y[siguiente].mean()
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        areas = np.abs((x[a] - cx) * (y[desde:hasta] - y[a]) - (x[a] - x[desde:hasta]) * (cy - y[a]))
+        a = int(desde + np.argmax(areas))
+        elegidos.append(a)
+    elegidos.append(n - 1)
+    return elegidos
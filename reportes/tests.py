@@ -0,0 +1,216 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.db.models import Count, Max, Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from productos.models import Category, Product, PronosticoDemanda, Provider, ProviderProduct
+from reportes import pronostico, rfm
+from reportes.reportes_niveles import ReportesIntermedios
+from usuarios.models import Usuario
+from ventas.models import DetailNote, SalesNote, SegmentoRFM
+
+
+# --------------------------------------------------------
+# Segmentación RFM (reportes/rfm.py)
+# --------------------------------------------------------
+class RFMTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.clientes = [
+            Usuario.objects.create_user(f'cliente{i}@test.com', 'x', username=f'cliente{i}') for i in range(10)
+        ]
+
+    def setUp(self):
+        # Historia de hace 10 a 200 días: recencia, frecuencia y monto distintos por cliente
+        self.antes = timezone.now() - timedelta(days=10)
+        for i, cliente in enumerate(self.clientes[:8]):
+            for j in range(1 + i % 4):
+                self.vender(cliente, Decimal(50 * (i + 1) + j), self.antes - timedelta(days=20 * i + j))
+
+    def vender(self, cliente, monto, momento=None):
+        nota = SalesNote.objects.create(cliente=cliente, monto=monto, tipo_pago='efectivo')
+        if momento is not None:
+            SalesNote.objects.filter(pk=nota.pk).update(
+                fecha=timezone.localdate(momento), created_at=momento, updated_at=momento
+            )
+        return nota
+
+    def estado(self):
+        return {
+            fila[0]: fila[1:]
+            for fila in SegmentoRFM.objects.values_list(
+                'cliente_id', 'ultima_compra', 'frecuencia', 'monto', 'r_score', 'f_score', 'm_score',
+                'rfm_total', 'segmento',
+            )
+        }
+
+    def esperado(self):
+        """Puntajes recalculados desde sales_note, sin pasar por la tabla."""
+        filas = list(SalesNote.objects.values('cliente_id').annotate(
+            ultima=Max('fecha'), frecuencia=Count('id'), monto=Sum('monto')
+        ).order_by('cliente_id').values_list('cliente_id', 'ultima', 'frecuencia', 'monto'))
+        ids, ultima, frecuencia, monto, _ = rfm._columnas(filas)
+        r, f, m, segmento = rfm.calcular(ultima, frecuencia, monto)
+        return {
+            pk: (int(r[i]), int(f[i]), int(m[i]), rfm.SEGMENTOS[segmento[i]])
+            for i, pk in enumerate(ids.tolist())
+        }
+
+    def puntajes(self):
+        return {pk: (fila[3], fila[4], fila[5], fila[7]) for pk, fila in self.estado().items()}
+
+    def test_puntajes_por_cuantil(self):
+        np.testing.assert_array_equal(rfm.puntajes(np.arange(10)), [1, 1, 2, 2, 3, 3, 4, 4, 5, 5])
+        # Los empates reciben el mismo puntaje (el del rango promedio)
+        np.testing.assert_array_equal(rfm.puntajes(np.array([7, 7, 7, 7])), [4, 4, 4, 4])
+        np.testing.assert_array_equal(rfm.puntajes(np.array([1, 1, 1, 1, 1, 1, 1, 1, 5, 9])), [3] * 8 + [5, 5])
+        self.assertEqual(len(rfm.puntajes(np.array([]))), 0)
+
+    def test_cinco_es_lo_mejor_en_cada_eje(self):
+        rfm.refrescar()
+        puntajes = self.puntajes()
+        # cliente0: compra más reciente; cliente7: más antigua y de mayor monto; cliente3: más compras
+        self.assertEqual(puntajes[self.clientes[0].pk][0], 5)
+        self.assertEqual(puntajes[self.clientes[7].pk][0], 1)
+        self.assertEqual(puntajes[self.clientes[7].pk][2], 5)
+        self.assertEqual(puntajes[self.clientes[3].pk][1], 5)
+
+    def test_primera_corrida_coincide_con_el_calculo_directo(self):
+        resumen = rfm.refrescar()
+        self.assertEqual((resumen['clientes'], resumen['agregados'], resumen['escritos']), (8, 8, 8))
+        self.assertEqual(self.puntajes(), self.esperado())
+
+    def test_incremental_igual_a_completo(self):
+        rfm.refrescar()
+        # Compras nuevas de dos clientes existentes y de uno nuevo
+        self.vender(self.clientes[7], Decimal('900.00'))
+        self.vender(self.clientes[5], Decimal('10.00'))
+        self.vender(self.clientes[9], Decimal('75.00'))
+
+        resumen = rfm.refrescar()
+        self.assertEqual((resumen['clientes'], resumen['agregados']), (9, 3))
+        incremental = self.estado()
+        self.assertEqual(self.puntajes(), self.esperado())
+
+        rfm.refrescar(completo=True)
+        self.assertEqual(self.estado(), incremental)
+
+    def test_sin_cambios_no_reescribe(self):
+        rfm.refrescar()
+        resumen = rfm.refrescar()
+        self.assertEqual((resumen['agregados'], resumen['escritos']), (0, 0))
+
+    def test_completo_borra_clientes_sin_ventas(self):
+        rfm.refrescar()
+        SalesNote.objects.filter(cliente=self.clientes[2]).delete()
+
+        rfm.refrescar(completo=True)
+        self.assertNotIn(self.clientes[2].pk, self.estado())
+        self.assertEqual(self.puntajes(), self.esperado())
+
+    def test_la_vista_siempre_pagina(self):
+        rfm.refrescar()
+        api = APIClient()
+        api.force_authenticate(self.clientes[0])
+
+        respuesta = api.get('/api/reportes/rfm/', {'tamano_pagina': 3, 'pagina': 2})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.data['clientes']), 3)
+        self.assertEqual(respuesta.data['paginacion']['paginas'], 3)
+
+        respuesta = api.get('/api/reportes/rfm/', {'tamano_pagina': 10_000})
+        self.assertEqual(respuesta.data['paginacion']['tamano_pagina'], rfm.MAX_PAGINA)
+
+        for parametros in ({'tamano_pagina': 0}, {'tamano_pagina': -5}, {'pagina': 0}, {'pagina': 'abc'}):
+            self.assertEqual(api.get('/api/reportes/rfm/', parametros).status_code, 400, parametros)
+
+
+# --------------------------------------------------------
+# Margen por producto
+# --------------------------------------------------------
+class MargenProductosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cliente = Usuario.objects.create_user('cliente@test.com', 'x', username='cliente')
+        categoria = Category.objects.create(descripcion='Ropa')
+        cls.camisa, cls.polera, cls.gorro, cls.sin_venta = [
+            Product.objects.create(nombre=nombre, precio=10, stock=100, categoria=categoria)
+            for nombre in ('Camisa', 'Polera', 'Gorro', 'Sin venta')
+        ]
+        for i, proveedor in enumerate(Provider.objects.create(nombre=n) for n in ('A', 'B')):
+            ProviderProduct.objects.create(proveedor=proveedor, producto=cls.camisa, precio_compra=Decimal(4 + 2 * i))
+            ProviderProduct.objects.create(proveedor=proveedor, producto=cls.polera, precio_compra=Decimal('9.00'))
+            ProviderProduct.objects.create(proveedor=proveedor, producto=cls.gorro, precio_compra=None)
+        ProviderProduct.objects.create(proveedor=proveedor, producto=cls.sin_venta, precio_compra=Decimal('1.00'))
+
+        nota = SalesNote.objects.create(cliente=cliente, monto=Decimal('110.00'), tipo_pago='efectivo')
+        for producto, cantidad, subtotal in ((cls.camisa, 3, '30.00'), (cls.camisa, 2, '20.00'),
+                                             (cls.polera, 5, '50.00'), (cls.gorro, 1, '10.00')):
+            DetailNote.objects.create(nota=nota, producto=producto, cantidad=cantidad, subtotal=Decimal(subtotal))
+        cls.hoy = timezone.localdate()
+
+    def test_margen_por_producto_vendido(self):
+        with self.assertNumQueries(1):
+            reporte = ReportesIntermedios.margen_productos(self.hoy, self.hoy)
+        filas = {f['producto__id']: f for f in reporte['productos']}
+
+        self.assertEqual([f['producto__id'] for f in reporte['productos']], [self.camisa.pk, self.polera.pk, self.gorro.pk])
+        camisa = filas[self.camisa.pk]
+        self.assertEqual((camisa['producto__nombre'], camisa['producto__categoria__descripcion']), ('Camisa', 'Ropa'))
+        self.assertEqual((camisa['unidades_vendidas'], camisa['ingresos']), (5, Decimal('50.00')))
+        self.assertEqual((camisa['costo_unitario'], camisa['costo_total'], camisa['margen']),
+                         (Decimal('5.00'), Decimal('25.00'), Decimal('25.00')))
+        self.assertEqual(filas[self.polera.pk]['margen'], Decimal('5.00'))
+        self.assertIsNone(filas[self.gorro.pk]['costo_unitario'])
+
+        self.assertEqual(reporte['resumen'], {
+            'productos': 3, 'productos_sin_costo': 1, 'ingresos': Decimal('110.00'),
+            'costo_total': Decimal('70.00'), 'margen': Decimal('30.00'), 'margen_porcentaje': 30.0,
+        })
+        limitado = ReportesIntermedios.margen_productos(self.hoy, self.hoy, limite=1)
+        self.assertEqual([f['producto__id'] for f in limitado['productos']], [self.camisa.pk])
+        self.assertEqual(limitado['resumen'], reporte['resumen'])
+
+    def test_periodo_sin_ventas(self):
+        ayer = self.hoy - timedelta(days=1)
+        reporte = ReportesIntermedios.margen_productos(ayer, ayer)
+        self.assertEqual((reporte['productos'], reporte['resumen']['productos']), ([], 0))
+        self.assertIsNone(reporte['resumen']['margen_porcentaje'])
+
+
+# --------------------------------------------------------
+# Reposición sugerida (lee pronostico_demanda)
+# --------------------------------------------------------
+class ReposicionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('compras@test.com', 'x', username='compras')
+        categoria = Category.objects.create(descripcion='Ropa')
+        for i in range(5):
+            producto = Product.objects.create(nombre=f'Producto {i}', precio=10, stock=i, categoria=categoria)
+            PronosticoDemanda.objects.create(
+                producto=producto, modelo='ses', demanda_diaria=1.0, desviacion=0.5, stock_seguridad=2,
+                punto_reorden=5, disponible=i, dias_cobertura=float(i), cantidad_sugerida=5 - i if i < 4 else 0,
+                calculado=timezone.now(),
+            )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.usuario)
+
+    def test_limite_acotado(self):
+        respuesta = self.api.get('/api/reportes/reposicion/', {'limite': 2})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([f['dias_cobertura'] for f in respuesta.data], [0.0, 1.0])
+        self.assertEqual(len(self.api.get('/api/reportes/reposicion/', {'todos': 1}).data), 5)
+
+        with mock.patch.object(pronostico, 'MAX_REPOSICION', 3):
+            self.assertEqual(len(self.api.get('/api/reportes/reposicion/', {'limite': 1000}).data), 3)
+
+        for limite in (0, -1, 'abc'):
+            self.assertEqual(self.api.get('/api/reportes/reposicion/', {'limite': limite}).status_code, 400, limite)
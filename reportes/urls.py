@@ -6,6 +6,7 @@ from .views import (
     VentasPorPeriodoView,
     TopProductosView,
     ProductosBajoStockView,
+    ReposicionView,
     VentasPorDiaView,
     ResumenCreditosView,
     
@@ -15,10 +16,13 @@ from .views import (
     ClientesFrecuentesView,
     FlujoCajaView,
     RotacionInventarioView,
+    MapaCalorVentasView,
+    MargenProductosView,
     
     # Reportes Avanzados
     AnalisisRFMView,
     TendenciasVentasView,
+    SerieVentasView,
     CohortesRetencionView,
     CarteraCreditosView,
     MarketBasketView,
@@ -36,6 +40,7 @@ urlpatterns = [
     path('ventas-periodo/', VentasPorPeriodoView.as_view(), name='ventas-periodo'),
     path('top-productos/', TopProductosView.as_view(), name='top-productos'),
     path('bajo-stock/', ProductosBajoStockView.as_view(), name='bajo-stock'),
+    path('reposicion/', ReposicionView.as_view(), name='reposicion'),
     path('ventas-diarias/', VentasPorDiaView.as_view(), name='ventas-diarias'),
     path('resumen-creditos/', ResumenCreditosView.as_view(), name='resumen-creditos'),
     
@@ -45,10 +50,13 @@ urlpatterns = [
     path('clientes-frecuentes/', ClientesFrecuentesView.as_view(), name='clientes-frecuentes'),
     path('flujo-caja/', FlujoCajaView.as_view(), name='flujo-caja'),
     path('rotacion-inventario/', RotacionInventarioView.as_view(), name='rotacion-inventario'),
+    path('mapa-calor/', MapaCalorVentasView.as_view(), name='mapa-calor'),
+    path('margen-productos/', MargenProductosView.as_view(), name='margen-productos'),
     
 
     path('rfm/', AnalisisRFMView.as_view(), name='rfm'),
     path('tendencias/', TendenciasVentasView.as_view(), name='tendencias'),
+    path('serie-ventas/', SerieVentasView.as_view(), name='serie-ventas'),
     path('cohortes/', CohortesRetencionView.as_view(), name='cohortes'),
     path('cartera-creditos/', CarteraCreditosView.as_view(), name='cartera-creditos'),
     path('market-basket/', MarketBasketView.as_view(), name='market-basket'),
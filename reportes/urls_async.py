@@ -0,0 +1,40 @@
+from django.urls import path
+
+from .reportes_async import ReportesBasicosAsync
+from .reportes_niveles import ReportesBasicos, ReportesIntermedios, ReportesAvanzados
+from .views_async import ReporteAsyncView
+
+# Variantes async de /api/reportes/ (mismos nombres de URL, bajo el namespace
+# 'reportes_async'). Tienen sentido desplegadas con un servidor ASGI.
+app_name = 'reportes_async'
+
+
+def reporte(ruta, funcion, nombre, requiere_fechas=False, **parametros):
+    vista = ReporteAsyncView.as_view(reporte=funcion, requiere_fechas=requiere_fechas, parametros=parametros)
+    return path(ruta, vista, name=nombre)
+
+
+urlpatterns = [
+    # ORM async
+    reporte('ventas-periodo/', ReportesBasicosAsync.ventas_por_periodo, 'ventas-periodo', True),
+    reporte('top-productos/', ReportesBasicosAsync.top_productos, 'top-productos', True, limite=10),
+    reporte('bajo-stock/', ReportesBasicosAsync.productos_bajo_stock, 'bajo-stock', minimo=10),
+    reporte('ventas-diarias/', ReportesBasicosAsync.ventas_por_dia, 'ventas-diarias', True),
+    reporte('resumen-creditos/', ReportesBasicosAsync.resumen_creditos, 'resumen-creditos'),
+
+    # Reportes sync en el pool acotado de hilos
+    reporte('reposicion/', ReportesBasicos.reposicion_sugerida, 'reposicion', limite=100, todos=0),
+    reporte('analisis-categorias/', ReportesIntermedios.analisis_por_categoria, 'analisis-categorias', True),
+    reporte('rendimiento-empleados/', ReportesIntermedios.rendimiento_empleados, 'rendimiento-empleados', True),
+    reporte('clientes-frecuentes/', ReportesIntermedios.analisis_clientes_frecuentes, 'clientes-frecuentes', limite=20),
+    reporte('flujo-caja/', ReportesIntermedios.flujo_caja_detallado, 'flujo-caja', True),
+    reporte('rotacion-inventario/', ReportesIntermedios.rotacion_inventario, 'rotacion-inventario', True),
+    reporte('mapa-calor/', ReportesIntermedios.mapa_calor_ventas, 'mapa-calor', True),
+    reporte('margen-productos/', ReportesIntermedios.margen_productos, 'margen-productos', True, limite=None),
+
+    reporte('rfm/', ReportesAvanzados.analisis_rfm_clientes, 'rfm', pagina=1, tamano_pagina=50),
+    reporte('tendencias/', ReportesAvanzados.analisis_tendencias_ventas, 'tendencias', meses=12),
+    reporte('cohortes/', ReportesAvanzados.analisis_cohortes_retencion, 'cohortes', meses=6),
+    reporte('cartera-creditos/', ReportesAvanzados.analisis_cartera_creditos, 'cartera-creditos'),
+    reporte('market-basket/', ReportesAvanzados.market_basket_analysis, 'market-basket', True, min_soporte=3),
+]
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
 from .reportes_niveles import (
     ReportesBasicos, ReportesIntermedios, ReportesAvanzados, GeneradorReportes
@@ -24,6 +25,7 @@ class ReportesRootView(APIView):
                 "ventas-periodo/",
                 "top-productos/",
                 "bajo-stock/",
+                "reposicion/",
                 "ventas-diarias/",
                 "resumen-creditos/",
                 "analisis-categorias/",
@@ -31,8 +33,11 @@ class ReportesRootView(APIView):
                 "clientes-frecuentes/",
                 "flujo-caja/",
                 "rotacion-inventario/",
+                "mapa-calor/",
+                "margen-productos/",
                 "rfm/",
                 "tendencias/",
+                "serie-ventas/",
                 "cohortes/",
                 "cartera-creditos/",
                 "market-basket/",
@@ -125,6 +130,29 @@ class ProductosBajoStockView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class ReposicionView(APIView):
+    """
+    GET /api/reportes/reposicion/?limite=100&todos=0
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        todos = request.query_params.get('todos', '0') in ('1', 'true')
+
+        try:
+            limite = int(request.query_params.get('limite', 100))
+            reporte = ReportesBasicos.reposicion_sugerida(limite, todos)
+            return Response(reporte, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class VentasPorDiaView(APIView):
     """
     GET /api/reportes/ventas-diarias/?fecha_inicio=2024-01-01&fecha_fin=2024-01-31
@@ -279,16 +307,80 @@ class RotacionInventarioView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class MapaCalorVentasView(APIView):
+    """
+    GET /api/reportes/mapa-calor/?fecha_inicio=2024-01-01&fecha_fin=2024-12-31
+    Matrices 7 x 24: fila = día de la semana (lunes primero), columna = hora.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        fecha_inicio = request.query_params.get('fecha_inicio')
+        fecha_fin = request.query_params.get('fecha_fin')
+
+        if not fecha_inicio or not fecha_fin:
+            return Response({
+                'error': 'Se requieren fecha_inicio y fecha_fin'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reporte = ReportesIntermedios.mapa_calor_ventas(fecha_inicio, fecha_fin)
+            return Response(reporte, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class MargenProductosView(APIView):
+    """
+    GET /api/reportes/margen-productos/?fecha_inicio=2024-01-01&fecha_fin=2024-01-31&limite=50
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        fecha_inicio = request.query_params.get('fecha_inicio')
+        fecha_fin = request.query_params.get('fecha_fin')
+        limite = request.query_params.get('limite')
+        
+        if not fecha_inicio or not fecha_fin:
+            return Response({
+                'error': 'Se requieren fecha_inicio y fecha_fin'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            reporte = ReportesIntermedios.margen_productos(
+                fecha_inicio, fecha_fin, int(limite) if limite else None
+            )
+            return Response(reporte, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class AnalisisRFMView(APIView):
     """
-    GET /api/reportes/rfm/
+    GET /api/reportes/rfm/?segmento=Champions&pagina=1&tamano_pagina=50
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
+        segmento = request.query_params.get('segmento')
+
         try:
-            reporte = ReportesAvanzados.analisis_rfm_clientes()
+            pagina = int(request.query_params.get('pagina', 1))
+            tamano_pagina = int(request.query_params.get('tamano_pagina', 50))
+            reporte = ReportesAvanzados.analisis_rfm_clientes(segmento, pagina, tamano_pagina)
             return Response(reporte, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': str(e)
@@ -313,6 +405,41 @@ class TendenciasVentasView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class SerieVentasView(APIView):
+    """
+    GET /api/reportes/serie-ventas/?fecha_inicio=2024-01-01&fecha_fin=2024-12-31&granularidad=dia&puntos=500&metrica=ingresos
+    granularidad: hora, dia, semana, mes o trimestre
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        fecha_inicio = parse_date(request.query_params.get('fecha_inicio') or '')
+        fecha_fin = parse_date(request.query_params.get('fecha_fin') or '')
+        puntos = request.query_params.get('puntos')
+
+        if not fecha_inicio or not fecha_fin:
+            return Response({
+                'error': 'Se requieren fecha_inicio y fecha_fin (AAAA-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reporte = ReportesAvanzados.serie_ventas(
+                fecha_inicio, fecha_fin,
+                request.query_params.get('granularidad', 'dia'),
+                int(puntos) if puntos else None,
+                request.query_params.get('metrica', 'ingresos'),
+            )
+            return Response(reporte, status=status.HTTP_200_OK)
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class CohortesRetencionView(APIView):
     """
     GET /api/reportes/cohortes/?meses=6
@@ -584,7 +711,7 @@ class ExportarReporteView(APIView):
                 parametros['fecha_inicio'], parametros['fecha_fin'],
                 parametros.get('limite', 10)
             ),
-            'rfm': lambda: ReportesAvanzados.analisis_rfm_clientes()
+            'rfm': lambda: ReportesAvanzados.analisis_rfm_clientes(todos=True)
         }
         
         if tipo_reporte not in REPORTES:
@@ -0,0 +1,49 @@
+from asgiref.sync import iscoroutinefunction
+
+from config.vistas_async import PoolSaturado, VistaAsync, en_hilo, respuesta_json
+
+
+class ReporteAsyncView(VistaAsync):
+    """
+    GET /api/async/reportes/<reporte>/ con los mismos parámetros que /api/reportes/<reporte>/.
+
+    `reporte` es una función de reportes_async (se espera en el loop) o de
+    reportes_niveles (se ejecuta en el pool acotado de hilos).
+    """
+    reporte = None
+    requiere_fechas = False
+    # Parámetros enteros opcionales y su valor por defecto (None = no se envía)
+    parametros = {}
+
+    async def get(self, request):
+        kwargs = {}
+        if self.requiere_fechas:
+            fecha_inicio = request.GET.get('fecha_inicio')
+            fecha_fin = request.GET.get('fecha_fin')
+            if not fecha_inicio or not fecha_fin:
+                return respuesta_json({'error': 'Se requieren fecha_inicio y fecha_fin'}, status=400)
+            kwargs.update(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+
+        for nombre, defecto in self.parametros.items():
+            valor = request.GET.get(nombre)
+            if valor in (None, ''):
+                if defecto is not None:
+                    kwargs[nombre] = defecto
+                continue
+            try:
+                kwargs[nombre] = int(valor)
+            except ValueError:
+                return respuesta_json({'error': f'{nombre} debe ser un entero'}, status=400)
+
+        try:
+            if iscoroutinefunction(self.reporte):
+                reporte = await self.reporte(**kwargs)
+            else:
+                reporte = await en_hilo(self.reporte, **kwargs)
+        except PoolSaturado:
+            raise
+        except ValueError as e:
+            return respuesta_json({'error': str(e)}, status=400)
+        except Exception as e:
+            return respuesta_json({'error': str(e)}, status=500)
+        return respuesta_json(reporte)
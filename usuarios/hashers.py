@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2AjustableHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con iteraciones configurables (PASSWORD_PBKDF2_ITERATIONS).
+
+    Usa el mismo identificador 'pbkdf2_sha256', así que los hashes existentes
+    siguen siendo válidos y Django los re-hashea en el siguiente login cuando
+    las iteraciones guardadas no coinciden con las configuradas.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import close_old_connections
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class LoginSaturado(Exception):
+    """Hay demasiados logins esperando turno para calcular el hash."""
+
+
+class PoolLogin:
+    """
+    Pool acotado de hilos para la verificación de contraseñas.
+
+    PBKDF2 es CPU puro: con más hilos que núcleos sólo se reparte el mismo
+    CPU entre más peticiones y todas tardan más. El pool limita los hashes
+    simultáneos a LOGIN_HASH_WORKERS y rechaza de inmediato cuando la cola
+    supera LOGIN_MAX_PENDIENTES, en vez de acumular peticiones que van a
+    expirar en el cliente.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pendientes = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=settings.LOGIN_HASH_WORKERS,
+                        thread_name_prefix='login-hash'
+                    )
+        return self._executor
+
+    @property
+    def pendientes(self):
+        return self._pendientes
+
+    def enviar(self, fn, *args):
+        executor = self._get_executor()
+        with self._lock:
+            if self._pendientes >= settings.LOGIN_MAX_PENDIENTES:
+                raise LoginSaturado()
+            self._pendientes += 1
+        try:
+            return executor.submit(self._ejecutar, fn, *args)
+        except Exception:
+            self._liberar()
+            raise
+
+    def ejecutar(self, fn, *args):
+        """Versión bloqueante para vistas síncronas (WSGI)."""
+        return self.enviar(fn, *args).result()
+
+    async def ejecutar_async(self, fn, *args):
+        """Versión para vistas async (ASGI): no bloquea el event loop."""
+        return await asyncio.wrap_future(self.enviar(fn, *args))
+
+    def _ejecutar(self, fn, *args):
+        # Los hilos del pool viven fuera del ciclo request/response de Django
+        close_old_connections()
+        try:
+            return fn(*args)
+        finally:
+            close_old_connections()
+            self._liberar()
+
+    def _liberar(self):
+        with self._lock:
+            self._pendientes -= 1
+
+
+pool_login = PoolLogin()
+
+
+def autenticar(email, password):
+    """
+    Verifica credenciales. Si el hash guardado no usa el hasher/iteraciones
+    configurados, check_password lo actualiza en este mismo login.
+    """
+    return authenticate(email=email, password=password)
+
+
+def respuesta_login(user):
+    """Tokens JWT y datos mínimos del usuario (sin serializers anidados)."""
+    refresh = RefreshToken.for_user(user)
+    rol = user.rol if user.rol_id else None
+
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'user': {
+            'id': user.id,
+            'email': user.email,
+            'username': user.username,
+            'rol': rol.nombre if rol else None,
+        }
+    }
@@ -0,0 +1,85 @@
+import json
+import os
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Prueba de carga del login: mide logins por segundo y por núcleo"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/login/')
+        parser.add_argument('--email', default='empleado@tienda.com')
+        parser.add_argument('--password', default='123')
+        parser.add_argument('--total', type=int, default=500, help="Logins a realizar")
+        parser.add_argument('--concurrencia', type=int, default=50, help="Clientes simultáneos")
+        parser.add_argument('--nucleos', type=int, default=os.cpu_count() or 1,
+                            help="Núcleos asignados al servidor (para logins/s/núcleo)")
+        parser.add_argument('--solo-hash', action='store_true',
+                            help="Mide sólo el hasher configurado, sin servidor HTTP")
+
+    def handle(self, *args, **options):
+        if options['solo_hash']:
+            self.medir_hash(options)
+        else:
+            self.medir_http(options)
+
+    # --------------------------------------------------------
+    # Hasher aislado
+    # --------------------------------------------------------
+    def medir_hash(self, options):
+        encoded = make_password(options['password'])
+        total = options['total']
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['nucleos']) as executor:
+            list(executor.map(lambda _: check_password(options['password'], encoded), range(total)))
+        duracion = time.perf_counter() - inicio
+
+        self.reportar(total, 0, duracion, [], options['nucleos'])
+
+    # --------------------------------------------------------
+    # Login extremo a extremo contra un servidor en marcha
+    # --------------------------------------------------------
+    def medir_http(self, options):
+        cuerpo = json.dumps({'email': options['email'], 'password': options['password']}).encode()
+
+        def login(_):
+            peticion = urllib.request.Request(
+                options['url'], data=cuerpo, headers={'Content-Type': 'application/json'}
+            )
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(peticion, timeout=60) as respuesta:
+                    respuesta.read()
+                    ok = respuesta.status == 200
+            except (urllib.error.URLError, TimeoutError):
+                ok = False
+            return ok, time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrencia']) as executor:
+            resultados = list(executor.map(login, range(options['total'])))
+        duracion = time.perf_counter() - inicio
+
+        latencias = [t for ok, t in resultados if ok]
+        errores = len(resultados) - len(latencias)
+        self.reportar(len(latencias), errores, duracion, latencias, options['nucleos'])
+
+    def reportar(self, exitosos, errores, duracion, latencias, nucleos):
+        por_segundo = exitosos / duracion if duracion else 0
+        self.stdout.write(f"Logins exitosos: {exitosos}  errores/rechazados: {errores}")
+        self.stdout.write(f"Duración: {duracion:.2f} s")
+        self.stdout.write(f"Logins/s: {por_segundo:.1f}  |  logins/s/núcleo: {por_segundo / nucleos:.1f}")
+        if len(latencias) >= 2:
+            cuantiles = statistics.quantiles(latencias, n=100)
+            self.stdout.write(
+                f"Latencia p50: {cuantiles[49] * 1000:.0f} ms  p95: {cuantiles[94] * 1000:.0f} ms  "
+                f"p99: {cuantiles[98] * 1000:.0f} ms"
+            )
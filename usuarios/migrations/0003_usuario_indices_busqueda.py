@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 23:30
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0002_alter_usuario_managers_alter_usuario_email'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('email', models.TextField())), name='text_pattern_ops'), name='usuario_email_prefijo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('first_name', models.TextField())), name='text_pattern_ops'), name='usuario_nombre_prefijo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('last_name', models.TextField())), name='text_pattern_ops'), name='usuario_apellido_prefijo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['estado_credito', 'estado'], name='usuario_credito_estado_idx'),
+        ),
+    ]
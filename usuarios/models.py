@@ -2,7 +2,9 @@ from django.db import models
 
 # Create your models here.
 from django.db import models
+from django.db.models.functions import Cast, Upper
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import OpClass
 
 # --- Permisos ---
 class Permiso(models.Model):
@@ -63,7 +65,11 @@ class CustomUserManager(BaseUserManager):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
         return self.create_user(email, password, **extra_fields)
-    
+
+    def get_by_natural_key(self, username):
+        # El login devuelve el nombre del rol: traerlo en la misma consulta
+        return self.select_related('rol').get(**{self.model.USERNAME_FIELD: username})
+
 class Usuario(AbstractUser):
     email = models.EmailField(unique=True)
     telefono = models.CharField(max_length=20, blank=True, null=True)
@@ -89,4 +95,20 @@ class Usuario(AbstractUser):
 
     class Meta:
         db_table = "usuario"
+        indexes = [
+            # Búsqueda por prefijo (email__istartswith genera UPPER(email::text) LIKE 'X%')
+            models.Index(
+                OpClass(Upper(Cast('email', models.TextField())), name='text_pattern_ops'),
+                name='usuario_email_prefijo_idx'
+            ),
+            models.Index(
+                OpClass(Upper(Cast('first_name', models.TextField())), name='text_pattern_ops'),
+                name='usuario_nombre_prefijo_idx'
+            ),
+            models.Index(
+                OpClass(Upper(Cast('last_name', models.TextField())), name='text_pattern_ops'),
+                name='usuario_apellido_prefijo_idx'
+            ),
+            models.Index(fields=['estado_credito', 'estado'], name='usuario_credito_estado_idx'),
+        ]
 
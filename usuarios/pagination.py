@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UsuarioPagination(CursorPagination):
+    """
+    Paginación por cursor sobre el id: no ejecuta COUNT(*) y cada página
+    cuesta lo mismo aunque la tabla tenga millones de clientes.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = 'id'
@@ -1,6 +1,6 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from usuarios.models import Usuario, Rol
+from usuarios.login import autenticar
 
 
 class RolSerializer(serializers.ModelSerializer):
@@ -24,7 +24,7 @@ class LoginSerializer(serializers.Serializer):
     def validate(self, data):
         email = data.get('email')
         password = data.get('password')
-        user = authenticate(email=email, password=password)
+        user = autenticar(email, password)
 
         if not user:
             raise serializers.ValidationError("Credenciales incorrectas.")
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from usuarios.views import UsuarioViewSet, LoginView
+from django.conf import settings
+from usuarios.views import UsuarioViewSet, LoginView, login_async
 
 router = DefaultRouter()
 router.register(r'usuarios', UsuarioViewSet, basename='usuarios')
 
 urlpatterns = [
-    path('login/', LoginView.as_view(), name='login'),
+    path('login/', login_async if settings.LOGIN_ASYNC else LoginView.as_view(), name='login'),
     path('', include(router.urls)),
 ]
@@ -6,30 +6,105 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+import json
 from usuarios.models import Usuario
 from usuarios.serializers import UsuarioSerializer, LoginSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from usuarios.pagination import UsuarioPagination
+from usuarios.login import pool_login, respuesta_login, LoginSaturado
 
 
 # --- Login ---
+def procesar_login(data):
+    serializer = LoginSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return respuesta_login(serializer.validated_data['user'])
+
+
+def respuesta_saturado():
+    return {'error': 'Demasiados inicios de sesión en curso. Intente nuevamente.'}
+
+
 class LoginView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        try:
+            datos = pool_login.ejecutar(procesar_login, request.data)
+        except LoginSaturado:
+            return Response(respuesta_saturado(), status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': '1'})
+
+        return Response(datos)
 
-        return Response({
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
-            'user': UsuarioSerializer(user).data
-        })
+
+# --- Login para despliegues ASGI ---
+@csrf_exempt
+@require_POST
+async def login_async(request):
+    """
+    Mismo contrato que LoginView, pero el hash se calcula en el pool de login
+    sin ocupar el hilo único que usa ASGI para las vistas síncronas.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'JSON inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        datos = await pool_login.ejecutar_async(procesar_login, data)
+    except LoginSaturado:
+        response = JsonResponse(respuesta_saturado(), status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '1'
+        return response
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+    return JsonResponse(datos)
 
 
 # --- CRUD de usuarios ---
 class UsuarioViewSet(viewsets.ModelViewSet):
-    queryset = Usuario.objects.all()
+    """
+    GET /api/usuarios/?rol=Cliente&estado_credito=activo&estado=true&email=juan&nombre=per
+
+    - rol: id o nombre del rol
+    - email / nombre: búsqueda por prefijo (sin distinguir mayúsculas)
+    """
+    queryset = Usuario.objects.select_related('rol')
     serializer_class = UsuarioSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = UsuarioPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+
+        rol = params.get('rol')
+        if rol:
+            queryset = queryset.filter(rol_id=rol) if rol.isdigit() else queryset.filter(rol__nombre=rol)
+
+        estado_credito = params.get('estado_credito')
+        if estado_credito:
+            queryset = queryset.filter(estado_credito=estado_credito)
+
+        estado = params.get('estado')
+        if estado is not None:
+            queryset = queryset.filter(estado=estado.lower() in ('true', '1'))
+
+        email = params.get('email')
+        if email:
+            queryset = queryset.filter(email__istartswith=email)
+
+        nombre = params.get('nombre')
+        if nombre:
+            queryset = queryset.filter(Q(first_name__istartswith=nombre) | Q(last_name__istartswith=nombre))
+
+        return queryset
@@ -1,10 +1,10 @@
 from django.contrib import admin
 
-from .models import SalesNote,DetailNote,CashPayment   
+from .models import SalesNote,DetailNote,CashPayment,VentaSincronizada
 
 
 
 admin.site.register(SalesNote)
 admin.site.register(DetailNote)
 admin.site.register(CashPayment)
-
+admin.site.register(VentaSincronizada)
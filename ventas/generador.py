@@ -0,0 +1,429 @@
+import io
+import itertools
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as hora, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from creditos.models import CreditConfig, CreditSale, CreditInstallment, CreditPayment
+from productos.models import Product, Category, Provider, ProviderProduct
+from usuarios.models import Usuario, Rol
+from ventas import resumen_horario
+from ventas.models import SalesNote, DetailNote, CashPayment
+
+
+# Generador masivo de ventas para pruebas de carga y benchmarks de reportes.
+#
+# Todo sale de un RNG con semilla: con la misma semilla y la misma base se
+# obtienen exactamente los mismos datos. Las filas se arman en memoria como
+# tuplas (con los ids ya reservados) y se escriben por lotes, una transacción
+# por lote: con COPY en PostgreSQL y con bulk_create en otros motores. Las ventas se
+# reparten por día con estacionalidad (mes, día de la semana y tendencia) y
+# la popularidad de productos y clientes sigue una ley de potencias (Pareto):
+# pocos productos concentran la mayoría de las ventas.
+
+CATEGORIAS = ["Ropa", "Calzado", "Tecnología", "Hogar", "Electrodomésticos", "Juguetes", "Deportes", "Librería"]
+PROVEEDORES = 6
+METODOS = ["efectivo", "tarjeta", "transferencia"]
+
+FACTOR_MES = {
+    1: 0.75, 2: 0.80, 3: 0.90, 4: 0.95, 5: 1.05, 6: 0.95,
+    7: 0.95, 8: 1.00, 9: 0.95, 10: 1.00, 11: 1.10, 12: 1.60,
+}
+# lunes ... domingo
+FACTOR_DIA_SEMANA = [0.90, 0.85, 0.90, 0.95, 1.15, 1.40, 0.85]
+# Horario de atención 8:00 - 21:59, con picos al mediodía y por la tarde
+PERFIL_HORARIO = {
+    8: 2, 9: 4, 10: 6, 11: 8, 12: 10, 13: 8, 14: 5,
+    15: 5, 16: 6, 17: 8, 18: 10, 19: 9, 20: 6, 21: 3,
+}
+ITEMS_POR_VENTA = ([1, 2, 3, 4, 5, 6], [35, 28, 18, 10, 6, 3])
+CANTIDAD_POR_ITEM = ([1, 2, 3, 4, 5], [60, 22, 10, 5, 3])
+
+# Columnas de cada tabla en el orden en que el generador arma las filas.
+# Las tablas que nadie referencia dejan que la base asigne el id.
+COLUMNAS = {
+    SalesNote: ['id', 'cliente_id', 'empleado_id', 'fecha', 'monto', 'tipo_pago', 'estado',
+                'created_at', 'updated_at'],
+    DetailNote: ['nota_id', 'producto_id', 'fecha', 'cantidad', 'subtotal'],
+    CashPayment: ['nota_id', 'fecha', 'monto', 'metodo', 'estado', 'created_at'],
+    CreditSale: ['id', 'nota_venta_id', 'total_original', 'total_con_intereses', 'tasa_aplicada',
+                 'saldo_pendiente', 'estado', 'fecha_inicial', 'fecha_vencimiento', 'created_at', 'updated_at'],
+    CreditInstallment: ['id', 'venta_credito_id', 'numero', 'cuota', 'fecha_vencimiento', 'monto',
+                        'pagado', 'fecha_pago'],
+    CreditPayment: ['cuota_id', 'fecha', 'monto_pagado', 'metodo', 'estado', 'created_at'],
+}
+
+# Campos con auto_now_add que bulk_create pisaría con la fecha de hoy
+CAMPOS_FECHA = [
+    (SalesNote, 'fecha'), (SalesNote, 'created_at'),
+    (DetailNote, 'fecha'),
+    (CashPayment, 'fecha'), (CashPayment, 'created_at'),
+    (CreditPayment, 'fecha'),
+]
+
+
+@contextmanager
+def fechas_manuales():
+    """Desactiva auto_now_add mientras se generan datos con fechas históricas."""
+    campos = [modelo._meta.get_field(nombre) for modelo, nombre in CAMPOS_FECHA]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+def pesos_pareto(n, exponente, rng):
+    """Pesos acumulados tipo Zipf, con el ranking barajado."""
+    rangos = list(range(1, n + 1))
+    rng.shuffle(rangos)
+    acumulado = 0.0
+    pesos = []
+    for rango in rangos:
+        acumulado += 1.0 / rango ** exponente
+        pesos.append(acumulado)
+    return pesos
+
+
+class GeneradorVentas:
+    def __init__(self, ventas, clientes=None, productos=None, empleados=20, dias=365,
+                 fecha_fin=None, semilla=42, tamano_lote=5000, prefijo='escala', usar_copy=None,
+                 progreso=None):
+        self.ventas = ventas
+        self.num_clientes = clientes or max(100, ventas // 20)
+        self.num_productos = productos or min(5000, max(50, ventas // 200))
+        self.num_empleados = empleados
+        self.dias = dias
+        self.fecha_fin = fecha_fin or timezone.localdate()
+        self.semilla = semilla
+        self.tamano_lote = tamano_lote
+        self.prefijo = prefijo
+        self.usar_copy = connection.vendor == 'postgresql' if usar_copy is None else usar_copy
+        self.progreso = progreso or (lambda texto: None)
+
+        self.rng = random.Random(semilla)
+        self.horas = list(PERFIL_HORARIO)
+        self.pesos_horas = list(itertools.accumulate(PERFIL_HORARIO.values()))
+        self.contadores = dict.fromkeys(
+            ['ventas', 'detalles', 'pagos_contado', 'creditos', 'cuotas', 'pagos_credito'], 0
+        )
+
+    def generar(self):
+        inicio = time.perf_counter()
+        self._preparar_catalogo()
+        self._preparar_usuarios()
+        self.config, _ = CreditConfig.objects.get_or_create(
+            monto_max=Decimal("500.00"),
+            tasa_interes=Decimal("10.00"),
+            cantidad_cuotas=3,
+            dias_entre_cuotas=10,
+        )
+
+        with fechas_manuales():
+            lote = []
+            for dia, cantidad in self._ventas_por_dia():
+                for _ in range(cantidad):
+                    lote.append(self._armar_venta(dia))
+                    if len(lote) >= self.tamano_lote:
+                        self._escribir_lote(lote)
+                        lote = []
+            if lote:
+                self._escribir_lote(lote)
+        # Las ventas escritas en masa no pasan por el resumen por hora
+        resumen_horario.reconstruir(self.fecha_fin - timedelta(days=self.dias - 1), self.fecha_fin)
+
+        duracion = time.perf_counter() - inicio
+        filas = sum(self.contadores.values())
+        return {
+            **self.contadores,
+            'filas': filas,
+            'duracion_segundos': round(duracion, 1),
+            'filas_por_segundo': round(filas / duracion) if duracion else None,
+        }
+
+    # --------------------------------------------------------
+    # Catálogo y usuarios (sólo se crea lo que falta)
+    # --------------------------------------------------------
+    def _preparar_catalogo(self):
+        rng = random.Random(f'{self.semilla}:catalogo')
+        categorias = [Category.objects.get_or_create(descripcion=c)[0].id for c in CATEGORIAS]
+        proveedores = [
+            Provider.objects.get_or_create(nombre=f"Proveedor {self.prefijo} {i}")[0].id
+            for i in range(1, PROVEEDORES + 1)
+        ]
+
+        prefijo_codigo = f'{self.prefijo.upper()}-'
+        existentes = set(Product.objects.filter(codigo__startswith=prefijo_codigo).values_list('codigo', flat=True))
+
+        # Se sortean los atributos de todos los productos (existan o no) para
+        # que la secuencia del RNG no dependa de lo que ya hay en la base
+        nuevos = []
+        precios_compra = {}
+        for i in range(1, self.num_productos + 1):
+            codigo = f'{prefijo_codigo}{i:06d}'
+            precio = Decimal(min(5000, max(5, math.exp(rng.gauss(4.0, 0.9))))).quantize(Decimal('0.01'))
+            categoria = rng.choice(categorias)
+            stock = rng.randint(0, 500)
+            surtidores = rng.sample(proveedores, rng.randint(1, 3))
+            margenes = [Decimal(str(round(rng.uniform(0.45, 0.75), 2))) for _ in surtidores]
+            if codigo in existentes:
+                continue
+            nuevos.append(Product(
+                codigo=codigo,
+                nombre=f"Producto {self.prefijo} {i}",
+                precio=precio,
+                descripcion=f"Producto generado {i}",
+                stock=stock,
+                categoria_id=categoria,
+            ))
+            precios_compra[codigo] = [
+                (proveedor, (precio * margen).quantize(Decimal('0.01')))
+                for proveedor, margen in zip(surtidores, margenes)
+            ]
+
+        for i in range(0, len(nuevos), self.tamano_lote):
+            with transaction.atomic():
+                creados = Product.objects.bulk_create(nuevos[i:i + self.tamano_lote])
+                ProviderProduct.objects.bulk_create([
+                    ProviderProduct(proveedor_id=proveedor, producto_id=producto.pk, precio_compra=costo)
+                    for producto in creados
+                    for proveedor, costo in precios_compra[producto.codigo]
+                ], ignore_conflicts=True)
+        if nuevos:
+            self.progreso(f"📦 {len(nuevos)} productos creados.")
+
+        self.productos = list(
+            Product.objects.filter(codigo__startswith=prefijo_codigo).order_by('codigo').values_list('id', 'precio')
+        )[:self.num_productos]
+        self.indices_productos = range(len(self.productos))
+        self.pesos_productos = pesos_pareto(len(self.productos), 1.1, rng)
+
+    def _preparar_usuarios(self):
+        rng = random.Random(f'{self.semilla}:usuarios')
+        self.clientes = self._crear_usuarios('cliente', self.num_clientes, "Cliente")
+        self.empleados = self._crear_usuarios('empleado', self.num_empleados, "Empleado", is_staff=True)
+        self.pesos_clientes = pesos_pareto(len(self.clientes), 0.8, rng)
+
+    def _crear_usuarios(self, tipo, cantidad, nombre_rol, **extra):
+        rol = Rol.objects.filter(nombre=nombre_rol).first()
+        prefijo_email = f'{self.prefijo}.{tipo}'
+        existentes = dict(
+            Usuario.objects.filter(email__startswith=prefijo_email).values_list('email', 'id')
+        )
+
+        # Un solo hash para todos: hashear miles de contraseñas tomaría minutos
+        password = make_password("123")
+        nuevos = [
+            Usuario(
+                email=f'{prefijo_email}{i}@tienda.com',
+                username=f'{self.prefijo}_{tipo}{i}',
+                first_name=f"{nombre_rol} {i}",
+                password=password,
+                rol=rol,
+                **extra,
+            )
+            for i in range(1, cantidad + 1)
+            if f'{prefijo_email}{i}@tienda.com' not in existentes
+        ]
+        for usuario in Usuario.objects.bulk_create(nuevos, batch_size=self.tamano_lote):
+            existentes[usuario.email] = usuario.pk
+        if nuevos:
+            self.progreso(f"👥 {len(nuevos)} usuarios '{tipo}' creados.")
+
+        return [existentes[f'{prefijo_email}{i}@tienda.com'] for i in range(1, cantidad + 1)]
+
+    # --------------------------------------------------------
+    # Ventas
+    # --------------------------------------------------------
+    def _ventas_por_dia(self):
+        """Reparte el total de ventas entre los días según la estacionalidad."""
+        dias = [self.fecha_fin - timedelta(days=d) for d in range(self.dias - 1, -1, -1)]
+        pesos = [
+            FACTOR_MES[dia.month] * FACTOR_DIA_SEMANA[dia.weekday()] * (1 + 0.3 * i / self.dias)
+            for i, dia in enumerate(dias)
+        ]
+        total = sum(pesos)
+        cantidades = [int(self.ventas * p / total) for p in pesos]
+        for dia in self.rng.choices(range(len(dias)), weights=pesos, k=self.ventas - sum(cantidades)):
+            cantidades[dia] += 1
+        return zip(dias, cantidades)
+
+    def _armar_venta(self, dia):
+        rng = self.rng
+        minuto = rng.randrange(60)
+        hora_venta = rng.choices(self.horas, cum_weights=self.pesos_horas)[0]
+        momento = timezone.make_aware(datetime.combine(dia, hora(hora_venta, minuto)))
+
+        elegidos = set()
+        for _ in range(rng.choices(*ITEMS_POR_VENTA)[0]):
+            elegidos.add(rng.choices(self.indices_productos, cum_weights=self.pesos_productos)[0])
+
+        items = []
+        total = Decimal("0.00")
+        for indice in sorted(elegidos):
+            producto_id, precio = self.productos[indice]
+            cantidad = rng.choices(*CANTIDAD_POR_ITEM)[0]
+            subtotal = precio * cantidad
+            items.append((producto_id, cantidad, subtotal))
+            total += subtotal
+
+        return {
+            'cliente_id': rng.choices(self.clientes, cum_weights=self.pesos_clientes)[0],
+            'empleado_id': rng.choice(self.empleados),
+            'fecha': dia,
+            'momento': momento,
+            'monto': total,
+            'items': items,
+            'metodo': rng.choice(METODOS),
+            'credito': total <= self.config.monto_max and rng.random() < 0.3,
+        }
+
+    def _escribir_lote(self, lote):
+        ventas = []
+        detalles = []
+        pagos = []
+        creditos = []
+        with transaction.atomic():
+            for venta, nota_id in zip(lote, self._reservar_ids(SalesNote, len(lote))):
+                credito = venta['credito']
+                ventas.append((
+                    nota_id, venta['cliente_id'], venta['empleado_id'], venta['fecha'], venta['monto'],
+                    "credito" if credito else "contado", "pendiente" if credito else "completado",
+                    venta['momento'], venta['momento'],
+                ))
+                for producto_id, cantidad, subtotal in venta['items']:
+                    detalles.append((nota_id, producto_id, venta['fecha'], cantidad, subtotal))
+                if credito:
+                    creditos.append((nota_id, venta))
+                else:
+                    pagos.append((
+                        nota_id, venta['fecha'], venta['monto'], venta['metodo'], "completado", venta['momento'],
+                    ))
+
+            self._insertar(SalesNote, ventas)
+            self._insertar(DetailNote, detalles)
+            self._insertar(CashPayment, pagos)
+            self._escribir_creditos(creditos)
+
+        self.contadores['ventas'] += len(ventas)
+        self.contadores['detalles'] += len(detalles)
+        self.contadores['pagos_contado'] += len(pagos)
+        self.progreso(f"💰 {self.contadores['ventas']}/{self.ventas} ventas")
+
+    def _escribir_creditos(self, creditos_nota):
+        config = self.config
+        rng = self.rng
+        creditos = []
+        cuotas = []
+        pagos = []
+
+        ids_credito = self._reservar_ids(CreditSale, len(creditos_nota))
+        ids_cuota = iter(self._reservar_ids(CreditInstallment, len(creditos_nota) * config.cantidad_cuotas))
+        for credito_id, (nota_id, venta) in zip(ids_credito, creditos_nota):
+            fecha = venta['fecha']
+            total_con_interes = round(venta['monto'] + venta['monto'] * (config.tasa_interes / 100), 2)
+            monto_cuota = round(total_con_interes / config.cantidad_cuotas, 2)
+
+            # Las cuotas ya vencidas casi siempre están pagadas; las futuras, no
+            pagado = Decimal("0.00")
+            pagadas = 0
+            atrasada = False
+            for numero in range(1, config.cantidad_cuotas + 1):
+                cuota_id = next(ids_cuota)
+                vencimiento = fecha + timedelta(days=numero * config.dias_entre_cuotas)
+                fecha_pago = None
+                if vencimiento <= self.fecha_fin and rng.random() < 0.85:
+                    fecha_pago = max(fecha, vencimiento - timedelta(days=rng.randint(0, 5)))
+                    pagos.append((
+                        cuota_id, fecha_pago, monto_cuota, rng.choice(METODOS), "completado", venta['momento'],
+                    ))
+                    pagado += monto_cuota
+                    pagadas += 1
+                elif vencimiento <= self.fecha_fin:
+                    atrasada = True
+                cuotas.append((
+                    cuota_id, credito_id, numero, f"Cuota {numero}", vencimiento, monto_cuota,
+                    fecha_pago is not None, fecha_pago,
+                ))
+
+            if pagadas == config.cantidad_cuotas:
+                estado = "pagado"
+            elif atrasada:
+                estado = "atrasado"
+            else:
+                estado = "activo"
+
+            creditos.append((
+                credito_id, nota_id, venta['monto'], total_con_interes, config.tasa_interes,
+                Decimal("0.00") if estado == "pagado" else max(Decimal("0.00"), total_con_interes - pagado),
+                estado, fecha, fecha + timedelta(days=config.cantidad_cuotas * config.dias_entre_cuotas),
+                venta['momento'], venta['momento'],
+            ))
+
+        self._insertar(CreditSale, creditos)
+        self._insertar(CreditInstallment, cuotas)
+        self._insertar(CreditPayment, pagos)
+
+        self.contadores['creditos'] += len(creditos)
+        self.contadores['cuotas'] += len(cuotas)
+        self.contadores['pagos_credito'] += len(pagos)
+
+    # --------------------------------------------------------
+    # Escritura: COPY en PostgreSQL, bulk_create en el resto
+    # --------------------------------------------------------
+    def _reservar_ids(self, modelo, cantidad):
+        """Ids para filas que otras tablas referencian, antes de insertarlas."""
+        if not cantidad:
+            return []
+        tabla = modelo._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                    [tabla, cantidad]
+                )
+                return [fila[0] for fila in cursor.fetchall()]
+
+            # Sin secuencias: vale porque el generador es el único que escribe
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(tabla)}")
+            inicio = cursor.fetchone()[0] + 1
+            return list(range(inicio, inicio + cantidad))
+
+    def _insertar(self, modelo, filas):
+        if not filas:
+            return
+        columnas = COLUMNAS[modelo]
+        if self.usar_copy:
+            texto = io.StringIO()
+            for fila in filas:
+                texto.write('\t'.join(map(_valor_copy, fila)))
+                texto.write('\n')
+            texto.seek(0)
+            quote = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {quote(modelo._meta.db_table)} ({', '.join(map(quote, columnas))}) FROM STDIN",
+                    texto
+                )
+        else:
+            modelo.objects.bulk_create([modelo(**dict(zip(columnas, fila))) for fila in filas])
+
+
+def _valor_copy(valor):
+    """Un valor en el formato de texto de COPY."""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if isinstance(valor, str):
+        return valor.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return str(valor)
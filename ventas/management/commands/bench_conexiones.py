@@ -0,0 +1,108 @@
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from usuarios.models import Usuario
+from ventas.models import SalesNote
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de /api/productos/ y /api/ventas/ comparando conexiones "
+        "por petición contra conexiones persistentes (CONN_MAX_AGE)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modos', default='0,60',
+                            help="Valores de CONN_MAX_AGE a comparar, separados por coma ('None' = sin límite)")
+        parser.add_argument('--total', type=int, default=1000, help="Peticiones por modo y ruta")
+        parser.add_argument('--concurrencia', type=int, default=8, help="Hilos simultáneos")
+        parser.add_argument('--email', help="Usuario con el que se autentican las peticiones")
+
+    def handle(self, *args, **options):
+        usuario = (
+            Usuario.objects.get(email=options['email']) if options['email']
+            else Usuario.objects.filter(is_active=True).order_by('id').first()
+        )
+        ventas = list(SalesNote.objects.order_by('-id').values_list('id', flat=True)[:1000])
+        if usuario is None or not ventas:
+            raise CommandError("Se necesitan al menos un usuario y una venta (python manage.py seed_ventas).")
+
+        rutas = {
+            '/api/productos/': lambda: '/api/productos/',
+            '/api/ventas/<id>/': lambda: f'/api/ventas/{random.choice(ventas)}/',
+        }
+
+        creadas = {'total': 0}
+        lock = threading.Lock()
+
+        def contar(sender, connection, **kwargs):
+            with lock:
+                creadas['total'] += 1
+
+        connection_created.connect(contar)
+        ajustes = connections.settings['default']
+        original = ajustes['CONN_MAX_AGE']
+        try:
+            for modo in options['modos'].split(','):
+                ajustes['CONN_MAX_AGE'] = None if modo.strip() == 'None' else int(modo)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"CONN_MAX_AGE={ajustes['CONN_MAX_AGE']} "
+                    f"(health checks: {ajustes.get('CONN_HEALTH_CHECKS', False)})"
+                ))
+                for etiqueta, ruta in rutas.items():
+                    connections.close_all()
+                    creadas['total'] = 0
+                    self.medir(etiqueta, ruta, usuario, options, creadas)
+        finally:
+            ajustes['CONN_MAX_AGE'] = original
+            connection_created.disconnect(contar)
+
+    def medir(self, etiqueta, ruta, usuario, options, creadas):
+        # Se llama directo al WSGIHandler (no al Client de pruebas, que desactiva
+        # close_old_connections): cada petición recorre el ciclo completo y al
+        # cerrarse la respuesta Django decide si cierra o reutiliza la conexión
+        handler = WSGIHandler()
+        fabrica = RequestFactory(
+            HTTP_HOST='localhost',
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}',
+        )
+
+        def peticion(_):
+            environ = fabrica.get(ruta()).environ
+            estado = []
+            inicio = time.perf_counter()
+            respuesta = handler(environ, lambda status, headers, exc_info=None: estado.append(status))
+            try:
+                for _ in respuesta:
+                    pass
+            finally:
+                respuesta.close()
+            return time.perf_counter() - inicio, int(estado[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=options['concurrencia']) as executor:
+            # Calentamiento: primera conexión de cada hilo
+            list(executor.map(peticion, range(options['concurrencia'])))
+            creadas['total'] = 0
+
+            inicio = time.perf_counter()
+            resultados = list(executor.map(peticion, range(options['total'])))
+            duracion = time.perf_counter() - inicio
+
+        latencias = sorted(r[0] * 1000 for r in resultados)
+        errores = sum(1 for r in resultados if r[1] >= 400)
+        cuantiles = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else latencias * 99
+        self.stdout.write(
+            f"  {etiqueta:<20} {len(resultados) / duracion:8.1f} req/s  "
+            f"p50 {cuantiles[49]:7.1f} ms  p95 {cuantiles[94]:7.1f} ms  p99 {cuantiles[98]:7.1f} ms  "
+            f"conexiones abiertas: {creadas['total']:5d}  errores: {errores}"
+        )
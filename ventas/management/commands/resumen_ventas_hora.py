@@ -0,0 +1,29 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ventas.resumen_horario import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye desde sales_note el resumen de ventas por hora (cron: cada noche, "
+        "para ayer). Con --dias N también los N-1 días anteriores; sirve para la carga inicial"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help="Último día a reconstruir (AAAA-MM-DD); por defecto ayer")
+        parser.add_argument('--dias', type=int, default=1, help="Días hacia atrás desde --fecha")
+
+    def handle(self, *args, **options):
+        try:
+            fecha = date.fromisoformat(options['fecha']) if options['fecha'] else timezone.localdate() - timedelta(days=1)
+        except ValueError:
+            raise CommandError("--fecha debe tener el formato AAAA-MM-DD")
+
+        inicio = time.perf_counter()
+        desde = fecha - timedelta(days=options['dias'] - 1)
+        horas = reconstruir(desde, fecha)
+        self.stdout.write(f"{desde} a {fecha}: {horas} horas con ventas ({time.perf_counter() - inicio:.3f}s)")
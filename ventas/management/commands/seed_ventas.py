@@ -10,12 +10,29 @@ from usuarios.models import Usuario, Rol
 from productos.models import Product, Category, Provider, ProviderProduct
 from ventas.models import SalesNote, DetailNote, CashPayment
 from creditos.models import CreditConfig, CreditSale, CreditInstallment, CreditPayment
+from ventas.generador import GeneradorVentas
 
 
 class Command(BaseCommand):
     help = "Genera usuarios masivos, productos, ventas al contado y a crédito distribuidas en 6 meses"
 
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=int,
+                            help="Genera N ventas masivas con bulk_create (datos para benchmarks)")
+        parser.add_argument('--clientes', type=int, help="Clientes para --escala (por defecto N/20)")
+        parser.add_argument('--productos', type=int, help="Productos para --escala (por defecto N/200, máx. 5000)")
+        parser.add_argument('--empleados', type=int, default=20)
+        parser.add_argument('--dias', type=int, default=365, help="Días hacia atrás desde hoy")
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=5000, help="Ventas por lote/transacción")
+        parser.add_argument('--sin-copy', action='store_true',
+                            help="Usar bulk_create aunque la base sea PostgreSQL")
+
     def handle(self, *args, **options):
+        if options['escala']:
+            self.seed_escala(options)
+            return
+
         self.stdout.write(self.style.WARNING("🚀 Iniciando seeder masivo de ventas y créditos..."))
         self.create_massive_users()
         self.create_products_if_needed()
@@ -223,3 +240,30 @@ class Command(BaseCommand):
                     metodo=random.choice(["efectivo", "tarjeta", "transferencia"]),
                     fecha=fecha_v,
                 )
+
+
+    # --------------------------------------------------------
+    # 5️⃣ Modo masivo (--escala)
+    # --------------------------------------------------------
+    def seed_escala(self, options):
+        self.stdout.write(self.style.WARNING(
+            f"🚀 Generando {options['escala']} ventas (semilla {options['semilla']})..."
+        ))
+        generador = GeneradorVentas(
+            ventas=options['escala'],
+            clientes=options['clientes'],
+            productos=options['productos'],
+            empleados=options['empleados'],
+            dias=options['dias'],
+            semilla=options['semilla'],
+            tamano_lote=options['lote'],
+            usar_copy=False if options['sin_copy'] else None,
+            progreso=self.stdout.write,
+        )
+        resumen = generador.generar()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {resumen['ventas']} ventas, {resumen['detalles']} detalles, "
+            f"{resumen['pagos_contado']} pagos contado, {resumen['creditos']} créditos, "
+            f"{resumen['cuotas']} cuotas, {resumen['pagos_credito']} pagos de crédito "
+            f"en {resumen['duracion_segundos']} s ({resumen['filas_por_segundo']} filas/s)"
+        ))
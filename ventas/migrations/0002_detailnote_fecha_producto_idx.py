@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0004_product_codigo'),
+        ('ventas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detailnote',
+            index=models.Index(fields=['fecha', 'producto'], include=('cantidad', 'subtotal'), name='detail_note_fecha_prod_idx'),
+        ),
+    ]
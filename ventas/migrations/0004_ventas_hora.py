@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_venta_sincronizada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentasHora',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hora', models.DateTimeField(unique=True)),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'ventas_hora',
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-19 00:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_usuario_indices_busqueda'),
+        ('ventas', '0004_ventas_hora'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SegmentoRFM',
+            fields=[
+                ('cliente', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='segmento_rfm', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('ultima_compra', models.DateField()),
+                ('frecuencia', models.PositiveIntegerField()),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('r_score', models.PositiveSmallIntegerField()),
+                ('f_score', models.PositiveSmallIntegerField()),
+                ('m_score', models.PositiveSmallIntegerField()),
+                ('rfm_total', models.PositiveSmallIntegerField()),
+                ('segmento', models.CharField(max_length=30)),
+                ('calculado', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'segmento_rfm',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='salesnote',
+            index=models.Index(fields=['created_at'], name='sales_note_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='segmentorfm',
+            index=models.Index(fields=['-rfm_total', 'cliente'], name='rfm_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='segmentorfm',
+            index=models.Index(fields=['segmento', '-rfm_total', 'cliente'], name='rfm_segmento_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='segmentorfm',
+            index=models.Index(fields=['calculado'], name='rfm_calculado_idx'),
+        ),
+    ]
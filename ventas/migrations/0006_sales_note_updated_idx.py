@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-19 01:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0005_segmento_rfm'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesnote',
+            index=models.Index(fields=['updated_at'], name='sales_note_updated_idx'),
+        ),
+    ]
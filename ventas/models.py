@@ -24,6 +24,13 @@ class SalesNote(models.Model):
     class Meta:
         db_table = 'sales_note'
         ordering = ['-fecha']
+        indexes = [
+            # Ventas por hora de venta (series, resumen por hora)
+            models.Index(fields=['created_at'], name='sales_note_created_idx'),
+            # Ventas escritas desde la última corrida (RFM incremental): las
+            # sincronizadas desde una caja llegan con created_at en el pasado
+            models.Index(fields=['updated_at'], name='sales_note_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Venta #{self.id} - {self.cliente.email}"
@@ -39,6 +46,14 @@ class DetailNote(models.Model):
 
     class Meta:
         db_table = 'detail_note'
+        indexes = [
+            # Reportes por período y producto: index-only scan sin tocar la tabla
+            models.Index(
+                fields=['fecha', 'producto'],
+                include=['cantidad', 'subtotal'],
+                name='detail_note_fecha_prod_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.producto.nombre} x {self.cantidad}"
@@ -61,4 +76,65 @@ class CashPayment(models.Model):
         db_table = 'cash_payment'
 
     def __str__(self):
-        return f"Pago {self.metodo} - {self.monto}"
\ No newline at end of file
+        return f"Pago {self.metodo} - {self.monto}"
+
+
+class VentaSincronizada(models.Model):
+    """Clave de idempotencia de una venta recibida por /api/ventas/sync/."""
+    clave = models.CharField(max_length=64, unique=True)
+    nota = models.ForeignKey(SalesNote, on_delete=models.SET_NULL, null=True, related_name='sincronizaciones')
+    usuario = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'venta_sincronizada'
+
+    def __str__(self):
+        return f"{self.clave} -> Venta #{self.nota_id}"
+
+
+class VentasHora(models.Model):
+    """
+    Ventas de cada hora (resumen para el mapa de calor; ventas/resumen_horario.py).
+    `hora` es el inicio de la hora en TIME_ZONE.
+    """
+    hora = models.DateTimeField(unique=True)
+    num_ventas = models.IntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'ventas_hora'
+
+    def __str__(self):
+        return f"{self.hora}: {self.num_ventas} ventas"
+
+
+class SegmentoRFM(models.Model):
+    """
+    Puntajes RFM de un cliente (1 = peor, 5 = mejor) y su segmento
+    (reportes/rfm.py, manage.py calcular_rfm). La recencia se calcula al
+    leer, desde ultima_compra.
+    """
+    cliente = models.OneToOneField(Usuario, on_delete=models.CASCADE, primary_key=True, related_name='segmento_rfm')
+    ultima_compra = models.DateField()
+    frecuencia = models.PositiveIntegerField()
+    monto = models.DecimalField(max_digits=14, decimal_places=2)
+    r_score = models.PositiveSmallIntegerField()
+    f_score = models.PositiveSmallIntegerField()
+    m_score = models.PositiveSmallIntegerField()
+    rfm_total = models.PositiveSmallIntegerField()
+    segmento = models.CharField(max_length=30)
+    # Inicio de la corrida que escribió la fila por última vez
+    calculado = models.DateTimeField()
+
+    class Meta:
+        db_table = 'segmento_rfm'
+        indexes = [
+            # Páginas del reporte, con y sin filtro por segmento
+            models.Index(fields=['-rfm_total', 'cliente'], name='rfm_total_idx'),
+            models.Index(fields=['segmento', '-rfm_total', 'cliente'], name='rfm_segmento_total_idx'),
+            models.Index(fields=['calculado'], name='rfm_calculado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cliente_id}: {self.segmento} ({self.r_score}{self.f_score}{self.m_score})"
@@ -1,17 +1,25 @@
+from collections import defaultdict
+
 from rest_framework import serializers
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 from django.db import transaction
 
+from config.metricas import VENTAS_CONFIRMADAS, etiqueta_tipo_pago
+from config.serializers import ClavePrimariaEnLote, ListaEnLoteSerializer, resolver_en_lote
+from ventas import resumen_horario
 from ventas.models import SalesNote, DetailNote, CashPayment
+from productos import inventario, reservas
 from productos.models import Product
 from creditos.models import CreditConfig, CreditSale, CreditInstallment
 
 
 class DetailNoteSerializer(serializers.ModelSerializer):
     # para crear: usar producto_id; para leer: producto embebido simple
-    producto_id = serializers.PrimaryKeyRelatedField(
+    # (en los detalles de una venta todos los productos se leen con una consulta)
+    producto_id = ClavePrimariaEnLote(
         queryset=Product.objects.all(), source='producto', write_only=True
     )
 
@@ -19,49 +27,71 @@ class DetailNoteSerializer(serializers.ModelSerializer):
         model = DetailNote
         fields = ['id', 'nota', 'producto', 'producto_id', 'fecha', 'cantidad', 'subtotal']
         read_only_fields = ['id', 'nota', 'fecha', 'producto']
+        list_serializer_class = ListaEnLoteSerializer
 
 
 class SalesNoteSerializer(serializers.ModelSerializer):
     detalles = DetailNoteSerializer(many=True, write_only=True)
+    # Clave de una reserva de stock (productos/reservas.py) que esta venta consume
+    reserva = serializers.CharField(max_length=64, write_only=True, required=False)
 
     class Meta:
         model = SalesNote
         fields = ['id', 'cliente', 'empleado', 'fecha', 'monto', 'tipo_pago', 'estado',
-                  'created_at', 'updated_at', 'detalles']
+                  'created_at', 'updated_at', 'detalles', 'reserva']
         read_only_fields = ['id', 'fecha', 'estado', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         detalles_data = validated_data.pop('detalles', [])
+        clave_reserva = validated_data.pop('reserva', None)
 
         # --- Abrimos una transacción atómica ---
         with transaction.atomic():
             nota = SalesNote.objects.create(**validated_data)
 
-            total_calculado = Decimal('0')
-            for d in detalles_data:
-                producto = d['producto']
-                cantidad = d['cantidad']
-                subtotal = d['subtotal']
+            # --- Lo reservado ya está apartado: no se vuelve a verificar ---
+            try:
+                reservado = reservas.consumir(clave_reserva, nota, self.context['request'].user) if clave_reserva else {}
+            except reservas.ErrorReserva as e:
+                raise serializers.ValidationError(e.errores)
 
-                # --- Verificar stock disponible ---
-                if producto.stock < cantidad:
+            solicitado = defaultdict(int)
+            for d in detalles_data:
+                solicitado[d['producto'].pk] += d['cantidad']
+
+            # --- Verificar stock disponible de lo que no cubre la reserva ---
+            # Stock leído de nuevo y bloqueado: el de la validación puede estar desactualizado
+            sin_reserva = {
+                pk: cantidad - reservado.get(pk, 0)
+                for pk, cantidad in solicitado.items() if cantidad > reservado.get(pk, 0)
+            }
+            productos = resolver_en_lote(Product.objects.all(), sin_reserva, bloquear=True) if sin_reserva else {}
+            for pk, cantidad in sin_reserva.items():
+                producto = productos[pk]
+                # Product.reservado todavía incluye la reserva propia
+                disponible = producto.disponible + reservado.get(pk, 0)
+                if disponible < cantidad:
                     raise serializers.ValidationError(
-                        f"Stock insuficiente para '{producto.nombre}'. Disponible: {producto.stock}, solicitado: {cantidad}."
+                        f"Stock insuficiente para '{producto.nombre}'. Disponible: {max(disponible, 0)}, solicitado: {cantidad}."
                     )
 
+            total_calculado = Decimal('0')
+            for d in detalles_data:
                 # --- Crear el detalle ---
                 DetailNote.objects.create(
                     nota=nota,
-                    producto=producto,
-                    cantidad=cantidad,
-                    subtotal=subtotal
+                    producto=d['producto'],
+                    cantidad=d['cantidad'],
+                    subtotal=d['subtotal']
                 )
+                total_calculado += Decimal(d['subtotal'])
 
-                # --- Restar stock del producto ---
-                producto.stock -= cantidad
-                producto.save(update_fields=['stock'])
-
-                total_calculado += Decimal(subtotal)
+            # --- Restar stock (y lo reservado, aunque se haya vendido menos) ---
+            inventario.mover_stock(
+                stock={pk: -cantidad for pk, cantidad in solicitado.items()},
+                reservado={pk: -cantidad for pk, cantidad in reservado.items()},
+                tipo='venta', nota=nota,
+            )
 
             # --- Flujo de pago ---
             if nota.tipo_pago == "efectivo":
@@ -108,5 +138,45 @@ class SalesNoteSerializer(serializers.ModelSerializer):
                         pagado=False
                     )
 
+            etiqueta = etiqueta_tipo_pago(nota.tipo_pago)
+            transaction.on_commit(lambda: VENTAS_CONFIRMADAS.inc(tipo_pago=etiqueta), robust=True)
+            resumen_horario.al_confirmar([nota])
+
         return nota
 
+
+
+# --------------------------------------------------------
+# Sincronización de cajas (/api/ventas/sync/)
+# --------------------------------------------------------
+class DetalleSyncSerializer(serializers.Serializer):
+    producto_id = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1)
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class VentaSyncSerializer(serializers.Serializer):
+    """Forma y tipos de una venta del lote; productos y usuarios se resuelven para todo el lote."""
+    # Adelanto tolerado del reloj de la caja
+    DESFASE_RELOJ = timedelta(minutes=5)
+
+    clave = serializers.CharField(max_length=64)
+    cliente = serializers.IntegerField(min_value=1)
+    empleado = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    monto = serializers.DecimalField(max_digits=10, decimal_places=2)
+    tipo_pago = serializers.CharField(max_length=50)
+    # Momento de la venta en la caja; sin él, el de la sincronización
+    fecha_hora = serializers.DateTimeField(required=False, allow_null=True)
+    detalles = DetalleSyncSerializer(many=True, allow_empty=False)
+
+    def validate_fecha_hora(self, valor):
+        if valor is None:
+            return valor
+        ahora = timezone.now()
+        if valor > ahora + self.DESFASE_RELOJ:
+            raise serializers.ValidationError("La fecha de la venta está en el futuro.")
+        if valor < ahora - timedelta(days=settings.VENTAS_SYNC_MAX_DIAS):
+            raise serializers.ValidationError(
+                f"La venta tiene más de {settings.VENTAS_SYNC_MAX_DIAS} días; regístrela manualmente."
+            )
+        return min(valor, ahora)
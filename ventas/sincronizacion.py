@@ -0,0 +1,332 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from config.metricas import VENTAS_CONFIRMADAS, etiqueta_tipo_pago
+from config.serializers import resolver_en_lote
+from creditos.models import CreditConfig, CreditInstallment, CreditSale
+from productos import inventario, versiones
+from productos.models import MovimientoInventario, Product
+from usuarios.models import Usuario
+from ventas import resumen_horario
+from ventas.models import CashPayment, DetailNote, SalesNote, VentaSincronizada
+from ventas.serializers import VentaSyncSerializer
+
+
+# Sincronización de las ventas hechas sin conexión en las cajas.
+#
+# La caja reenvía sus ventas en lote, cada una con una clave generada por ella
+# (p. ej. un UUID). Una clave ya registrada no se vuelve a procesar: se
+# responde con la venta creada la primera vez, así los reintentos no duplican
+# ventas ni descuentan stock dos veces. Productos y usuarios se resuelven con
+# una consulta para todo el lote, y las ventas se escriben con operaciones
+# masivas en una transacción cada VENTAS_SYNC_LOTE ventas. Cada venta se
+# informa por separado: las que fallan no frenan al resto. Con fecha_hora la
+# venta queda fechada cuando se hizo en la caja (reportes por hora, series,
+# RFM); el stock y el diario de inventario se mueven al sincronizar.
+
+CREADA = 'creada'
+DUPLICADA = 'duplicada'
+ERROR = 'error'
+
+
+class ErrorSincronizacion(Exception):
+    pass
+
+
+class SincronizadorVentas:
+    def __init__(self, usuario, tamano_lote=None):
+        self.usuario = usuario
+        self.tamano_lote = tamano_lote or settings.VENTAS_SYNC_LOTE
+        self.resultados = []
+
+    def sincronizar(self, ventas):
+        if not isinstance(ventas, list) or not ventas:
+            raise ErrorSincronizacion("'ventas' debe ser una lista no vacía.")
+        if len(ventas) > settings.VENTAS_SYNC_MAX:
+            raise ErrorSincronizacion(f"Se admiten hasta {settings.VENTAS_SYNC_MAX} ventas por petición.")
+
+        inicio = time.perf_counter()
+        self.resultados = [None] * len(ventas)
+
+        validas, repetidas = self._validar(ventas)
+        validas = self._descartar_registradas(validas)
+        validas = self._resolver_referencias(validas)
+        for i in range(0, len(validas), self.tamano_lote):
+            self._procesar_lote(validas[i:i + self.tamano_lote])
+
+        # La misma clave dos veces en el lote: la segunda es un reintento de la primera
+        for indice, original in repetidas:
+            resultado = dict(self.resultados[original], indice=indice)
+            if resultado['estado'] == CREADA:
+                resultado['estado'] = DUPLICADA
+            self.resultados[indice] = resultado
+
+        duracion = time.perf_counter() - inicio
+        estados = [r['estado'] for r in self.resultados]
+        return {
+            'ventas': self.resultados,
+            'creadas': estados.count(CREADA),
+            'duplicadas': estados.count(DUPLICADA),
+            'con_error': estados.count(ERROR),
+            'duracion_segundos': round(duracion, 3),
+        }
+
+    def _resultado(self, indice, clave, estado, nota_id=None, errores=None):
+        self.resultados[indice] = {
+            'indice': indice,
+            'clave': clave,
+            'estado': estado,
+            'id': nota_id,
+            'errores': errores or [],
+        }
+
+    def _validar(self, ventas):
+        """Devuelve [(indice, datos)] de las ventas bien formadas y [(indice, indice_original)] repetidas."""
+        validas = []
+        repetidas = []
+        vistas = {}
+        for indice, venta in enumerate(ventas):
+            serializer = VentaSyncSerializer(data=venta)
+            if not serializer.is_valid():
+                clave = venta.get('clave') if isinstance(venta, dict) else None
+                self._resultado(indice, clave, ERROR, errores=[serializer.errors])
+                continue
+
+            datos = serializer.validated_data
+            if datos['clave'] in vistas:
+                repetidas.append((indice, vistas[datos['clave']]))
+                continue
+            vistas[datos['clave']] = indice
+            # Sin 'empleado' la venta es del usuario de la caja
+            datos.setdefault('empleado', self.usuario.pk)
+            validas.append((indice, datos))
+        return validas, repetidas
+
+    def _descartar_registradas(self, validas):
+        """Una consulta para todas las claves: las ya registradas se responden con su venta."""
+        if not validas:
+            return validas
+        registradas = dict(
+            VentaSincronizada.objects.filter(clave__in=[d['clave'] for _, d in validas])
+            .values_list('clave', 'nota_id')
+        )
+        pendientes = []
+        for indice, datos in validas:
+            if datos['clave'] in registradas:
+                self._resultado(indice, datos['clave'], DUPLICADA, registradas[datos['clave']])
+            else:
+                pendientes.append((indice, datos))
+        return pendientes
+
+    def _resolver_referencias(self, validas):
+        """Una consulta para productos y otra para usuarios; informa todos los faltantes de cada venta."""
+        producto_ids = {d['producto_id'] for _, datos in validas for d in datos['detalles']}
+        usuario_ids = {datos['cliente'] for _, datos in validas}
+        usuario_ids.update(datos['empleado'] for _, datos in validas if datos['empleado'] is not None)
+
+        productos = set(Product.objects.filter(id__in=producto_ids).values_list('id', flat=True)) if producto_ids else set()
+        usuarios = set(Usuario.objects.filter(id__in=usuario_ids).values_list('id', flat=True)) if usuario_ids else set()
+
+        resueltas = []
+        for indice, datos in validas:
+            errores = []
+            if datos['cliente'] not in usuarios:
+                errores.append(f"Cliente inexistente: id={datos['cliente']}.")
+            if datos['empleado'] is not None and datos['empleado'] not in usuarios:
+                errores.append(f"Empleado inexistente: id={datos['empleado']}.")
+            faltantes = sorted({d['producto_id'] for d in datos['detalles']} - productos)
+            if faltantes:
+                errores.append(f"Productos inexistentes: id={', '.join(map(str, faltantes))}.")
+
+            if errores:
+                self._resultado(indice, datos['clave'], ERROR, errores=errores)
+            else:
+                resueltas.append((indice, datos))
+        return resueltas
+
+    def _procesar_lote(self, lote):
+        try:
+            with transaction.atomic():
+                resultados = self._escribir(lote)
+        except IntegrityError:
+            # Otra petición (la misma caja reintentando) registró alguna de estas
+            # claves mientras tanto: se responden como duplicadas y se reintenta el resto
+            lote = self._descartar_registradas(lote)
+            try:
+                with transaction.atomic():
+                    resultados = self._escribir(lote)
+            except IntegrityError:
+                # Otro conflicto (una clave de nuevo, o un cliente/producto borrado
+                # a mitad del lote): venta por venta, para que sólo falle la afectada
+                resultados = self._escribir_por_separado(self._descartar_registradas(lote))
+
+        for indice, clave, estado, nota_id, errores in resultados:
+            self._resultado(indice, clave, estado, nota_id, errores)
+
+    def _escribir_por_separado(self, lote):
+        resultados = []
+        for indice, datos in lote:
+            try:
+                with transaction.atomic():
+                    resultados += self._escribir([(indice, datos)])
+            except IntegrityError:
+                resultados.append((indice, datos['clave'], ERROR, None, [
+                    "No se pudo registrar la venta: el cliente, el empleado o algún producto se "
+                    "eliminó mientras tanto, o la clave se registró en otra petición. Reintente."
+                ]))
+        return resultados
+
+    def _escribir(self, lote):
+        resultados = []
+        if not lote:
+            return resultados
+
+        # Productos bloqueados en orden de pk (sin deadlocks entre cajas)
+        producto_ids = {d['producto_id'] for _, datos in lote for d in datos['detalles']}
+        productos = resolver_en_lote(
+            Product.objects.only('id', 'nombre', 'stock', 'reservado'), producto_ids, bloquear=True
+        )
+        config = None
+        if any(datos['tipo_pago'] != 'efectivo' for _, datos in lote):
+            config = CreditConfig.objects.first()
+
+        aceptadas = []
+        for indice, datos in lote:
+            errores = self._verificar(datos, productos, config)
+            if errores:
+                resultados.append((indice, datos['clave'], ERROR, None, errores))
+                continue
+            for d in datos['detalles']:
+                productos[d['producto_id']].stock -= d['cantidad']
+            aceptadas.append((indice, datos))
+
+        if not aceptadas:
+            return resultados
+
+        notas = SalesNote.objects.bulk_create([
+            SalesNote(
+                cliente_id=datos['cliente'],
+                empleado_id=datos['empleado'],
+                monto=datos['monto'],
+                tipo_pago=datos['tipo_pago'],
+                estado='completada' if datos['tipo_pago'] == 'efectivo' else 'pendiente',
+            )
+            for _, datos in aceptadas
+        ])
+        # fecha y created_at son auto_now_add: la hora de la caja se escribe después del insert
+        fechadas = []
+        for nota, (_, datos) in zip(notas, aceptadas):
+            if datos.get('fecha_hora'):
+                nota.created_at = datos['fecha_hora']
+                nota.fecha = timezone.localdate(nota.created_at)
+                fechadas.append(nota)
+        SalesNote.objects.bulk_update(fechadas, ['fecha', 'created_at'])
+
+        detalles = []
+        pagos = []
+        creditos = []
+        for nota, (_, datos) in zip(notas, aceptadas):
+            for d in datos['detalles']:
+                detalles.append(DetailNote(
+                    nota=nota, producto_id=d['producto_id'], cantidad=d['cantidad'], subtotal=d['subtotal']
+                ))
+            if nota.tipo_pago == 'efectivo':
+                pagos.append(CashPayment(nota=nota, monto=nota.monto, metodo='efectivo', estado='completado'))
+            else:
+                creditos.append(self._credito(nota, config))
+
+        DetailNote.objects.bulk_create(detalles)
+        fechados = [d for d in detalles if d.fecha != d.nota.fecha]
+        for d in fechados:
+            d.fecha = d.nota.fecha
+        DetailNote.objects.bulk_update(fechados, ['fecha'])
+        CashPayment.objects.bulk_create(pagos)
+        if creditos:
+            CreditSale.objects.bulk_create(creditos)
+            CreditInstallment.objects.bulk_create([
+                cuota for credito in creditos for cuota in self._cuotas(credito, config)
+            ])
+
+        movidos = {d['producto_id'] for _, datos in aceptadas for d in datos['detalles']}
+        Product.objects.bulk_update([productos[pk] for pk in movidos], ['stock'])
+        diario = []
+        for nota, (_, datos) in zip(notas, aceptadas):
+            vendido = defaultdict(int)
+            for d in datos['detalles']:
+                vendido[d['producto_id']] -= d['cantidad']
+            diario += inventario.movimientos(vendido, 'venta', nota=nota, usuario=self.usuario)
+        MovimientoInventario.objects.bulk_create(diario)
+
+        # La clave se registra en la misma transacción que la venta
+        VentaSincronizada.objects.bulk_create([
+            VentaSincronizada(clave=datos['clave'], nota=nota, usuario=self.usuario)
+            for nota, (_, datos) in zip(notas, aceptadas)
+        ])
+
+        por_tipo = defaultdict(int)
+        for nota in notas:
+            por_tipo[etiqueta_tipo_pago(nota.tipo_pago)] += 1
+
+        def al_confirmar():
+            # bulk_update no emite señales: el catálogo (ETag, snapshot) se invalida a mano
+            versiones.invalidar(Product, movidos)
+            for tipo_pago, cantidad in por_tipo.items():
+                VENTAS_CONFIRMADAS.inc(cantidad, tipo_pago=tipo_pago)
+
+        transaction.on_commit(al_confirmar, robust=True)
+        resumen_horario.al_confirmar(notas)
+
+        for nota, (indice, datos) in zip(notas, aceptadas):
+            resultados.append((indice, datos['clave'], CREADA, nota.pk, None))
+        return resultados
+
+    def _verificar(self, datos, productos, config):
+        """Mismas reglas que SalesNoteSerializer.create, contra el disponible ya descontado del lote."""
+        errores = []
+        solicitado = defaultdict(int)
+        for d in datos['detalles']:
+            solicitado[d['producto_id']] += d['cantidad']
+        for pk, cantidad in solicitado.items():
+            producto = productos.get(pk)
+            if producto is None:  # eliminado después de resolver las referencias
+                errores.append(f"Producto inexistente: id={pk}.")
+            elif producto.disponible < cantidad:
+                errores.append(
+                    f"Stock insuficiente para '{producto.nombre}'. Disponible: {max(producto.disponible, 0)}, "
+                    f"solicitado: {cantidad}."
+                )
+        if datos['tipo_pago'] != 'efectivo' and config is None:
+            errores.append("No existe configuración de crédito (CreditConfig).")
+        return errores
+
+    def _credito(self, nota, config):
+        interes = Decimal(config.tasa_interes) / Decimal('100')
+        total_con_interes = (Decimal(nota.monto) * (Decimal('1') + interes)).quantize(Decimal('0.01'))
+        hoy = timezone.now().date()
+        return CreditSale(
+            nota_venta=nota,
+            total_original=nota.monto,
+            total_con_intereses=total_con_interes,
+            tasa_aplicada=config.tasa_interes,
+            saldo_pendiente=total_con_interes,
+            estado='activo',
+            fecha_inicial=hoy,
+            fecha_vencimiento=hoy + timedelta(days=config.cantidad_cuotas * config.dias_entre_cuotas),
+        )
+
+    def _cuotas(self, credito, config):
+        monto_cuota = (credito.total_con_intereses / Decimal(config.cantidad_cuotas)).quantize(Decimal('0.01'))
+        for i in range(1, config.cantidad_cuotas + 1):
+            yield CreditInstallment(
+                venta_credito=credito,
+                numero=i,
+                fecha_vencimiento=credito.fecha_inicial + timedelta(days=i * config.dias_entre_cuotas),
+                monto=monto_cuota,
+                pagado=False,
+            )
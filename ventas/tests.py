@@ -1,3 +1,178 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from productos.models import Category, MovimientoInventario, Product
+from usuarios.models import Usuario
+from reportes import rfm
+from ventas import resumen_horario
+from ventas.models import DetailNote, SalesNote, SegmentoRFM, VentaSincronizada, VentasHora
+from ventas.sincronizacion import CREADA, DUPLICADA, ERROR, SincronizadorVentas
+
+
+def venta(cliente, producto, cantidad=1, clave=None):
+    return {
+        'clave': clave or uuid.uuid4().hex,
+        'cliente': cliente.pk,
+        'monto': f'{cantidad * 10}.00',
+        'tipo_pago': 'efectivo',
+        'detalles': [{'producto_id': producto.pk, 'cantidad': cantidad, 'subtotal': f'{cantidad * 10}.00'}],
+    }
+
+
+# --------------------------------------------------------
+# Sincronización de cajas (/api/ventas/sync/)
+# --------------------------------------------------------
+class SincronizacionVentasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cajero = Usuario.objects.create_user('caja@test.com', 'x', username='caja')
+        cls.cliente = Usuario.objects.create_user('cliente@test.com', 'x', username='cliente')
+        categoria = Category.objects.create(descripcion='Ropa')
+        cls.producto = Product.objects.create(nombre='Camisa', precio=10, stock=10, categoria=categoria)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.cajero)
+
+    def sincronizar(self, ventas):
+        respuesta = self.api.post('/api/ventas/sync/', {'ventas': ventas}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        return respuesta.data
+
+    def stock(self):
+        self.producto.refresh_from_db()
+        return self.producto.stock
+
+    def test_crea_las_ventas_y_registra_las_claves(self):
+        ventas = [venta(self.cliente, self.producto, 2), venta(self.cliente, self.producto, 3)]
+        resumen = self.sincronizar(ventas)
+
+        self.assertEqual((resumen['creadas'], resumen['duplicadas'], resumen['con_error']), (2, 0, 0))
+        self.assertEqual(self.stock(), 5)
+        for v, resultado in zip(ventas, resumen['ventas']):
+            nota = SalesNote.objects.get(pk=resultado['id'])
+            self.assertEqual((nota.empleado_id, nota.estado), (self.cajero.pk, 'completada'))
+            self.assertEqual(VentaSincronizada.objects.get(clave=v['clave']).nota_id, nota.pk)
+        self.assertEqual(MovimientoInventario.objects.filter(tipo='venta').count(), 2)
+
+    def test_reenviar_no_duplica(self):
+        ventas = [venta(self.cliente, self.producto, 2), venta(self.cliente, self.producto, 3)]
+        primera = self.sincronizar(ventas)
+        segunda = self.sincronizar(ventas)
+
+        self.assertEqual((segunda['creadas'], segunda['duplicadas']), (0, 2))
+        self.assertEqual([r['estado'] for r in segunda['ventas']], [DUPLICADA, DUPLICADA])
+        self.assertEqual([r['id'] for r in segunda['ventas']], [r['id'] for r in primera['ventas']])
+        self.assertEqual(SalesNote.objects.count(), 2)
+        self.assertEqual(self.stock(), 5)
+
+    def test_clave_repetida_en_el_lote(self):
+        clave = uuid.uuid4().hex
+        resumen = self.sincronizar([venta(self.cliente, self.producto, 2, clave), venta(self.cliente, self.producto, 2, clave)])
+
+        self.assertEqual([r['estado'] for r in resumen['ventas']], [CREADA, DUPLICADA])
+        self.assertEqual(resumen['ventas'][0]['id'], resumen['ventas'][1]['id'])
+        self.assertEqual(self.stock(), 8)
+
+    @override_settings(VENTAS_SYNC_LOTE=2)
+    def test_cada_venta_se_informa_por_separado(self):
+        resumen = self.sincronizar([
+            venta(self.cliente, self.producto, 6),
+            venta(self.cliente, self.producto, 6),  # ya no alcanza el stock
+            {'clave': 'x', 'cliente': self.cliente.pk},  # mal formada
+            venta(self.cliente, self.producto, 4),  # en el segundo lote
+        ])
+
+        self.assertEqual([r['estado'] for r in resumen['ventas']], [CREADA, ERROR, ERROR, CREADA])
+        self.assertIn('Stock insuficiente', resumen['ventas'][1]['errores'][0])
+        self.assertEqual(self.stock(), 0)
+
+    def test_clave_registrada_por_otra_peticion_mientras_tanto(self):
+        anterior = venta(self.cliente, self.producto, 2)
+        self.sincronizar([anterior])
+        nueva = venta(self.cliente, self.producto, 3)
+
+        # La otra petición confirma después de que este lote leyó las claves registradas
+        descartar = SincronizadorVentas._descartar_registradas
+        llamadas = []
+
+        def descartar_tarde(sincronizador, validas):
+            llamadas.append(len(validas))
+            return validas if len(llamadas) == 1 else descartar(sincronizador, validas)
+
+        with mock.patch.object(SincronizadorVentas, '_descartar_registradas', descartar_tarde):
+            resumen = self.sincronizar([anterior, nueva])
+
+        self.assertEqual(len(llamadas), 2)
+        self.assertEqual([r['estado'] for r in resumen['ventas']], [DUPLICADA, CREADA])
+        self.assertEqual(SalesNote.objects.count(), 2)
+        self.assertEqual(self.stock(), 5)
+
+    def test_la_venta_queda_con_la_hora_de_la_caja(self):
+        rfm.refrescar()
+        en_caja = (timezone.now() - timedelta(days=3)).replace(microsecond=0)
+        con_hora = dict(venta(self.cliente, self.producto, 2), fecha_hora=en_caja.isoformat())
+        with self.captureOnCommitCallbacks(execute=True):
+            resumen = self.sincronizar([con_hora, venta(self.cliente, self.producto, 1)])
+
+        antigua, nueva = (SalesNote.objects.get(pk=r['id']) for r in resumen['ventas'])
+        self.assertEqual((antigua.created_at, antigua.fecha), (en_caja, timezone.localdate(en_caja)))
+        self.assertEqual(nueva.fecha, timezone.localdate())
+        self.assertEqual(DetailNote.objects.get(nota=antigua).fecha, timezone.localdate(en_caja))
+        self.assertEqual(DetailNote.objects.get(nota=nueva).fecha, timezone.localdate())
+        self.assertEqual(VentasHora.objects.get(hora=resumen_horario.inicio_hora(en_caja)).num_ventas, 1)
+
+        # El RFM incremental la toma aunque created_at sea anterior a la última corrida
+        self.assertEqual(rfm.refrescar()['agregados'], 1)
+        self.assertEqual(SegmentoRFM.objects.get(cliente=self.cliente).frecuencia, 2)
+
+    @override_settings(VENTAS_SYNC_MAX_DIAS=30)
+    def test_fecha_hora_fuera_de_rango(self):
+        ahora = timezone.now()
+        resumen = self.sincronizar([
+            dict(venta(self.cliente, self.producto), fecha_hora=(ahora + timedelta(hours=1)).isoformat()),
+            dict(venta(self.cliente, self.producto), fecha_hora=(ahora - timedelta(days=31)).isoformat()),
+            dict(venta(self.cliente, self.producto), fecha_hora='ayer'),
+        ])
+        self.assertEqual([r['estado'] for r in resumen['ventas']], [ERROR, ERROR, ERROR])
+        self.assertFalse(SalesNote.objects.exists())
+
+    def test_cuerpo_invalido(self):
+        self.assertEqual(self.api.post('/api/ventas/sync/', {'ventas': []}, format='json').status_code, 400)
+        self.assertEqual(self.api.post('/api/ventas/sync/', {'ventas': 'x'}, format='json').status_code, 400)
+
+
+class SincronizacionConflictoTests(TransactionTestCase):
+    """Conflictos que sólo aparecen al confirmar la transacción del lote."""
+
+    def test_cliente_eliminado_a_mitad_del_lote(self):
+        cajero = Usuario.objects.create_user('caja@test.com', 'x', username='caja')
+        cliente = Usuario.objects.create_user('cliente@test.com', 'x', username='cliente')
+        eliminado = Usuario.objects.create_user('baja@test.com', 'x', username='baja')
+        producto = Product.objects.create(
+            nombre='Camisa', precio=10, stock=10, categoria=Category.objects.create(descripcion='Ropa')
+        )
+
+        resolver = SincronizadorVentas._resolver_referencias
+
+        def resolver_y_eliminar(sincronizador, validas):
+            resueltas = resolver(sincronizador, validas)
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {Usuario._meta.db_table} WHERE id = %s', [eliminado.pk])
+            return resueltas
+
+        with mock.patch.object(SincronizadorVentas, '_resolver_referencias', resolver_y_eliminar):
+            resumen = SincronizadorVentas(cajero).sincronizar([
+                venta(cliente, producto, 2), venta(eliminado, producto, 3),
+            ])
+
+        self.assertEqual([r['estado'] for r in resumen['ventas']], [CREADA, ERROR])
+        self.assertEqual(SalesNote.objects.count(), 1)
+        producto.refresh_from_db()
+        self.assertEqual(producto.stock, 8)
@@ -1,6 +1,13 @@
-from rest_framework import viewsets, permissions
+from collections import defaultdict
+
+from django.db import transaction
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from ventas import resumen_horario
 from ventas.models import SalesNote, DetailNote, CashPayment
 from ventas.serializers import SalesNoteSerializer, DetailNoteSerializer
+from ventas.sincronizacion import SincronizadorVentas, ErrorSincronizacion
+from productos import inventario
 from rest_framework.response import Response
 
 
@@ -10,13 +17,33 @@ class SalesNoteViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_destroy(self, instance):
-        # Devolver stock antes de eliminar
-        detalles = instance.detalles.all()
-        for d in detalles:
-            producto = d.producto
-            producto.stock += d.cantidad
-            producto.save(update_fields=['stock'])
-        instance.delete()
+        # Devolver stock antes de eliminar (un UPDATE y sus movimientos en el diario de inventario)
+        devueltas = defaultdict(int)
+        for producto_id, cantidad in instance.detalles.values_list('producto_id', 'cantidad'):
+            devueltas[producto_id] += cantidad
+        with transaction.atomic():
+            inventario.mover_stock(stock=devueltas, tipo='anulacion', nota=instance, usuario=self.request.user)
+            instance.delete()
+            resumen_horario.al_confirmar([instance], signo=-1)
+
+    @action(detail=False, methods=['post'], url_path='sync')
+    def sync(self, request):
+        """
+        POST /api/ventas/sync/  (ventas hechas sin conexión en una caja)
+
+        Body: {"ventas": [{"clave": "<uuid de la caja>", "cliente": 5, "empleado": 2,
+                           "monto": "120.00", "tipo_pago": "efectivo",
+                           "detalles": [{"producto_id": 1, "cantidad": 2, "subtotal": "120.00"}]}]}
+
+        Responde el estado de cada venta (creada, duplicada o error). Reenviar
+        una clave ya sincronizada devuelve la venta original sin crear otra.
+        """
+        ventas = request.data.get('ventas') if isinstance(request.data, dict) else request.data
+        try:
+            resumen = SincronizadorVentas(request.user).sincronizar(ventas)
+        except ErrorSincronizacion as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resumen, status=status.HTTP_200_OK)
 
 class DetailNoteViewSet(viewsets.ModelViewSet):
     queryset = DetailNote.objects.select_related('nota', 'producto').all()